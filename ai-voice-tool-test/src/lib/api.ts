@@ -10,6 +10,9 @@ export interface TranscriptMessage {
   role: TranscriptRole
   text: string
   timestamp?: string
+  seq?: number
+  start_ms?: number | null
+  end_ms?: number | null
 }
 
 export type Summary = Record<string, unknown>
@@ -67,6 +70,8 @@ export interface CallOut {
   phone_number: string
   load_number: string
   agent_config_id: string
+  campaign_id?: string | null
+  schedule_id?: string | null
   status: 'queued' | 'in_progress' | 'completed' | 'failed' | 'not_joined'
   retell_call_id?: string | null
   retell_call_access_token?: string | null
@@ -93,9 +98,102 @@ async function http<T>(path: string, options?: RequestInit): Promise<T> {
 
 export const listAgents = () => http<AgentRecord[]>('/api/configs/')
 export const getCall = (id: string) => http<CallOut>(`/api/calls/${id}`)
-export const listCalls = () => http<CallOut[]>('/api/calls/')
-export const startCall = (payload: CallStartRequest) => http<CallOut>(`/api/calls/start`, { method: 'POST', body: JSON.stringify(payload) })
+// One page of calls, newest first; pass nextCursor back to get the following page
+export const listCallsPage = async (cursor?: string, limit = 500) => {
+  const qs = new URLSearchParams({ limit: String(limit), ...(cursor ? { cursor } : {}) })
+  const res = await fetch(`${API_BASE}/api/calls/?${qs}`)
+  if (!res.ok) throw new Error(`HTTP ${res.status}: ${await res.text().catch(() => '')}`)
+  return { calls: (await res.json()) as CallOut[], nextCursor: res.headers.get('X-Next-Cursor') }
+}
+// Follows X-Next-Cursor so the list is not cut off at the server's page size (stops after `max` calls)
+export const listCalls = async (max = 5000) => {
+  const calls: CallOut[] = []
+  let cursor: string | null | undefined
+  do {
+    const page = await listCallsPage(cursor ?? undefined)
+    calls.push(...page.calls)
+    cursor = page.nextCursor
+  } while (cursor && calls.length < max)
+  return calls.slice(0, max)
+}
+// background: respond 202 with the queued row and create the Retell call server-side
+export const startCall = (payload: CallStartRequest, background = false) =>
+  http<CallOut>(`/api/calls/start${background ? '?background=true' : ''}`, { method: 'POST', body: JSON.stringify(payload) })
 export const refreshSummary = (id: string) => http<CallOut>(`/api/calls/${id}/refresh`, { method: 'POST' })
+export const getUtterances = (id: string, range: { from_seq?: number; to_seq?: number; from_ms?: number; to_ms?: number; limit?: number } = {}) => {
+  const qs = new URLSearchParams(Object.entries(range).map(([k, v]) => [k, String(v)])).toString()
+  return http<TranscriptMessage[]>(`/api/calls/${id}/utterances${qs ? `?${qs}` : ''}`)
+}
+
+export interface CallSearchHit {
+  id: string
+  driver_name: string
+  load_number: string
+  status: CallOut['status']
+  driver_status?: CallOut['driver_status']
+  started_at?: string | null
+  rank: number
+  snippet: string // HTML, matches wrapped in <mark>
+}
+
+export const searchCalls = async (q: string, cursor?: string, limit = 20) => {
+  const qs = new URLSearchParams({ q, limit: String(limit), ...(cursor ? { cursor } : {}) })
+  const res = await fetch(`${API_BASE}/api/calls/search?${qs}`)
+  if (!res.ok) throw new Error(`HTTP ${res.status}: ${await res.text().catch(() => '')}`)
+  return { hits: (await res.json()) as CallSearchHit[], nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
+// Live call updates (Server-Sent Events); returns an unsubscribe function
+export interface CallEvent {
+  type: 'call_updated'
+  seq: number
+  id: string
+  status?: CallOut['status']
+  driver_status?: CallOut['driver_status']
+  retell_call_id?: string | null
+  started_at?: string | null
+  completed_at?: string | null
+  structured?: Summary
+}
+
+export const subscribeCallEvents = (onEvent: (event: CallEvent) => void, callId?: string) => {
+  const source = new EventSource(`${API_BASE}/api/calls/events${callId ? `?call_id=${encodeURIComponent(callId)}` : ''}`)
+  source.addEventListener('call_updated', (e) => onEvent(JSON.parse((e as MessageEvent).data) as CallEvent))
+  return () => source.close()
+}
+
+// Recurring check calls per load
+export interface CallSchedule {
+  id: string
+  agent_config_id: string
+  driver_name: string
+  load_number: string
+  interval_seconds: number
+  next_run_at: string
+  stop_on_driver_status: NonNullable<CallOut['driver_status']>[]
+  max_calls?: number | null
+  calls_made: number
+  last_call_id?: string | null
+  status: 'active' | 'paused' | 'stopped'
+  stop_reason?: string | null
+}
+
+export interface ScheduleCreate {
+  agent_config_id: string
+  driver_name: string
+  load_number: string
+  interval_minutes?: number
+  first_call_at?: string
+  stop_on_driver_status?: NonNullable<CallOut['driver_status']>[]
+  max_calls?: number
+}
+
+export const listSchedules = (status?: CallSchedule['status']) =>
+  http<CallSchedule[]>(`/api/schedules/${status ? `?status=${status}` : ''}`)
+export const createSchedule = (payload: ScheduleCreate) =>
+  http<CallSchedule>('/api/schedules/', { method: 'POST', body: JSON.stringify(payload) })
+export const updateSchedule = (id: string, payload: { status?: CallSchedule['status']; interval_minutes?: number; next_call_at?: string }) =>
+  http<CallSchedule>(`/api/schedules/${id}`, { method: 'PATCH', body: JSON.stringify(payload) })
 
 // Agent detail endpoints
 export const getAgent = (agentId: string) => http<RetellAgent>(`/api/configs/${agentId}`)
@@ -0,0 +1,78 @@
+"""Benchmark replying turn by turn over long check-call transcripts.
+
+Compares rebuilding dialog state from the whole transcript on every turn
+(``next_agent_message``) with one ``DialogSession`` synced incrementally, and
+checks both produce the same replies (``tests/test_dialog.py`` covers edited
+and shrinking transcripts).
+
+Run from ``backend/``:
+
+    python -m bench.bench_dialog [calls] [turns]
+"""
+import random
+import sys
+import time
+
+from services.dialog import DialogSession, next_agent_message
+
+CONFIG = {"prompts": {"greeting_template": "Hi {driver_name}, checking on load {load_number}.",
+                      "emergency_trigger_phrases": ["accident", "blowout", "medical", "emergency"]}}
+CONTEXT = {"driver_name": "Mike", "load_number": "7781", "gps_location": "I-10 near Indio, CA"}
+DRIVER_PHRASES = [
+    "ok", "yes.", "driving", "I'm on I-10 near Indio", "stuck in traffic", "arriving at the dock",
+    "[inaudible]", "uh", "near Phoenix today", "running late, weather", "unloading now",
+    "fine", "somewhere on highway 95", "had a blowout", "#$%", "just outside Barstow",
+]
+
+
+def synthetic_calls(n: int, turns: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [[rng.choice(DRIVER_PHRASES) for _ in range(turns)] for _ in range(n)]
+
+
+def _stateless(call: list) -> list:
+    transcript, replies = [], []
+    for text in call:
+        reply = next_agent_message(transcript, CONFIG, CONTEXT)
+        replies.append(reply)
+        transcript.append({"role": "agent", "text": reply})
+        transcript.append({"role": "driver", "text": text})
+    return replies
+
+
+def _session(call: list) -> list:
+    # Same path as the custom-LLM socket: sync() with the growing transcript
+    session = DialogSession(CONFIG, CONTEXT)
+    transcript, replies = [], []
+    for text in call:
+        session.sync(transcript)
+        reply = session.reply()
+        replies.append(reply)
+        transcript.append({"role": "agent", "text": reply})
+        transcript.append({"role": "driver", "text": text})
+    return replies
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    calls = synthetic_calls(n, turns)
+
+    start = time.perf_counter()
+    before = [_stateless(c) for c in calls]
+    rescan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = [_session(c) for c in calls]
+    incremental = time.perf_counter() - start
+
+    assert before == after, "DialogSession replies differ from next_agent_message"
+    total = n * turns
+    print(f"calls: {n} x {turns} driver turns")
+    print(f"rescan per turn:  {rescan / total * 1e6:10.1f} us/turn")
+    print(f"DialogSession:    {incremental / total * 1e6:10.1f} us/turn")
+    print(f"speedup:          {rescan / incremental:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark generate_structured_summary over synthetic check-call transcripts.
+
+Run from ``backend/``:
+
+    python -m bench.bench_postprocess [transcripts] [max_turns]
+"""
+import random
+import sys
+import time
+
+from services.postprocess import generate_structured_summary
+
+PHRASES = [
+    "I'm on I-10 near Indio, CA", "on I-15 N near Barstow", "I'm driving", "eta is 8:30 pm",
+    "ETA around tomorrow", "stuck in traffic", "heavy snow here", "arrived at the receiver",
+    "arriving now", "at dock 5", "in door 42", "unloading now", "waiting for lumper",
+    "detention again", "will do", "okay", "got it", "yes", "fine", "by the gas station",
+    "delayed by weather", "running late", "tonight", "today at 7.15 am", "near Phoenix, AZ",
+    "Hi Bob, this is Dispatch with a check call on load 123.", "Can you give me an update?",
+]
+EMERGENCY_PHRASES = [
+    "got a tire blowout", "there was an accident", "medical issue", "call 911", "load shifted",
+    "someone is hurt", "need an ambulance", "I'm safe", "no injuries",
+]
+
+
+def synthetic_transcripts(n: int, max_turns: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        pool = PHRASES + EMERGENCY_PHRASES if rng.random() < 0.2 else PHRASES
+        out.append([
+            {"role": rng.choice(["agent", "driver"]), "text": " ".join(rng.sample(pool, rng.randint(1, 4)))}
+            for _ in range(rng.randint(0, max_turns))
+        ])
+    return out
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    max_turns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    transcripts = synthetic_transcripts(n, max_turns)
+    start = time.perf_counter()
+    for t in transcripts:
+        generate_structured_summary(t)
+    elapsed = time.perf_counter() - start
+    print(f"transcripts: {n} (up to {max_turns} turns)")
+    print(f"total:       {elapsed:.3f} s")
+    print(f"per summary: {elapsed / n * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Simulate a day of recurring check calls with a fake clock and fake Retell/PostgREST.
+
+Creates ``--schedules`` schedules (every ``--interval-minutes``, first calls
+spread over one interval), then advances a fake clock in ``--tick`` second
+steps, calling ``CallScheduler.run_due()`` at each step. After every placed
+call the driver has arrived with probability ``--arrive``; the next run must
+then stop the schedule instead of calling. Halfway through, the scheduler is
+replaced by a fresh instance that reloads its state from the (fake) table, as
+after a restart.
+
+Checks that no schedule is called more often than its interval allows, that
+schedules stop only on arrival, and reports calls placed, DB round trips per
+call and the cost of an idle tick.
+
+Settings are still loaded (``backend/.env`` or the environment), but nothing
+leaves the machine. Run from ``backend/``::
+
+    python -m bench.bench_scheduler [--schedules 500] [--hours 24] [--interval-minutes 120]
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+import uvicorn
+from supabase import acreate_client
+
+from bench import fakes
+from bench.load_test import KEY, _free_port
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+from services.scheduler import SCHEDULES_TABLE, CallScheduler, Schedule, new_schedule_row
+
+AGENT_CONFIG_ID = "00000000-0000-0000-0000-0000000005c1"
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+async def simulate(args: argparse.Namespace) -> int:
+    rng = random.Random(args.seed)
+    store = fakes.PostgrestStore()
+    fakes.seed(store, AGENT_CONFIG_ID, "agent_scheduler_sim", 0)
+    retell_port, postgrest_port = _free_port(), _free_port()
+    servers = [
+        uvicorn.Server(uvicorn.Config(fakes.retell_app(fakes.Latency(args.latency_ms)), port=retell_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(fakes.postgrest_app(fakes.Latency(args.latency_ms), store), port=postgrest_port, log_level="warning")),
+    ]
+    serving = [asyncio.create_task(s.serve()) for s in servers]
+    while not all(s.started for s in servers):
+        await asyncio.sleep(0.01)
+
+    sb = await acreate_client(f"http://127.0.0.1:{postgrest_port}", KEY)
+    retell_client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{retell_port}")
+    service = RetellService(retell_client)
+    limiter = AsyncRateLimiter(1e9, 10**6)
+    clock = FakeClock(1_800_000_000.0)
+
+    def new_scheduler() -> CallScheduler:
+        return CallScheduler(sb, service, limiter, args.concurrency, retry_seconds=300, clock=clock)
+
+    interval = args.interval_minutes * 60
+    scheduler = new_scheduler()
+    for i in range(args.schedules):
+        row = new_schedule_row(
+            AGENT_CONFIG_ID, f"Driver {i}", f"SIM-{i}", interval,
+            clock() + rng.uniform(0, interval), ["Arrived"], None,
+        )
+        await sb.table(SCHEDULES_TABLE).insert(row).execute()
+        scheduler.track(Schedule.from_row(row))
+
+    calls = store.table("calls")
+    call_times: dict = {}
+    idle_ticks, idle_seconds = 0, 0.0
+    placed = 0
+    total_ticks = int(args.hours * 3600 / args.tick)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{postgrest_port}") as admin:
+        await admin.post("/__reset")
+        wall = time.perf_counter()
+        for tick in range(total_ticks):
+            if tick == total_ticks // 2:
+                # Restart: all in-memory state is dropped and rebuilt from the table
+                scheduler = new_scheduler()
+                await scheduler.load()
+            clock.advance(args.tick)
+            before = len(calls.rows)
+            started = time.perf_counter()
+            fired = await scheduler.run_due()
+            if not fired:
+                idle_ticks += 1
+                idle_seconds += time.perf_counter() - started
+            for row in calls.rows[before:]:
+                placed += 1
+                call_times.setdefault(row["schedule_id"], []).append(clock())
+                if rng.random() < args.arrive:
+                    row["driver_status"] = "Arrived"
+        wall = time.perf_counter() - wall
+        db = (await admin.get("/__stats")).json()
+
+    schedules = store.table(SCHEDULES_TABLE).rows
+    stop_reasons = Counter(r.get("stop_reason") for r in schedules if r["status"] == "stopped")
+    too_close = sum(
+        1 for times in call_times.values() for a, b in zip(times, times[1:]) if b - a < interval - args.tick
+    )
+    max_calls = max((len(t) for t in call_times.values()), default=0)
+    allowed = int(args.hours * 3600 // interval) + 1
+
+    print(f"schedules:              {args.schedules} every {args.interval_minutes} min, {args.hours} h simulated")
+    print(f"calls placed:           {placed}  (max per schedule {max_calls}, allowed {allowed})")
+    print(f"stopped:                {dict(stop_reasons)}")
+    print(f"still active:           {sum(r['status'] == 'active' for r in schedules)}")
+    print(f"calls closer than interval: {too_close}")
+    print(f"db round trips / call:  {db['total'] / placed:.2f}" if placed else "db round trips / call:  -")
+    print(f"idle tick:              {idle_seconds / idle_ticks * 1e6:.1f} us" if idle_ticks else "idle tick: -")
+    print(f"wall time:              {wall:.2f} s for {total_ticks} ticks")
+    print(f"scheduler stats:        {scheduler.stats()}")
+
+    await retell_client.aclose()
+    await sb.postgrest.session.aclose()
+    for s in servers:
+        s.should_exit = True
+    await asyncio.gather(*serving)
+
+    ok = too_close == 0 and max_calls <= allowed and set(stop_reasons) <= {"driver_status Arrived"}
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schedules", type=int, default=500)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--interval-minutes", type=int, default=120)
+    parser.add_argument("--tick", type=float, default=60.0, help="Fake-clock step in seconds")
+    parser.add_argument("--arrive", type=float, default=0.15, help="Chance the driver has arrived after a call")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected fake Retell/PostgREST latency")
+    parser.add_argument("--seed", type=int, default=7)
+    raise SystemExit(asyncio.run(simulate(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""In-memory stand-ins for the Retell API and Supabase's PostgREST, for load tests.
+
+Both are small Starlette apps with a configurable injected latency (fixed
+milliseconds plus uniform jitter) and per-endpoint request counters exposed on
+``GET /__stats`` (``POST /__reset`` clears them). They implement only what the
+backend sends:
+
+* Retell: ``get-agent``, ``v2/create-web-call``, ``v2/get-call``.
+* PostgREST: select with ``eq``/``neq``/``gt``/``gte``/``lt``/``lte``/``in``
+  filters, ``order``, ``limit``/``offset`` and single-object responses;
+  insert/upsert (``resolution=ignore-duplicates``), update and delete; and the
+  ``append_call_utterances`` / ``apply_call_analyzed`` RPCs from
+  ``db/schema.sql``. Unsupported filters (e.g. keyset ``or=``) are ignored.
+
+Used by ``bench.load_test``; can also be served on its own::
+
+    python -m bench.fakes [--retell-port 9101] [--postgrest-port 9102] [--latency-ms 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+class Latency:
+    def __init__(self, ms: float = 0.0, jitter_ms: float = 0.0) -> None:
+        self.ms = ms
+        self.jitter_ms = jitter_ms
+
+    async def wait(self) -> None:
+        delay = self.ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+
+def _stats_routes(counts: Counter) -> List[Route]:
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse({"total": sum(counts.values()), "by_endpoint": dict(counts)})
+
+    async def reset(request: Request) -> JSONResponse:
+        counts.clear()
+        return JSONResponse({"ok": True})
+
+    return [Route("/__stats", stats, methods=["GET"]), Route("/__reset", reset, methods=["POST"])]
+
+
+# -----------------------
+# Retell
+# -----------------------
+def retell_app(latency: Latency) -> Starlette:
+    counts: Counter = Counter()
+    calls: Dict[str, Dict[str, Any]] = {}
+
+    async def get_agent(request: Request) -> JSONResponse:
+        counts["get_agent"] += 1
+        await latency.wait()
+        agent_id = request.path_params["agent_id"]
+        return JSONResponse({"agent_id": agent_id, "agent_name": "Load test agent", "version": 0})
+
+    async def create_web_call(request: Request) -> JSONResponse:
+        counts["create_web_call"] += 1
+        await latency.wait()
+        body = await request.json()
+        call = {
+            "call_id": "call_" + uuid.uuid4().hex,
+            "access_token": uuid.uuid4().hex,
+            "agent_id": body.get("agent_id"),
+            "metadata": body.get("metadata"),
+            "call_status": "registered",
+        }
+        calls[call["call_id"]] = call
+        return JSONResponse(call, status_code=201)
+
+    async def get_call(request: Request) -> JSONResponse:
+        counts["get_call"] += 1
+        await latency.wait()
+        call = calls.get(request.path_params["call_id"])
+        if call is None:
+            return JSONResponse({"error_message": "Call not found"}, status_code=404)
+        return JSONResponse(call)
+
+    return Starlette(routes=[
+        Route("/get-agent/{agent_id}", get_agent, methods=["GET"]),
+        Route("/v2/create-web-call", create_web_call, methods=["POST"]),
+        Route("/v2/get-call/{call_id}", get_call, methods=["GET"]),
+        *_stats_routes(counts),
+    ])
+
+
+# -----------------------
+# PostgREST
+# -----------------------
+# Natural keys used for upserts and for the RPCs' lookups
+PRIMARY_KEYS = {"call_utterances": ("call_id", "seq"), "webhook_events": ("call_id", "event")}
+
+_OPS: Dict[str, Callable[[Any, str], bool]] = {
+    "eq": lambda v, x: v is not None and str(v) == x,
+    "neq": lambda v, x: v is None or str(v) != x,
+    "gt": lambda v, x: v is not None and _cmp(v, x) > 0,
+    "gte": lambda v, x: v is not None and _cmp(v, x) >= 0,
+    "lt": lambda v, x: v is not None and _cmp(v, x) < 0,
+    "lte": lambda v, x: v is not None and _cmp(v, x) <= 0,
+    "in": lambda v, x: v is not None and str(v) in {p.strip('"') for p in x.strip("()").split(",")},
+    "is": lambda v, x: v is None if x == "null" else str(v).lower() == x,
+}
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "or", "and", "columns"}
+
+
+def _cmp(value: Any, raw: str) -> int:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        other: Any = float(raw)
+    else:
+        value, other = str(value), raw
+    return (value > other) - (value < other)
+
+
+def _split_terms(expr: str) -> List[str]:
+    """Top-level terms of an ``or=(...)`` / ``and(...)`` body, respecting parens and quotes."""
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "()":
+            depth += 1 if ch == "(" else -1
+        elif not quoted and ch == "," and depth == 0:
+            terms.append(expr[start:i])
+            start = i + 1
+    terms.append(expr[start:])
+    return terms
+
+
+def _matches(row: Dict[str, Any], term: str) -> bool:
+    for group, combine in (("and(", all), ("or(", any)):
+        if term.startswith(group):
+            return combine(_matches(row, t) for t in _split_terms(term[len(group):-1]))
+    column, _, expr = term.partition(".")
+    negate = expr.startswith("not.")
+    op, _, raw = expr[4 if negate else 0:].partition(".")
+    return _OPS[op](row.get(column), raw.strip('"')) != negate
+
+
+class Table:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows: List[Dict[str, Any]] = []
+        self.keys = PRIMARY_KEYS.get(name, ("id",))
+        self.index: Dict[Tuple, Dict[str, Any]] = {}
+        # Sorted copies per ``order`` string, valid while ``version`` is unchanged
+        self.version = 0
+        self._sorted: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+
+    def touch(self) -> None:
+        self.version += 1
+
+    def ordered(self, order: Optional[str]) -> List[Dict[str, Any]]:
+        if not order:
+            return self.rows
+        cached = self._sorted.get(order)
+        if cached is None or cached[0] != self.version:
+            cached = self._sorted[order] = (self.version, _ordered(self.rows, order))
+        return cached[1]
+
+    def key(self, row: Dict[str, Any]) -> Optional[Tuple]:
+        key = tuple(row.get(k) for k in self.keys)
+        return None if None in key else key
+
+    def insert(self, row: Dict[str, Any], ignore_duplicates: bool = False) -> Optional[Dict[str, Any]]:
+        key = self.key(row)
+        if key is not None and key in self.index:
+            if ignore_duplicates:
+                return None
+            self.touch()
+            self.index[key].update(row)
+            return self.index[key]
+        self.touch()
+        row = dict(row)
+        self.rows.append(row)
+        if key is not None:
+            self.index[key] = row
+        return row
+
+    def delete(self, rows: List[Dict[str, Any]]) -> None:
+        self.touch()
+        gone = {id(r) for r in rows}
+        self.rows = [r for r in self.rows if id(r) not in gone]
+        for r in rows:
+            self.index.pop(self.key(r), None)
+
+
+class PostgrestStore:
+    def __init__(self) -> None:
+        self.tables: Dict[str, Table] = {}
+
+    def table(self, name: str) -> Table:
+        if name not in self.tables:
+            self.tables[name] = Table(name)
+        return self.tables[name]
+
+    def find_call(self, call_id: Optional[str], retell_call_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        calls = self.table("calls")
+        if call_id and (call_id,) in calls.index:
+            return calls.index[(call_id,)]
+        if retell_call_id:
+            for row in calls.rows:
+                if row.get("retell_call_id") == retell_call_id:
+                    return row
+        return None
+
+    # The two RPCs used by webhook ingestion, reduced to their effect on rows
+    def append_call_utterances(self, args: Dict[str, Any]) -> Optional[int]:
+        if args.get("p_event"):
+            ledger = self.table("webhook_events")
+            if (args.get("p_retell_call_id"), args["p_event"]) in ledger.index:
+                return -1
+        call = self.find_call(args.get("p_call_id"), args.get("p_retell_call_id"))
+        if call is None:
+            return None
+        utterances = self.table("call_utterances")
+        stored = call.setdefault("_utterances", 0)
+        offset = int(args.get("p_offset") or 0)
+        if offset > stored:
+            return stored
+        turns = args.get("p_turns") or []
+        for i, turn in enumerate(turns, start=offset):
+            row = utterances.index.get((call["id"], i))
+            if row is not None and not args.get("p_final") and len(turn.get("text") or "") < len(row.get("text") or ""):
+                continue  # an older delivery never truncates a stored utterance
+            utterances.insert({"call_id": call["id"], "seq": i, **turn})
+        call["_utterances"] = max(stored, offset + len(turns))
+        return call["_utterances"]
+
+    def apply_call_analyzed(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        call = self.find_call(args.get("p_call_id"), args.get("p_retell_call_id"))
+        if call is None:
+            raise LookupError("call not found")
+        if args.get("p_event"):
+            # Event ledger written in the same "transaction" as the update
+            ledger = {"call_id": args.get("p_retell_call_id"), "event": args["p_event"]}
+            if self.table("webhook_events").insert(ledger, ignore_duplicates=True) is None:
+                return []
+        self.table("calls").touch()
+        call.update(args.get("p_updates") or {})
+        call["summary"] = {**(call.get("summary") or {}), **(args.get("p_summary") or {})}
+        row = {k: call.get(k) for k in ("id", "status", "driver_status", "retell_call_id", "started_at", "completed_at")}
+        return [{**row, "structured": call["summary"].get("structured")}]
+
+
+def _public(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in row.items() if not k.startswith("_")}
+
+
+def _project(row: Dict[str, Any], select: str) -> Dict[str, Any]:
+    if not select or select == "*":
+        return _public(row)
+    return {c: row.get(c) for c in (c.strip() for c in select.split(",")) if c}
+
+
+def _filtered(table: Table, params: List[Tuple[str, str]], rows: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    rows = table.rows if rows is None else rows
+    if len(table.keys) == 1:
+        # Primary-key lookup without a scan
+        for column, expr in params:
+            if column == table.keys[0] and expr.startswith("eq."):
+                row = table.index.get((expr[3:],))
+                rows = [row] if row is not None else []
+                break
+    for column, expr in params:
+        if column == "or":
+            rows = [r for r in rows if any(_matches(r, t) for t in _split_terms(expr[1:-1]))]
+        if column in _RESERVED:
+            continue
+        op, _, raw = expr.partition(".")
+        test = _OPS.get(op)
+        if test is not None:
+            rows = [r for r in rows if test(r.get(column), raw)]
+    return rows
+
+
+def _ordered(rows: List[Dict[str, Any]], order: Optional[str]) -> List[Dict[str, Any]]:
+    if not order:
+        return rows
+    rows = list(rows)
+    # Stable sorts from the last key to the first; nulls last ascending, first descending (Postgres defaults)
+    for term in reversed(order.split(",")):
+        column, _, direction = term.partition(".")
+        rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+    return rows
+
+
+def postgrest_app(latency: Latency, store: Optional[PostgrestStore] = None) -> Starlette:
+    counts: Counter = Counter()
+    store = store or PostgrestStore()
+
+    def respond(request: Request, rows: List[Dict[str, Any]], status: int = 200) -> Response:
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return JSONResponse({"message": "JSON object requested, multiple (or no) rows returned"}, status_code=406)
+            return JSONResponse(rows[0], status_code=status)
+        return JSONResponse(rows, status_code=status)
+
+    async def table(request: Request) -> Response:
+        name = request.path_params["table"]
+        counts[f"{request.method} {name}"] += 1
+        await latency.wait()
+        t = store.table(name)
+        params = list(request.query_params.multi_items())
+        query = dict(params)
+        select = query.get("select", "*")
+
+        if request.method == "GET":
+            rows = _filtered(t, params, t.ordered(query.get("order")))
+            offset = int(query.get("offset", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+            rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+            return respond(request, [_project(r, select) for r in rows])
+
+        if request.method == "POST":
+            body = await request.json()
+            ignore = "ignore-duplicates" in request.headers.get("prefer", "")
+            out = [store_row for r in (body if isinstance(body, list) else [body])
+                   if (store_row := t.insert(r, ignore_duplicates=ignore)) is not None]
+            return respond(request, [_public(r) for r in out], status=201)
+
+        rows = list(_filtered(t, params))
+        if request.method == "PATCH":
+            body = await request.json()
+            t.touch()
+            for r in rows:
+                r.update(body)
+            return respond(request, [_public(r) for r in rows])
+        if request.method == "DELETE":
+            t.delete(rows)
+            return respond(request, [_public(r) for r in rows])
+        return JSONResponse({"message": "Method not allowed"}, status_code=405)
+
+    async def rpc(request: Request) -> Response:
+        fn = request.path_params["fn"]
+        counts[f"rpc/{fn}"] += 1
+        await latency.wait()
+        handler = getattr(store, fn, None) if fn in ("append_call_utterances", "apply_call_analyzed") else None
+        if handler is None:
+            return JSONResponse({"message": f"Could not find the function public.{fn}"}, status_code=404)
+        try:
+            return JSONResponse(handler(await request.json()))
+        except LookupError as e:
+            # What PostgREST sends for ``raise ... using errcode = 'P0002'``
+            return JSONResponse({"code": "P0002", "message": str(e), "details": None, "hint": None}, status_code=400)
+
+    app = Starlette(routes=[
+        Route("/rest/v1/rpc/{fn}", rpc, methods=["POST"]),
+        Route("/rest/v1/{table}", table, methods=["GET", "POST", "PATCH", "DELETE"]),
+        *_stats_routes(counts),
+    ])
+    app.state.store = store
+    return app
+
+
+def seed_call_id(i: int) -> str:
+    """Id of the ``i``-th seeded call, so drivers can address seeded rows."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"loadtest-call-{i}"))
+
+
+def seed(store: PostgrestStore, agent_config_id: str, agent_id: str, calls: int) -> None:
+    """One agent config plus ``calls`` calls for the list endpoint and webhook events."""
+    store.table("agent_configs").insert({"id": agent_config_id, "agent_id": agent_id, "name": "Load test"})
+    now = datetime.now(timezone.utc).timestamp()
+    statuses = ("completed", "failed", "in_progress")
+    for i in range(calls):
+        store.table("calls").insert({
+            "id": seed_call_id(i),
+            "driver_name": f"Driver {i}",
+            "load_number": f"LT-{i}",
+            "agent_config_id": agent_config_id,
+            "status": statuses[i % len(statuses)],
+            "driver_status": "Driving",
+            "retell_call_id": f"seed_{i}",
+            "started_at": datetime.fromtimestamp(now - i * 60, tz=timezone.utc).isoformat(),
+            "summary": {"structured": {"call_outcome": "In-Transit Update"}},
+        })
+
+
+async def serve(
+    retell_port: int,
+    postgrest_port: int,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    db_latency_ms: Optional[float] = None,
+    seed_calls: int = 0,
+    agent_config_id: str = "",
+    agent_id: str = "",
+) -> None:
+    store = PostgrestStore()
+    if agent_config_id:
+        seed(store, agent_config_id, agent_id, seed_calls)
+    db_latency = Latency(latency_ms if db_latency_ms is None else db_latency_ms, jitter_ms)
+    servers = [
+        uvicorn.Server(uvicorn.Config(retell_app(Latency(latency_ms, jitter_ms)), port=retell_port, log_level="warning", access_log=False)),
+        uvicorn.Server(uvicorn.Config(postgrest_app(db_latency, store), port=postgrest_port, log_level="warning", access_log=False)),
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--retell-port", type=int, default=9101)
+    parser.add_argument("--postgrest-port", type=int, default=9102)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected Retell (and default DB) latency")
+    parser.add_argument("--db-latency-ms", type=float, default=None, help="Injected PostgREST latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(serve(args.retell_port, args.postgrest_port, args.latency_ms, args.jitter_ms, args.db_latency_ms))
+
+
+if __name__ == "__main__":
+    main()
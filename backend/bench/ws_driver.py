@@ -0,0 +1,85 @@
+"""Simulated driver for the custom-LLM WebSocket (``/api/llm/ws/{call_id}``).
+
+Plays Retell's side of the protocol against a running backend: sends
+``call_details``, then one ``response_required`` per scripted driver line with
+the growing transcript, and prints the agent replies and client-side turn
+latency.
+
+Run from ``backend/`` with the app up (``uvicorn main:app``)::
+
+    python -m bench.ws_driver [--url ws://localhost:8000/api/llm/ws] [--calls 1] [--quiet]
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import websockets
+
+SCRIPT = [
+    "Hey, yeah I'm driving.",
+    "ok",
+    "I'm on I-10 near Indio, about two hours out, some traffic.",
+    "Should be there by 6pm.",
+    "We just had an accident, the truck in front of me crashed.",
+]
+
+
+async def _read_reply(ws, response_id: int) -> dict:
+    content = []
+    while True:
+        frame = json.loads(await ws.recv())
+        if frame.get("response_type") != "response" or frame.get("response_id") != response_id:
+            continue
+        content.append(frame.get("content", ""))
+        if frame.get("content_complete"):
+            return {"content": "".join(content), "end_call": frame.get("end_call")}
+
+
+async def run_call(url: str, quiet: bool) -> list:
+    call_id = str(uuid.uuid4())
+    latencies = []
+    async with websockets.connect(f"{url}/{call_id}") as ws:
+        config = json.loads(await ws.recv())
+        assert config.get("response_type") == "config", config
+        await ws.send(json.dumps({
+            "interaction_type": "call_details",
+            "call": {"call_id": call_id, "retell_llm_dynamic_variables": {"driver_name": "Mike", "load_id": "7781"}},
+        }))
+        greeting = await _read_reply(ws, 0)
+        transcript = [{"role": "agent", "content": greeting["content"]}]
+        if not quiet:
+            print(f"agent:  {greeting['content']}")
+        for response_id, line in enumerate(SCRIPT, start=1):
+            transcript.append({"role": "user", "content": line})
+            # Retell streams partial transcripts before asking for a response
+            await ws.send(json.dumps({"interaction_type": "update_only", "transcript": transcript}))
+            started = time.perf_counter()
+            await ws.send(json.dumps({"interaction_type": "response_required", "response_id": response_id, "transcript": transcript}))
+            reply = await _read_reply(ws, response_id)
+            latencies.append(time.perf_counter() - started)
+            transcript.append({"role": "agent", "content": reply["content"]})
+            if not quiet:
+                print(f"driver: {line}\nagent:  {reply['content']}")
+            if reply["end_call"]:
+                break
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="ws://localhost:8000/api/llm/ws")
+    parser.add_argument("--calls", type=int, default=1, help="concurrent simulated calls")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    results = await asyncio.gather(*(run_call(args.url, args.quiet or args.calls > 1) for _ in range(args.calls)))
+    samples = sorted(s for r in results for s in r)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(0.99 * len(samples)))] * 1000
+    print(f"turns: {len(samples)}  p50: {p50:.2f} ms  p99: {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
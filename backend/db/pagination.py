@@ -0,0 +1,70 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(started_at: Optional[str], row_id: str) -> str:
+    raw = json.dumps([started_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Split a cursor into its sort value (not validated) and a canonical row id."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return key, str(uuid.UUID(str(row_id)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_started_at(value: Any) -> Optional[str]:
+    """Canonical ISO timestamp for a keyset value; None for calls without started_at.
+
+    Raises ValueError for anything else, so client cursors can never carry
+    PostgREST filter syntax into ``or=``.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError("started_at must be an ISO timestamp")
+    return datetime.fromisoformat(value).isoformat()
+
+
+def keyset_filter(started_at: Optional[str], row_id: str, desc: bool) -> str:
+    """PostgREST ``or`` filter for rows after (started_at, id) in the given order.
+
+    Postgres sorts nulls first descending and last ascending, which decides
+    where calls without ``started_at`` fall. Both values must already be
+    validated (see ``parse_started_at``).
+    """
+    op = "lt" if desc else "gt"
+    if started_at is None:
+        nulls = f"and(started_at.is.null,id.{op}.{row_id})"
+        return f"{nulls},started_at.not.is.null" if desc else nulls
+    after = f'started_at.{op}."{started_at}",and(started_at.eq."{started_at}",id.{op}.{row_id})'
+    return after if desc else f"{after},started_at.is.null"
+
+
+def keyset_before(query: Any, cursor: Optional[str]) -> Any:
+    """Restrict a query ordered by (started_at desc, id desc) to rows after ``cursor``."""
+    if not cursor:
+        return query
+    started_at, row_id = decode_cursor(cursor)
+    try:
+        started_at = parse_started_at(started_at)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.or_(keyset_filter(started_at, row_id, desc=True))
+
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the page after ``rows``; None when this was the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.get("started_at"), last["id"])
@@ -22,8 +22,324 @@ create table if not exists public.calls (
   completed_at timestamp with time zone
 );
 
+-- Calls started by a bulk campaign (POST /api/calls/campaigns)
+alter table public.calls add column if not exists campaign_id uuid;
+create index if not exists calls_campaign_idx on public.calls(campaign_id) where campaign_id is not null;
+
+-- Retell webhook deliveries already processed (idempotency ledger)
+create table if not exists public.webhook_events (
+  id bigint generated always as identity primary key,
+  call_id text not null,
+  event text not null,
+  received_at timestamp with time zone default now(),
+  constraint webhook_events_call_event_key unique (call_id, event)
+);
+
 -- Helpful indexes
 create index if not exists calls_agent_idx on public.calls(agent_config_id);
 create index if not exists calls_started_idx on public.calls(started_at desc);
 
+-- Keyset pagination on (started_at, id) for GET /api/calls, alone and per filter
+create index if not exists calls_started_id_idx on public.calls(started_at desc, id desc);
+create index if not exists calls_status_started_idx on public.calls(status, started_at desc, id desc);
+create index if not exists calls_driver_status_started_idx on public.calls(driver_status, started_at desc, id desc);
+create index if not exists calls_agent_started_idx on public.calls(agent_config_id, started_at desc, id desc);
+
+-- Apply a Retell lifecycle webhook (call_started / call_ended / call_analyzed) in
+-- one round trip: locate the row by our id (or the Retell call id), set the scalar
+-- columns present in p_updates and merge p_summary into the existing summary JSON
+-- server-side. A late call_started never moves a finished call back to in_progress.
+-- With p_event the delivery is recorded in webhook_events in the same transaction,
+-- so an event only counts as processed once it has been applied: a redelivery of
+-- an applied event returns no row, and an unknown call raises (P0002) and records
+-- nothing. Only the columns pushed to live subscribers come back (summary and
+-- the search vectors stay server-side).
+drop function if exists public.apply_call_analyzed(uuid, text, jsonb, jsonb);
+drop function if exists public.apply_call_analyzed(uuid, text, jsonb, jsonb, text);
+create or replace function public.apply_call_analyzed(
+  p_call_id uuid,
+  p_retell_call_id text,
+  p_updates jsonb,
+  p_summary jsonb,
+  p_event text default null
+) returns table (
+  id uuid,
+  status text,
+  driver_status text,
+  retell_call_id text,
+  started_at timestamptz,
+  completed_at timestamptz,
+  structured jsonb
+)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+  if p_event is not null then
+    -- Blocks on a concurrent delivery of the same event until it commits or rolls back
+    insert into public.webhook_events (call_id, event) values (p_retell_call_id, p_event)
+    on conflict (call_id, event) do nothing;
+    if not found then
+      return;
+    end if;
+  end if;
+  return query
+  update public.calls c set
+    retell_call_id = coalesce(p_updates->>'retell_call_id', c.retell_call_id),
+    status = case
+      when c.status in ('completed', 'failed') and p_updates->>'status' = 'in_progress' then c.status
+      else coalesce(p_updates->>'status', c.status)
+    end,
+    started_at = coalesce((p_updates->>'started_at')::timestamptz, c.started_at),
+    completed_at = coalesce((p_updates->>'completed_at')::timestamptz, c.completed_at),
+    transcript = coalesce(p_updates->'transcript', c.transcript),
+    retell_call_access_token = coalesce(p_updates->>'retell_call_access_token', c.retell_call_access_token),
+    driver_status = coalesce(p_updates->>'driver_status', c.driver_status),
+    summary = coalesce(c.summary, '{}'::jsonb) || coalesce(p_summary, '{}'::jsonb)
+  where case
+    when p_call_id is not null then c.id = p_call_id
+    else c.retell_call_id = p_retell_call_id
+  end
+  returning c.id, c.status, c.driver_status, c.retell_call_id, c.started_at, c.completed_at,
+    c.summary->'structured';
+  if not found then
+    raise exception 'call not found' using errcode = 'P0002';
+  end if;
+end;
+$$;
+
+-- Transcript utterances, one row per turn (calls.transcript is legacy and no longer
+-- written). Times are ms from call start, taken from Retell word timings.
+create table if not exists public.call_utterances (
+  call_id uuid not null references public.calls(id) on delete cascade,
+  seq integer not null,
+  role text not null,
+  text text,
+  start_ms integer,
+  end_ms integer,
+  primary key (call_id, seq)
+);
+create index if not exists call_utterances_time_idx on public.call_utterances(call_id, start_ms);
+
+-- One-off copy of legacy JSONB transcripts into call_utterances (idempotent)
+insert into public.call_utterances (call_id, seq, role, text)
+select c.id, t.ord - 1, coalesce(t.value->>'role', 'unknown'), t.value->>'text'
+from public.calls c
+cross join lateral jsonb_array_elements(c.transcript) with ordinality as t(value, ord)
+where jsonb_typeof(c.transcript) = 'array'
+on conflict (call_id, seq) do nothing;
+
+-- Superseded by append_call_utterances (transcripts moved to call_utterances)
+drop function if exists public.append_call_transcript(uuid, text, integer, jsonb);
+drop function if exists public.append_call_utterances(uuid, text, integer, jsonb);
+drop function if exists public.append_call_utterances(uuid, text, integer, jsonb, boolean);
+
+-- Upsert utterances in one statement without resending what is stored. p_turns
+-- holds utterances p_offset.. of the call; callers start one before the stored
+-- count so the latest utterance, which live transcripts rewrite while it is
+-- spoken, is corrected. A stored row is overwritten when its content differs
+-- and the new text is at least as long (so an older, out-of-order delivery
+-- cannot truncate it), or unconditionally with p_final (call_ended /
+-- call_analyzed carry the final transcript). Returns the stored count
+-- afterwards; a value below p_offset means utterances are missing and the
+-- caller must resend from there. Null when the call does not exist, -1 when
+-- p_event (a lifecycle event) is already in webhook_events, so a redelivery
+-- writes nothing.
+create or replace function public.append_call_utterances(
+  p_call_id uuid,
+  p_retell_call_id text,
+  p_offset integer,
+  p_turns jsonb,
+  p_final boolean default false,
+  p_event text default null
+) returns integer
+language plpgsql
+as $$
+declare
+  v_id uuid;
+  v_len integer;
+  v_rewritten integer;
+  v_new_text text;
+begin
+  if p_event is not null and exists (
+    select 1 from public.webhook_events w where w.call_id = p_retell_call_id and w.event = p_event
+  ) then
+    return -1;
+  end if;
+  -- Row lock serialises concurrent appends for the same call
+  select c.id into v_id
+  from public.calls c
+  where case
+    when p_call_id is not null then c.id = p_call_id
+    else c.retell_call_id = p_retell_call_id
+  end
+  for update;
+  if v_id is null then
+    return null;
+  end if;
+  select coalesce(max(u.seq) + 1, 0) into v_len from public.call_utterances u where u.call_id = v_id;
+  if v_len < p_offset then
+    return v_len;
+  end if;
+  -- Only inserted or actually changed rows are returned (xmax = 0 marks an insert)
+  with up as (
+    insert into public.call_utterances as u (call_id, seq, role, text, start_ms, end_ms)
+    select v_id, p_offset + t.ord - 1, coalesce(t.value->>'role', 'unknown'), t.value->>'text',
+           (t.value->>'start_ms')::integer, (t.value->>'end_ms')::integer
+    from jsonb_array_elements(p_turns) with ordinality as t(value, ord)
+    on conflict (call_id, seq) do update set
+      role = excluded.role,
+      text = excluded.text,
+      start_ms = excluded.start_ms,
+      end_ms = excluded.end_ms
+    where (u.role, u.text, u.start_ms, u.end_ms) is distinct from (excluded.role, excluded.text, excluded.start_ms, excluded.end_ms)
+      and (p_final or length(coalesce(excluded.text, '')) >= length(coalesce(u.text, '')))
+    returning u.seq, u.text, (u.xmax = 0) as inserted
+  )
+  select count(*) filter (where not up.inserted), string_agg(up.text, ' ' order by up.seq) filter (where up.inserted)
+  into v_rewritten, v_new_text
+  from up;
+  -- Search vector: extend with new utterances, rebuild when a stored one changed
+  if v_rewritten > 0 then
+    update public.calls c set transcript_tsv = to_tsvector('english', coalesce(
+      (select string_agg(u.text, ' ' order by u.seq) from public.call_utterances u where u.call_id = v_id), ''))
+    where c.id = v_id;
+  elsif v_new_text is not null then
+    update public.calls c set
+      transcript_tsv = coalesce(c.transcript_tsv, ''::tsvector) || to_tsvector('english', v_new_text)
+    where c.id = v_id;
+  end if;
+  return greatest(v_len, p_offset + jsonb_array_length(p_turns));
+end;
+$$;
+
+-- Full-text search (GET /api/calls/search). transcript_tsv is extended by
+-- append_call_utterances as utterances arrive; search_tsv combines it with the
+-- key summary fields (weight A) and is what the GIN index covers.
+alter table public.calls add column if not exists transcript_tsv tsvector;
+
+create or replace function public.call_summary_text(p_driver_name text, p_load_number text, p_summary jsonb)
+returns text
+language sql
+immutable
+as $$
+  select concat_ws(' ',
+    p_driver_name,
+    p_load_number,
+    p_summary->'structured'->>'call_outcome',
+    p_summary->'structured'->>'current_location',
+    p_summary->'structured'->>'delay_reason',
+    p_summary->'structured'->>'unloading_status',
+    p_summary->'structured'->>'emergency_type',
+    p_summary->'structured'->>'emergency_location',
+    p_summary->'call_analysis'->>'call_summary'
+  );
+$$;
+
+alter table public.calls add column if not exists search_tsv tsvector
+  generated always as (
+    setweight(to_tsvector('english'::regconfig, public.call_summary_text(driver_name, load_number, summary)), 'A')
+    || setweight(coalesce(transcript_tsv, ''::tsvector), 'B')
+  ) stored;
+create index if not exists calls_search_idx on public.calls using gin (search_tsv);
+
+-- One-off: index transcripts stored before transcript_tsv existed
+update public.calls c set transcript_tsv = to_tsvector('english', u.body)
+from (
+  select call_id, string_agg(text, ' ' order by seq) as body
+  from public.call_utterances
+  group by call_id
+) u
+where c.id = u.call_id and c.transcript_tsv is null;
+
+-- Ranked search with keyset pagination on (rank, id). p_query uses web search
+-- syntax ("I-10 detention", "late or delayed", "-emergency"). Snippets are only
+-- built for the returned page.
+create or replace function public.search_calls(
+  p_query text,
+  p_limit integer default 20,
+  p_after_rank real default null,
+  p_after_id uuid default null,
+  p_started_after timestamptz default null,
+  p_started_before timestamptz default null
+) returns table (
+  id uuid,
+  driver_name text,
+  load_number text,
+  status text,
+  driver_status text,
+  started_at timestamptz,
+  rank real,
+  snippet text
+)
+language sql
+stable
+as $$
+  with q as (
+    select websearch_to_tsquery('english', p_query) as query
+  ),
+  page as (
+    select c.id, c.driver_name, c.load_number, c.status, c.driver_status, c.started_at, c.summary,
+           ts_rank_cd(c.search_tsv, q.query) as rank
+    from public.calls c, q
+    where c.search_tsv @@ q.query
+      and (p_started_after is null or c.started_at >= p_started_after)
+      and (p_started_before is null or c.started_at < p_started_before)
+      and (p_after_rank is null or (ts_rank_cd(c.search_tsv, q.query), c.id) < (p_after_rank, p_after_id))
+    order by rank desc, c.id desc
+    limit p_limit
+  )
+  select p.id, p.driver_name, p.load_number, p.status, p.driver_status, p.started_at, p.rank,
+         ts_headline(
+           'english',
+           concat_ws(' ',
+             public.call_summary_text(p.driver_name, p.load_number, p.summary),
+             (select string_agg(u.text, ' ' order by u.seq) from public.call_utterances u where u.call_id = p.id)
+           ),
+           q.query,
+           'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter=" ... "'
+         ) as snippet
+  from page p, q
+  order by p.rank desc, p.id desc;
+$$;
+
+-- Bulk write of regenerated structured summaries (summary backfill). p_rows is a
+-- JSON array of {"id": uuid, "structured": {...}}; other summary keys are kept.
+create or replace function public.bulk_set_structured_summaries(p_rows jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.calls c set
+      summary = coalesce(c.summary, '{}'::jsonb) || jsonb_build_object('structured', r.structured)
+    from jsonb_to_recordset(p_rows) as r(id uuid, structured jsonb)
+    where c.id = r.id
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
+
+-- Recurring check calls per load (routers/schedules.py, services/scheduler.py).
+-- The app keeps active schedules in an in-memory timer heap and writes
+-- next_run_at back before each call, conditionally on the value it read, so a
+-- restart resumes where it stopped and two instances never fire the same run.
+create table if not exists public.call_schedules (
+  id uuid primary key,
+  agent_config_id uuid not null references public.agent_configs(id) on delete cascade,
+  driver_name text not null,
+  load_number text not null,
+  interval_seconds integer not null check (interval_seconds >= 60),
+  next_run_at timestamp with time zone not null,
+  stop_on_driver_status text[] not null default '{Arrived}',
+  max_calls integer,
+  calls_made integer not null default 0,
+  last_call_id uuid,
+  status text not null default 'active' check (status in ('active', 'paused', 'stopped')),
+  stop_reason text,
+  created_at timestamp with time zone default now()
+);
+create index if not exists call_schedules_due_idx on public.call_schedules(next_run_at) where status = 'active';
+create index if not exists call_schedules_load_idx on public.call_schedules(load_number);
 
+alter table public.calls add column if not exists schedule_id uuid;
+create index if not exists calls_schedule_idx on public.calls(schedule_id) where schedule_id is not null;
@@ -1,8 +1,47 @@
-from supabase import create_client, Client
+import threading
+from typing import Optional
+
+from fastapi import Request
+from supabase import AsyncClient, Client, acreate_client, create_client
 from settings import settings
 
 
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
 def get_supabase() -> Client:
-    # Lazily create the client to avoid import-time errors if env is missing
-    return create_client(settings.supabase_url, settings.supabase_service_role_key)
+    """Return the process-wide sync Supabase client, creating it on first use.
+
+    Used outside the request path (scripts, CLIs, worker threads). Routes use
+    the async client from ``get_db`` instead.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            # Lazily create the client to avoid import-time errors if env is missing
+            if _client is None:
+                _client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    return _client
+
+
+def close_supabase() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.postgrest.session.close()
+            _client = None
+
+
+async def create_async_supabase() -> AsyncClient:
+    """Create the async Supabase client owned by the app lifespan."""
+    return await acreate_client(settings.supabase_url, settings.supabase_service_role_key)
+
+
+async def close_async_supabase(client: AsyncClient) -> None:
+    await client.postgrest.session.aclose()
+
 
+def get_db(request: Request) -> AsyncClient:
+    """FastAPI dependency returning the shared async Supabase client."""
+    return request.app.state.supabase
@@ -1,12 +1,109 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from settings import settings
-from routers import configs, calls, retell
+from routers import configs, calls, retell, llm, schedules
+from services.retell import RetellService, create_retell_breaker, create_retell_cache, create_retell_client, create_retell_retry_policy
+from db.supabase_client import close_async_supabase, close_supabase, create_async_supabase
+from services.call_events import TranscriptCursor, handle_webhook_event
+from services.idempotency import WebhookDeduplicator
+from services.ingest import IngestionWorkers, create_event_queue
+from services.flow_templates import FlowTemplateRegistry
+from services.ratelimit import AsyncRateLimiter
+from services.custom_llm import TurnLatency
+from services.broker import CallEventBroker
+from services.call_start import CallDispatcher
+from services.scheduler import CallScheduler
+from services import metrics
+from services.logs import CorrelationMiddleware, configure_logging
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = configure_logging(settings.log_level, settings.log_format, settings.log_payload_sample_rate)
+    try:
+        # One pooled Retell client per process, reused by every request
+        app.state.retell_client = create_retell_client()
+        app.state.retell_cache = create_retell_cache()
+        app.state.retell_retry = create_retell_retry_policy()
+        app.state.retell_breaker = create_retell_breaker()
+        # Flow templates are read, validated and serialised once
+        app.state.flow_templates = FlowTemplateRegistry.load_dir()
+        # Likewise a single async Supabase client (PostgREST session reused)
+        app.state.supabase = await create_async_supabase()
+        metrics.instrument_postgrest(app.state.supabase.postgrest.session)
+
+        # Live call updates pushed to dashboards (GET /api/calls/events)
+        app.state.call_events = CallEventBroker(settings.call_events_queue_size, settings.call_events_history)
+
+        # Webhook events are acknowledged immediately and persisted by these workers
+        app.state.dedup = WebhookDeduplicator(settings.webhook_dedup_max_entries, settings.webhook_dedup_ttl_seconds)
+        app.state.transcript_cursor = TranscriptCursor(settings.webhook_transcript_cursor_entries)
+        queue = create_event_queue(
+            settings.webhook_queue_backend, settings.webhook_queue_maxsize, settings.webhook_queue_path
+        )
+        app.state.ingestion = IngestionWorkers(
+            queue,
+            lambda body: handle_webhook_event(
+                app.state.supabase, app.state.dedup, body, app.state.call_events, app.state.transcript_cursor
+            ),
+            settings.webhook_workers,
+        )
+        app.state.ingestion.start()
+        app.state.backfill_jobs = {}
+        app.state.campaigns = {}
+        # Shared by every campaign so the process as a whole respects Retell's limit
+        app.state.retell_call_limiter = AsyncRateLimiter(settings.retell_calls_per_second, settings.retell_calls_burst)
+        # Retell step of POST /api/calls/start?background=true
+        app.state.call_dispatcher = CallDispatcher(
+            app.state.supabase,
+            RetellService(app.state.retell_client, app.state.retell_cache, app.state.retell_retry, app.state.retell_breaker),
+            app.state.retell_call_limiter,
+            settings.call_dispatch_workers,
+            settings.call_dispatch_queue_size,
+            app.state.call_events,
+        )
+        app.state.call_dispatcher.start()
+        # Recurring check calls; active schedules are loaded from call_schedules by the scheduler task
+        app.state.call_scheduler = CallScheduler(
+            app.state.supabase,
+            RetellService(app.state.retell_client, app.state.retell_cache, app.state.retell_retry, app.state.retell_breaker),
+            app.state.retell_call_limiter,
+            settings.scheduler_concurrency,
+            settings.scheduler_retry_seconds,
+            app.state.call_events,
+        )
+        if settings.scheduler_enabled:
+            app.state.call_scheduler.start()
+        app.state.llm_latency = TurnLatency(settings.llm_latency_samples)
+
+        # Point-in-time gauges read at scrape time
+        metrics.REGISTRY.gauge_callback("webhook_queue_depth", "Webhook events waiting", app.state.ingestion.queue.qsize)
+        metrics.REGISTRY.gauge_callback("call_dispatch_queue_depth", "Background call starts waiting for Retell", lambda: app.state.call_dispatcher.stats()["depth"])
+        metrics.REGISTRY.gauge_callback("webhook_in_flight", "Webhook events being persisted", lambda: app.state.ingestion.in_flight)
+        metrics.REGISTRY.gauge_callback("call_event_subscribers", "Open live-update streams", lambda: app.state.call_events.stats()["subscribers"])
+        metrics.REGISTRY.gauge_callback("llm_connections_open", "Open custom-LLM WebSockets", lambda: app.state.llm_latency.connections_open)
+        metrics.REGISTRY.gauge_callback("retell_circuit_open", "1 while the Retell circuit breaker is not closed", lambda: app.state.retell_breaker.state != "closed")
+        yield
+    finally:
+        # Setup may have failed part-way: stop only what was created
+        metrics.REGISTRY.clear_callbacks()
+        for name in ("ingestion", "call_scheduler", "call_dispatcher"):
+            component = getattr(app.state, name, None)
+            if component is not None:
+                await component.stop()
+        if getattr(app.state, "retell_client", None) is not None:
+            await app.state.retell_client.aclose()
+        if getattr(app.state, "supabase", None) is not None:
+            await close_async_supabase(app.state.supabase)
+        close_supabase()
+        log_listener.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="AI Voice Agent Backend", version="0.1.0")
+    app = FastAPI(title="AI Voice Agent Backend", version="0.1.0", lifespan=lifespan)
 
     # CORS for local dev and deploy base URL
     app.add_middleware(
@@ -15,11 +112,26 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Request-ID"],
     )
 
+    # Metrics cost one flag check per observation when disabled
+    metrics.REGISTRY.enabled = settings.metrics_enabled
+    if settings.metrics_enabled:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def prometheus_metrics() -> Response:
+            return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+    # request_id for log correlation, echoed as X-Request-ID
+    app.add_middleware(CorrelationMiddleware)
+
     app.include_router(configs.router, prefix="/api/configs", tags=["configs"])
     app.include_router(calls.router, prefix="/api/calls", tags=["calls"])
     app.include_router(retell.router, prefix="/api/webhook", tags=["webhook"])
+    app.include_router(llm.router, prefix="/api/llm", tags=["llm"])
+    app.include_router(schedules.router, prefix="/api/schedules", tags=["schedules"])
 
     @app.get("/health")
     def health() -> dict:
@@ -29,5 +141,3 @@ def create_app() -> FastAPI:
 
 
 app = create_app()
-
-
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Dict, List, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AgentVoiceSettings(BaseModel):
@@ -42,24 +43,80 @@ class AgentConfigOut(AgentConfigIn):
     id: str
 
 
+class FlowParams(BaseModel):
+    """Per-customer overrides for a flow template (see services.flow_templates)."""
+    model_config = ConfigDict(extra="forbid")
+
+    global_prompt: Optional[str] = None
+    model: Optional[str] = None
+    node_prompts: Optional[Dict[str, str]] = None
+    variable_choices: Optional[Dict[str, List[str]]] = None
+
+
+class AgentFlowSelection(BaseModel):
+    """Flow fields of the create-agent payload; other keys are read separately."""
+    flow_template: Optional[str] = None
+    flow_template_version: Optional[int] = None
+    flow_params: Optional[FlowParams] = None
+
+
 class CallStartRequest(BaseModel):
     driver_name: str
     load_number: str
     agent_config_id: str
 
 
+class CampaignCall(BaseModel):
+    driver_name: str
+    load_number: str
+
+
+class CampaignRequest(BaseModel):
+    agent_config_id: str
+    calls: List[CampaignCall] = Field(..., min_length=1, max_length=1000)
+    concurrency: Optional[int] = Field(None, ge=1, le=100)
+
+
+DriverStatus = Literal["Driving", "Delayed", "Arrived", "Unloading", "Not Joined", "Emergency"]
+
+
+class ScheduleCreate(BaseModel):
+    agent_config_id: str
+    driver_name: str
+    load_number: str
+    interval_minutes: int = Field(120, ge=1, le=24 * 60)
+    # Defaults to now (first call right away)
+    first_call_at: Optional[datetime] = None
+    stop_on_driver_status: List[DriverStatus] = Field(default_factory=lambda: ["Arrived"])
+    max_calls: Optional[int] = Field(None, ge=1)
+
+
+class ScheduleUpdate(BaseModel):
+    status: Optional[Literal["active", "paused", "stopped"]] = None
+    interval_minutes: Optional[int] = Field(None, ge=1, le=24 * 60)
+    next_call_at: Optional[datetime] = None
+
+
+class BackfillRequest(BaseModel):
+    batch_size: int = Field(500, ge=1, le=5000)
+    workers: Optional[int] = Field(None, ge=1)
+    resume: bool = False
+
+
 class CallOut(BaseModel):
     id: str
     driver_name: str
     load_number: str
     agent_config_id: str
+    campaign_id: Optional[str] = None
+    schedule_id: Optional[str] = None
     status: Literal["queued", "in_progress", "completed", "failed", "not_joined", "error"]
+    # Null until the Retell call exists (queued, background or scheduled dispatch)
     retell_call_id: Optional[str] = None
+    retell_call_access_token: Optional[str] = None
     summary: Optional[Dict[str, Any]] = None
     transcript: Optional[List[Dict[str, Any]]] = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
-    retell_call_id: str
-    retell_call_access_token: str
     driver_status: Optional[Literal["Driving", "Delayed", "Arrived", "Unloading", "Not Joined", "Emergency"]] = None
 
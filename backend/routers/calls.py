@@ -1,11 +1,26 @@
-from typing import List
-from fastapi import APIRouter, HTTPException
-from db.supabase_client import get_supabase
-from models.schemas import CallStartRequest, CallOut
-from services.retell import RetellService
+import asyncio
+import html
+import json
+from typing import Any, Dict, List, Literal, Optional
+from supabase import AsyncClient
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from db.supabase_client import get_db
+from db.pagination import decode_cursor, encode_cursor, keyset_before, next_cursor
+from models.schemas import BackfillRequest, CampaignRequest, CallStartRequest, CallOut
+from services.retell import RetellService, get_retell_service
 from services.postprocess import generate_structured_summary
-import uuid
-from datetime import datetime, timezone
+from services.backfill import BackfillJob
+from services.campaigns import Campaign
+from services.jobs import ACTIVE_STATUSES, prune_finished
+from services.export import stream_export
+from services.broker import CallEventBroker, call_event, get_broker
+from services.transcripts import load_transcript, query_utterances
+from services.logs import log_context
+from services import call_start
+from services.call_start import CallDispatcher, CallStartRejected, DispatchFull, get_call_dispatcher, new_call_row
+from settings import settings
+from datetime import datetime
 
 
 router = APIRouter()
@@ -14,77 +29,315 @@ router = APIRouter()
 CALLS_TABLE = "calls"
 
 
-@router.get("/", response_model=List[CallOut])
-def list_calls():
-    sb = get_supabase()
-    resp = sb.table(CALLS_TABLE).select("*").order("started_at", desc=True).execute()
-    return resp.data or []
+# Columns a client may request through ``fields``; the default list view skips
+# the summary JSONB column and the access token. Transcripts live in
+# call_utterances and are only returned by the detail and utterance routes.
+CALL_COLUMNS = {
+    "id",
+    "driver_name",
+    "load_number",
+    "agent_config_id",
+    "campaign_id",
+    "schedule_id",
+    "status",
+    "driver_status",
+    "retell_call_id",
+    "retell_call_access_token",
+    "summary",
+    "started_at",
+    "completed_at",
+}
+LIST_FIELDS = "id, driver_name, load_number, agent_config_id, status, driver_status, retell_call_id, started_at, completed_at"
+
+
+def _projection(fields: Optional[str]) -> str:
+    if not fields:
+        return LIST_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CALL_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id and started_at are needed to build the next cursor
+    for key in ("started_at", "id"):
+        if key not in requested:
+            requested.insert(0, key)
+    return ", ".join(requested)
+
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def list_calls(
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(default=None, description="Comma-separated columns; defaults to a list view"),
+    status: Optional[str] = None,
+    driver_status: Optional[str] = None,
+    agent_config_id: Optional[str] = None,
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    sb: AsyncClient = Depends(get_db),
+):
+    """Newest calls first, paginated by an opaque cursor on (started_at, id).
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
+    query = sb.table(CALLS_TABLE).select(_projection(fields))
+    if status:
+        query = query.eq("status", status)
+    if driver_status:
+        query = query.eq("driver_status", driver_status)
+    if agent_config_id:
+        query = query.eq("agent_config_id", agent_config_id)
+    if started_after:
+        query = query.gte("started_at", started_after.isoformat())
+    if started_before:
+        query = query.lt("started_at", started_before.isoformat())
+    query = keyset_before(query, cursor)
+    resp = await query.order("started_at", desc=True).order("id", desc=True).limit(limit).execute()
+    rows = resp.data or []
+    nxt = next_cursor(rows, limit)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    return rows
+
+
+@router.get("/export")
+async def export_calls(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    include_transcript: bool = True,
+    status: Optional[str] = None,
+    driver_status: Optional[str] = None,
+    agent_config_id: Optional[str] = None,
+    sb: AsyncClient = Depends(get_db),
+):
+    """Stream every matching call (newest first) with summary fields flattened into columns."""
+    filters = {"status": status, "driver_status": driver_status, "agent_config_id": agent_config_id}
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"calls.{format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        stream_export(sb, format, filters, include_transcript, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/search", response_model=List[Dict[str, Any]])
+async def search_calls(
+    response: Response,
+    q: str = Query(min_length=2, max_length=200, description='Web search syntax, e.g. "I-10 detention"'),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    sb: AsyncClient = Depends(get_db),
+):
+    """Calls matching ``q`` in transcripts and key summary fields, best match first.
+
+    Each row carries ``rank`` and an HTML ``snippet`` with matches in ``<mark>``.
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
+    params: Dict[str, Any] = {
+        "p_query": q,
+        "p_limit": limit,
+        "p_started_after": started_after.isoformat() if started_after else None,
+        "p_started_before": started_before.isoformat() if started_before else None,
+    }
+    if cursor:
+        rank, last_id = decode_cursor(cursor)
+        try:
+            params["p_after_rank"] = float(rank)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        params["p_after_id"] = last_id
+    resp = await sb.rpc("search_calls", params).execute()
+    rows = resp.data or []
+    for r in rows:
+        # ts_headline does not escape the source text; keep only our markers as HTML
+        r["snippet"] = (
+            html.escape(r.get("snippet") or "").replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+        )
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(str(rows[-1]["rank"]), rows[-1]["id"])
+    return rows
+
+
+@router.get("/events")
+async def call_events(
+    request: Request,
+    call_id: Optional[str] = None,
+    broker: CallEventBroker = Depends(get_broker),
+):
+    """Server-Sent Events stream of call status/summary changes, optionally for one call.
+
+    Reconnecting clients send ``Last-Event-ID`` and receive what they missed
+    while it is still in the broker's history.
+    """
+    last_event_id = request.headers.get("last-event-id")
+
+    async def stream():
+        sub = broker.subscribe(call_id, int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await sub.get(timeout=settings.call_events_heartbeat_seconds)
+                if event is None:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/stats")
+async def call_events_stats(broker: CallEventBroker = Depends(get_broker)):
+    return broker.stats()
+
+
+@router.get("/dispatch/stats")
+async def call_dispatch_stats(dispatcher: CallDispatcher = Depends(get_call_dispatcher)):
+    return dispatcher.stats()
 
 
 @router.get("/{call_id}", response_model=CallOut)
-def get_call(call_id: str):
-    sb = get_supabase()
-    resp = sb.table(CALLS_TABLE).select("*").eq("id", call_id).single().execute()
+async def get_call(call_id: str, include_transcript: bool = True, sb: AsyncClient = Depends(get_db)):
+    columns = ", ".join(sorted(CALL_COLUMNS))
+    row_q = sb.table(CALLS_TABLE).select(columns).eq("id", call_id).single().execute()
+    if include_transcript:
+        resp, transcript = await asyncio.gather(row_q, load_transcript(sb, call_id))
+    else:
+        resp, transcript = await row_q, None
     if not resp.data:
         raise HTTPException(status_code=404, detail="Call not found")
-    return resp.data
+    return {**resp.data, "transcript": transcript}
 
 
-@router.post("/start", response_model=CallOut)
-def start_call(req: CallStartRequest):
-    sb = get_supabase()
+@router.get("/{call_id}/utterances", response_model=List[Dict[str, Any]])
+async def list_utterances(
+    call_id: str,
+    from_seq: Optional[int] = Query(default=None, ge=0),
+    to_seq: Optional[int] = Query(default=None, ge=0),
+    from_ms: Optional[int] = Query(default=None, ge=0, description="Utterances ending at or after this offset"),
+    to_ms: Optional[int] = Query(default=None, ge=0, description="Utterances starting before this offset"),
+    limit: int = Query(default=200, ge=1, le=1000),
+    sb: AsyncClient = Depends(get_db),
+):
+    """A slice of one call's transcript by sequence number and/or time (ms from call start)."""
+    return await query_utterances(sb, call_id, from_seq, to_seq, from_ms, to_ms, limit)
 
-    # Validate agent exists in Retell (no longer from DB)
-    service = RetellService()
 
-    cfg = sb.table("agent_configs").select("*").eq("id", req.agent_config_id).single().execute()
-    print("cfg->  ", cfg.data)
+@router.post("/start", response_model=CallOut, responses={202: {"description": "Call queued for background dispatch"}})
+async def start_call(
+    req: CallStartRequest,
+    background: bool = Query(default=False, description="Return 202 once the call row exists; Retell is called by a background worker"),
+    sb: AsyncClient = Depends(get_db),
+    service: RetellService = Depends(get_retell_service),
+    dispatcher: CallDispatcher = Depends(get_call_dispatcher),
+):
+    """Validate the agent, insert the call row and create the Retell call within ``call_start_deadline_seconds``."""
+    row = new_call_row(req.driver_name, req.load_number, req.agent_config_id)
+    with log_context(call_id=row["id"]):
+        try:
+            if not background:
+                return await call_start.start_call(sb, service, row, settings.call_start_deadline_seconds)
+            await call_start.queue_call(sb, service, dispatcher, row, settings.call_start_deadline_seconds)
+        except CallStartRejected as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Timed out starting call")
+        except DispatchFull:
+            raise HTTPException(status_code=503, detail="Call dispatch queue is full", headers={"Retry-After": "5"})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to start call: {e}")
+    return JSONResponse(row, status_code=202)
+
+
+@router.post("/campaigns")
+async def start_campaign(
+    req: CampaignRequest,
+    request: Request,
+    sb: AsyncClient = Depends(get_db),
+    service: RetellService = Depends(get_retell_service),
+):
+    """Start one outbound call per (driver_name, load_number) in the background."""
+    cfg = await sb.table("agent_configs").select("agent_id").eq("id", req.agent_config_id).single().execute()
     if not cfg.data:
         raise HTTPException(status_code=404, detail="Agent config not found")
     try:
-        agent = service.get_agent(cfg.data.get("agent_id"))
+        await service.get_agent(cfg.data.get("agent_id"))
     except Exception:
         raise HTTPException(status_code=404, detail="Agent not found")
-    print("agent->  ", agent)
-    call_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
-    row = {
-        "id": call_id,
-        "driver_name": req.driver_name,
-        "load_number": req.load_number,
-        "agent_config_id": req.agent_config_id,
-        "driver_status": "Not Joined",
-        "status": "queued",
-        "started_at": now,
-    }
-    sb.table(CALLS_TABLE).insert(row).execute()
+    campaign = Campaign(
+        agent_config_id=req.agent_config_id,
+        agent_id=cfg.data.get("agent_id"),
+        calls=[c.model_dump() for c in req.calls],
+        concurrency=req.concurrency or settings.campaign_concurrency,
+        limiter=request.app.state.retell_call_limiter,
+    )
+    campaigns = request.app.state.campaigns
+    prune_finished(campaigns, settings.jobs_retained)
+    campaigns[campaign.id] = campaign
+    campaign.start(sb, service)
+    return campaign.stats()
 
-    # Trigger Retell outbound call
-    try:
-        outbound_call = service.start_outbound_call(
-            agent_id=cfg.data.get("agent_id"),
-            driver_name=req.driver_name,
-            load_number=req.load_number,
-            metadata={"call_id": call_id},
-        )
-        sb.table(CALLS_TABLE).update({"status": "not_joined", "retell_call_id": outbound_call.get("call_id"), "retell_call_access_token": outbound_call.get("access_token")}).eq("id", call_id).execute()
-        row.update({"status": "not_joined", "retell_call_id": outbound_call.get("call_id"), "retell_call_access_token": outbound_call.get("access_token")})
-    except Exception as e:
-        sb.table(CALLS_TABLE).update({"status": "failed"}).eq("id", call_id).execute()
-        raise HTTPException(status_code=500, detail=f"Failed to start call: {e}")
 
-    return row
+@router.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, request: Request):
+    campaign = request.app.state.campaigns.get(campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign.stats()
 
 
 @router.post("/{call_id}/refresh", response_model=CallOut)
-def refresh_summary(call_id: str):
-    sb = get_supabase()
-    resp = sb.table(CALLS_TABLE).select("transcript").eq("id", call_id).single().execute()
+async def refresh_summary(
+    call_id: str,
+    sb: AsyncClient = Depends(get_db),
+    broker: CallEventBroker = Depends(get_broker),
+):
+    resp, transcript = await asyncio.gather(
+        sb.table(CALLS_TABLE).select("id").eq("id", call_id).single().execute(),
+        load_transcript(sb, call_id),
+    )
     if not resp.data:
         raise HTTPException(status_code=404, detail="Call not found")
-    transcript = resp.data.get("transcript") or []
     summary = generate_structured_summary(transcript)
-    upd = sb.table(CALLS_TABLE).update({"summary": summary}).eq("id", call_id).execute()
+    upd = await sb.table(CALLS_TABLE).update({"summary": summary}).eq("id", call_id).execute()
+    broker.publish(call_event(upd.data[0]))
     return upd.data[0]
 
 
+@router.post("/backfill")
+async def start_backfill(req: BackfillRequest, request: Request, sb: AsyncClient = Depends(get_db)):
+    """Regenerate structured summaries for all calls in the background."""
+    jobs = request.app.state.backfill_jobs
+    if any(j.status in ACTIVE_STATUSES for j in jobs.values()):
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+    prune_finished(jobs, settings.jobs_retained)
+    job = BackfillJob(
+        batch_size=req.batch_size,
+        workers=req.workers,
+        checkpoint_path=settings.backfill_checkpoint_path,
+        resume=req.resume,
+    )
+    jobs[job.id] = job
+    job.start(sb)
+    return job.stats()
+
+
+@router.get("/backfill/{job_id}")
+async def get_backfill(job_id: str, request: Request):
+    job = request.app.state.backfill_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return job.stats()
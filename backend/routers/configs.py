@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Any, Dict, List, Optional
-from services.retell import RetellService
-from db.supabase_client import get_supabase
+from pydantic import ValidationError
+from supabase import AsyncClient
+from services.retell import RetellService, get_retell_service
+from services.flow_templates import DEFAULT_TEMPLATE, FlowTemplateError, FlowTemplateRegistry, get_flow_templates
+from db.supabase_client import get_db
+from models.schemas import AgentFlowSelection
 import uuid
 
 
@@ -9,45 +13,83 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[Dict[str, Any]])
-def list_agents():
+async def list_agents(sb: AsyncClient = Depends(get_db)):
     # Return only DB-registered agents with id, agent_id, agent_name
-    sb = get_supabase()
-    rows = sb.table("agent_configs").select("id, agent_id, agent_name").order("created_at").execute()
+    rows = await sb.table("agent_configs").select("id, agent_id, agent_name").order("created_at").execute()
     return rows.data or []
 
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def cache_stats(request: Request):
+    return request.app.state.retell_cache.stats()
+
+
+@router.get("/retell/stats", response_model=Dict[str, Any])
+async def retell_stats(request: Request):
+    state = request.app.state
+    return {"retry": state.retell_retry.stats(), "breaker": state.retell_breaker.stats()}
+
+
+@router.get("/flow-templates", response_model=List[Dict[str, Any]])
+async def list_flow_templates(templates: FlowTemplateRegistry = Depends(get_flow_templates)):
+    return templates.list()
+
+
 @router.get("/flows/{conversation_flow_id}", response_model=Dict[str, Any])
-def get_conversation_flow(conversation_flow_id: str, version: Optional[int] = Query(default=None)):
-    service = RetellService()
+async def get_conversation_flow(
+    conversation_flow_id: str,
+    version: Optional[int] = Query(default=None),
+    service: RetellService = Depends(get_retell_service),
+):
     try:
-        return service.get_conversation_flow(conversation_flow_id, version=version)
+        return await service.get_conversation_flow(conversation_flow_id, version=version)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.put("/flows/{conversation_flow_id}", response_model=Dict[str, Any])
-def update_conversation_flow(conversation_flow_id: str, payload: Dict[str, Any], version: Optional[int] = Query(default=None)):
-    service = RetellService()
+async def update_conversation_flow(
+    conversation_flow_id: str,
+    payload: Dict[str, Any],
+    version: Optional[int] = Query(default=None),
+    service: RetellService = Depends(get_retell_service),
+):
     try:
-        return service.update_conversation_flow(conversation_flow_id, payload, version=version)
+        return await service.update_conversation_flow(conversation_flow_id, payload, version=version)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=Dict[str, Any])
-def create_agent(payload: Dict[str, Any]):
+async def create_agent(
+    payload: Dict[str, Any],
+    sb: AsyncClient = Depends(get_db),
+    service: RetellService = Depends(get_retell_service),
+    templates: FlowTemplateRegistry = Depends(get_flow_templates),
+):
     # Minimal accepted fields: agent_name, voice_id
+    # Optional: flow_template, flow_template_version, flow_params (see services.flow_templates)
     agent_name: Optional[str] = payload.get("agent_name")
     voice_id: Optional[str] = payload.get("voice_id")
-    service = RetellService()
+    try:
+        selection = AgentFlowSelection.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.errors(include_url=False, include_context=False))
+    params = selection.flow_params.model_dump(exclude_none=True) if selection.flow_params else None
+    try:
+        flow_payload = templates.get(
+            selection.flow_template or DEFAULT_TEMPLATE, selection.flow_template_version
+        ).render(params)
+    except FlowTemplateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         # 1) Create conversation flow
-        flow = service.create_conversation_flow()
+        flow = await service.create_conversation_flow(flow_payload)
         conversation_flow_id = flow.get("conversation_flow_id")
         if not conversation_flow_id:
             raise RuntimeError("Failed to obtain conversation_flow_id")
         # 2) Create agent with response_engine.type=conversation-flow
-        created = service.create_agent(
+        created = await service.create_agent(
             agent_name=agent_name,
             voice_id=voice_id,
             conversation_flow_id=conversation_flow_id,
@@ -56,32 +98,27 @@ def create_agent(payload: Dict[str, Any]):
         raise HTTPException(status_code=400, detail=str(e))
 
     # Register in Supabase table 'agent_configs' with minimal columns: id, agent_id
-    sb = get_supabase()
     config_id = str(uuid.uuid4())
     row = {
         "id": config_id,
         "agent_id": created.get("agent_id"),
         "agent_name": agent_name
     }
-    sb.table("agent_configs").insert(row).execute()
+    await sb.table("agent_configs").insert(row).execute()
     return created
 
 
 @router.get("/{agent_id}", response_model=Dict[str, Any])
-def get_agent(agent_id: str):
-    service = RetellService()
+async def get_agent(agent_id: str, service: RetellService = Depends(get_retell_service)):
     try:
-        return service.get_agent(agent_id)
+        return await service.get_agent(agent_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Agent not found")
 
 
 @router.put("/{agent_id}", response_model=Dict[str, Any])
-def update_agent(agent_id: str, payload: Dict[str, Any]):
-    service = RetellService()
+async def update_agent(agent_id: str, payload: Dict[str, Any], service: RetellService = Depends(get_retell_service)):
     try:
-        return service.update_agent(agent_id, payload)
+        return await service.update_agent(agent_id, payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-
-
@@ -0,0 +1,49 @@
+import json
+import logging
+import time
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from services.custom_llm import RESPONSE_EVENTS, CustomLLMConnection, TurnLatency, dialog_config, get_turn_latency
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.websocket("/ws/{call_id}")
+async def llm_websocket(websocket: WebSocket, call_id: str, latency: TurnLatency = Depends(get_turn_latency)):
+    """Retell custom-LLM endpoint: set the agent's LLM WebSocket URL to ``wss://<host>/api/llm/ws/{call_id}``."""
+    conn = CustomLLMConnection(call_id, dialog_config(), latency)
+    await websocket.accept()
+    latency.connections_open += 1
+    latency.connections_total += 1
+    try:
+        for frame in conn.opening():
+            await websocket.send_json(frame)
+        while True:
+            raw = await websocket.receive_text()
+            started = time.perf_counter()
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            try:
+                frames = conn.handle(msg)
+            except Exception:
+                # One bad frame must not drop a live call
+                logger.exception("llm frame failed", extra={"call_id": call_id, "interaction_type": msg.get("interaction_type")})
+                continue
+            for frame in frames:
+                await websocket.send_json(frame)
+            # Non-object frames produce no frames, so msg is a dict past this check
+            if frames and msg.get("interaction_type") in RESPONSE_EVENTS:
+                latency.observe(time.perf_counter() - started)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        latency.connections_open -= 1
+
+
+@router.get("/stats")
+async def llm_stats(latency: TurnLatency = Depends(get_turn_latency)):
+    return latency.stats()
@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from supabase import AsyncClient
+from db.supabase_client import get_db
+from models.schemas import ScheduleCreate, ScheduleUpdate
+from services.scheduler import SCHEDULES_TABLE, CallScheduler, Schedule, get_scheduler, new_schedule_row
+
+
+router = APIRouter()
+
+
+def _epoch(value: datetime) -> float:
+    # Naive datetimes are taken as UTC
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+@router.post("/", response_model=Dict[str, Any])
+async def create_schedule(
+    req: ScheduleCreate,
+    sb: AsyncClient = Depends(get_db),
+    scheduler: CallScheduler = Depends(get_scheduler),
+):
+    """Call ``driver_name`` about ``load_number`` every ``interval_minutes`` until a stop condition holds."""
+    cfg = await sb.table("agent_configs").select("id").eq("id", req.agent_config_id).limit(1).execute()
+    if not cfg.data:
+        raise HTTPException(status_code=404, detail="Agent config not found")
+    row = new_schedule_row(
+        req.agent_config_id,
+        req.driver_name,
+        req.load_number,
+        req.interval_minutes * 60,
+        _epoch(req.first_call_at) if req.first_call_at else scheduler.clock(),
+        list(req.stop_on_driver_status),
+        req.max_calls,
+    )
+    resp = await sb.table(SCHEDULES_TABLE).insert(row).execute()
+    stored = resp.data[0] if resp.data else row
+    scheduler.track(Schedule.from_row(stored))
+    return stored
+
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def list_schedules(
+    status: Optional[Literal["active", "paused", "stopped"]] = None,
+    load_number: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    sb: AsyncClient = Depends(get_db),
+):
+    query = sb.table(SCHEDULES_TABLE).select("*")
+    if status:
+        query = query.eq("status", status)
+    if load_number:
+        query = query.eq("load_number", load_number)
+    resp = await query.order("created_at", desc=True).limit(limit).execute()
+    return resp.data or []
+
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def scheduler_stats(scheduler: CallScheduler = Depends(get_scheduler)):
+    return scheduler.stats()
+
+
+@router.get("/{schedule_id}", response_model=Dict[str, Any])
+async def get_schedule(schedule_id: str, sb: AsyncClient = Depends(get_db)):
+    resp = await sb.table(SCHEDULES_TABLE).select("*").eq("id", schedule_id).limit(1).execute()
+    if not resp.data:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return resp.data[0]
+
+
+@router.patch("/{schedule_id}", response_model=Dict[str, Any])
+async def update_schedule(
+    schedule_id: str,
+    req: ScheduleUpdate,
+    sb: AsyncClient = Depends(get_db),
+    scheduler: CallScheduler = Depends(get_scheduler),
+):
+    """Pause, resume, stop or re-time a schedule."""
+    patch: Dict[str, Any] = {}
+    if req.status:
+        patch["status"] = req.status
+        patch["stop_reason"] = "stopped via API" if req.status == "stopped" else None
+    if req.interval_minutes:
+        patch["interval_seconds"] = req.interval_minutes * 60
+    if req.next_call_at:
+        patch["next_run_at"] = datetime.fromtimestamp(_epoch(req.next_call_at), tz=timezone.utc).isoformat()
+    if not patch:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    resp = await sb.table(SCHEDULES_TABLE).update(patch).eq("id", schedule_id).execute()
+    if not resp.data:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    scheduler.track(Schedule.from_row(resp.data[0]))
+    return resp.data[0]
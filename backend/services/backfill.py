@@ -0,0 +1,190 @@
+"""Regenerate structured summaries for historical calls.
+
+Pages through ``calls`` with keyset pagination on ``(started_at, id)``, runs
+``generate_structured_summary`` in a process pool and writes each page back
+with one ``bulk_set_structured_summaries`` RPC. Progress can be checkpointed
+to a JSON file so an interrupted run resumes where it stopped.
+
+CLI (from ``backend/``)::
+
+    python -m services.backfill --batch-size 500 --checkpoint backfill.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from supabase import AsyncClient
+from db.pagination import keyset_filter, parse_started_at
+from services.postprocess import generate_structured_summary
+from services.transcripts import load_transcripts
+
+
+logger = logging.getLogger(__name__)
+
+CALLS_TABLE = "calls"
+
+
+def _summarize_chunk(transcripts: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # Runs in a worker process
+    return [generate_structured_summary(t or []) for t in transcripts]
+
+
+def load_checkpoint(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: Optional[str], cursor: Dict[str, Any]) -> None:
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cursor, f)
+    os.replace(tmp, path)
+
+
+class BackfillJob:
+    def __init__(
+        self,
+        batch_size: int = 500,
+        workers: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = True,
+    ) -> None:
+        self.id = str(uuid.uuid4())
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = checkpoint_path
+        self.resume = resume
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.cursor: Optional[Dict[str, Any]] = None
+        self.processed = 0
+        self.resumed_from = 0
+        self.batches = 0
+        self.started = 0.0
+        self.finished = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> Dict[str, Any]:
+        end = self.finished or time.monotonic()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "processed": self.processed,
+            "batches": self.batches,
+            "cursor": self.cursor,
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_s": round((self.processed - self.resumed_from) / elapsed, 1) if elapsed else 0.0,
+        }
+
+    async def _fetch_page(self, sb: AsyncClient) -> List[Dict[str, Any]]:
+        query = sb.table(CALLS_TABLE).select("id, started_at")
+        if self.cursor:
+            # The cursor may come from a checkpoint file; validate it like a client cursor
+            ts, last_id = parse_started_at(self.cursor["started_at"]), str(uuid.UUID(self.cursor["id"]))
+            query = query.or_(keyset_filter(ts, last_id, desc=False))
+        resp = await query.order("started_at").order("id").limit(self.batch_size).execute()
+        rows = resp.data or []
+        transcripts = await load_transcripts(sb, [r["id"] for r in rows])
+        for r in rows:
+            r["transcript"] = transcripts.get(r["id"], [])
+        return rows
+
+    async def _summarize(self, pool: ProcessPoolExecutor, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        transcripts = [r.get("transcript") or [] for r in rows]
+        size = max(1, -(-len(transcripts) // self.workers))
+        chunks = [transcripts[i:i + size] for i in range(0, len(transcripts), size)]
+        results = await asyncio.gather(*(loop.run_in_executor(pool, _summarize_chunk, c) for c in chunks))
+        return [s for chunk in results for s in chunk]
+
+    async def run(self, sb: AsyncClient, progress: Optional[Callable[["BackfillJob"], None]] = None) -> Dict[str, Any]:
+        self.status = "running"
+        self.started = time.monotonic()
+        try:
+            checkpoint = load_checkpoint(self.checkpoint_path) if self.resume else None
+            if checkpoint:
+                self.cursor = checkpoint.get("cursor")
+                self.processed = self.resumed_from = checkpoint.get("processed", 0)
+            # Spawned, not forked: the server process runs the event loop and the
+            # log listener thread, whose locks a forked child would inherit
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                rows = await self._fetch_page(sb)
+                while rows:
+                    # Summarise this page while the next one is fetched
+                    self.cursor = {"started_at": rows[-1]["started_at"], "id": rows[-1]["id"]}
+                    summaries, next_rows = await asyncio.gather(
+                        self._summarize(pool, rows), self._fetch_page(sb)
+                    )
+                    payload = [{"id": r["id"], "structured": s} for r, s in zip(rows, summaries)]
+                    await sb.rpc("bulk_set_structured_summaries", {"p_rows": payload}).execute()
+                    self.processed += len(rows)
+                    self.batches += 1
+                    save_checkpoint(self.checkpoint_path, {"cursor": self.cursor, "processed": self.processed})
+                    if progress:
+                        progress(self)
+                    rows = next_rows
+            self.status = "completed"
+        except BaseException as exc:
+            # Includes cancellation at shutdown, so a job never stays "running"
+            self.status = "failed"
+            self.error = str(exc) or type(exc).__name__
+            raise
+        finally:
+            self.finished = time.monotonic()
+        return self.stats()
+
+    def start(self, sb: AsyncClient) -> None:
+        """Run in the background; failures are reported through ``stats()``."""
+        self._task = asyncio.create_task(self._run_quietly(sb))
+
+    async def _run_quietly(self, sb: AsyncClient) -> None:
+        try:
+            await self.run(sb)
+        except Exception:
+            logger.exception("backfill job failed", extra={"job_id": self.id, "cursor": self.cursor})
+
+
+def _print_progress(job: BackfillJob) -> None:
+    s = job.stats()
+    print(f"batch {s['batches']}: {s['processed']} rows, {s['rows_per_s']} rows/s, cursor={s['cursor']}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from db.supabase_client import close_async_supabase, create_async_supabase
+
+    sb = await create_async_supabase()
+    try:
+        job = BackfillJob(
+            batch_size=args.batch_size,
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            resume=not args.restart,
+        )
+        stats = await job.run(sb, progress=_print_progress)
+        print(json.dumps(stats, indent=2))
+    finally:
+        await close_async_supabase(sb)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate structured summaries for historical calls")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None, help="JSON file used to resume an interrupted run")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    asyncio.run(_main(parser.parse_args()))
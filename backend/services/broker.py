@@ -0,0 +1,98 @@
+"""In-process pub/sub for live call updates (served as SSE by ``GET /api/calls/events``).
+
+Webhook processing publishes one small event per calls-row change; each
+subscriber gets its own bounded queue. A subscriber that falls behind loses
+its oldest events rather than slowing publishers, and the drop is counted.
+Recent events are kept so a reconnecting client can resume from
+``Last-Event-ID``.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import Request
+
+
+# Columns pushed to subscribers; full rows (transcripts) stay behind GET /api/calls/{id}
+EVENT_FIELDS = ("id", "status", "driver_status", "retell_call_id", "started_at", "completed_at")
+
+
+def call_event(row: Dict[str, Any], kind: str = "call_updated") -> Dict[str, Any]:
+    event = {k: row.get(k) for k in EVENT_FIELDS}
+    # Full rows carry it in summary; apply_call_analyzed returns it as a column
+    structured = row["structured"] if "structured" in row else (row.get("summary") or {}).get("structured")
+    if structured is not None:
+        event["structured"] = structured
+    event["type"] = kind
+    return event
+
+
+class Subscription:
+    def __init__(self, broker: "CallEventBroker", call_id: Optional[str], maxsize: int) -> None:
+        self.broker = broker
+        self.call_id = call_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if self.call_id is not None and event.get("id") != self.call_id:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.broker.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None after ``timeout`` seconds (lets callers send keep-alives)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker._subscribers.discard(self)
+
+
+class CallEventBroker:
+    def __init__(self, subscriber_queue_size: int, history: int) -> None:
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._history: deque = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Stamp ``event`` with a sequence id and fan it out without awaiting."""
+        event = {**event, "seq": next(self._ids)}
+        self._history.append(event)
+        self.published += 1
+        for sub in list(self._subscribers):
+            sub.offer(event)
+        return event
+
+    def subscribe(self, call_id: Optional[str] = None, last_event_id: Optional[int] = None) -> Subscription:
+        sub = Subscription(self, call_id, self.subscriber_queue_size)
+        if last_event_id is not None:
+            for event in self._history:
+                if event["seq"] > last_event_id:
+                    sub.offer(event)
+        self._subscribers.add(sub)
+        return sub
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "history": len(self._history),
+        }
+
+
+def get_broker(request: Request) -> CallEventBroker:
+    """FastAPI dependency returning the process-wide call event broker."""
+    return request.app.state.call_events
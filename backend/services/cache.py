@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float) -> None:
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class AsyncTTLCache:
+    """LRU cache with a freshness TTL and a stale-while-revalidate window.
+
+    - fresh entries are returned as is;
+    - stale entries (past ``ttl`` but within ``ttl + stale_ttl``) are returned
+      immediately while one background task reloads them;
+    - misses await the loader, and concurrent misses for a key share one load.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        now = self._clock()
+        self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        # The load runs in its own task and every caller awaits it shielded, so
+        # a cancelled caller (client disconnect, deadline) only stops waiting;
+        # the others still get the value or the loader's own exception.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_load(key, loader))
+            # Mark retrieved so a failure nobody waits for isn't logged as unhandled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run_load(self, key: Hashable, loader: Loader) -> Any:
+        generation = self._generation
+        try:
+            value = await loader()
+        finally:
+            self._inflight.pop(key, None)
+        # Skip the write if the key was invalidated while loading
+        if generation == self._generation:
+            self._store(key, value)
+        return value
+
+    async def _refresh(self, key: Hashable, loader: Loader) -> None:
+        try:
+            await self._load(key, loader)
+        except Exception:
+            self.refresh_errors += 1
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, loader: Loader) -> Any:
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, loader))
+                return entry.value
+            del self._entries[key]
+        self.misses += 1
+        return await self._load(key, loader)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``; returns the count."""
+        self._generation += 1
+        keys = [k for k in self._entries if predicate(k)]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+from supabase import AsyncClient
+from services.broker import CallEventBroker, call_event
+from services.idempotency import WebhookDeduplicator
+from services.logs import log_context, log_payload
+from services.postprocess import generate_structured_summary
+from services.transcripts import utterances_from_retell
+
+
+logger = logging.getLogger(__name__)
+
+CALLS_TABLE = "calls"
+
+STATUS_MAP = {
+    "registered": "in_progress",
+    "ongoing": "in_progress",
+    "ended": "completed",
+    "failed": "failed",
+}
+
+# Retell webhook events we persist. Lifecycle events happen once per call and
+# are deduplicated; transcript_updated fires many times and is idempotent
+# through the transcript offset instead.
+LIFECYCLE_EVENTS = ("call_started", "call_ended", "call_analyzed")
+TRANSCRIPT_EVENT = "transcript_updated"
+HANDLED_EVENTS = LIFECYCLE_EVENTS + (TRANSCRIPT_EVENT,)
+
+
+def retell_call_id_of(body: Dict[str, Any]) -> str | None:
+    return (body.get("call") or {}).get("call_id") or body.get("call_id")
+
+
+def _iso(ms: Any) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+class TranscriptCursor:
+    """Number of utterances already stored per Retell call (LRU bounded).
+
+    Lets each webhook send only the latest stored turn and the ones after it;
+    a miss just means the first append sends the whole transcript.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._stored: "OrderedDict[str, int]" = OrderedDict()
+        self.turns_sent = 0
+        self.turns_skipped = 0
+
+    def get(self, retell_call_id: str) -> int:
+        return self._stored.get(retell_call_id, 0)
+
+    def set(self, retell_call_id: str, length: int) -> None:
+        self._stored[retell_call_id] = max(length, self._stored.get(retell_call_id, 0))
+        self._stored.move_to_end(retell_call_id)
+        while len(self._stored) > self.max_entries:
+            self._stored.popitem(last=False)
+
+    def forget(self, retell_call_id: str) -> None:
+        self._stored.pop(retell_call_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "transcripts_tracked": len(self._stored),
+            "transcript_turns_sent": self.turns_sent,
+            "transcript_turns_skipped": self.turns_skipped,
+        }
+
+
+async def append_transcript(
+    sb: AsyncClient,
+    our_call_id: Optional[str],
+    retell_call_id: Optional[str],
+    turns: List[Dict[str, Any]],
+    cursor: Optional[TranscriptCursor] = None,
+    final: bool = False,
+    event: Optional[str] = None,
+) -> Optional[int]:
+    """Upsert utterances with the ``append_call_utterances`` RPC.
+
+    Only ``turns[offset:]`` goes over the wire, where ``offset`` is one before
+    the stored count as far as ``cursor`` knows: the latest stored utterance
+    may have been caught mid-sentence and is corrected by the next webhook.
+    ``final`` marks the call_ended / call_analyzed transcript, which overwrites
+    stored utterances unconditionally. If the call has fewer utterances than
+    ``offset`` (e.g. rows were deleted since), the RPC reports the real count
+    and the missing part is resent once. With ``event`` the RPC first checks
+    the ``webhook_events`` ledger and returns None, writing nothing, when that
+    lifecycle event was already applied.
+    """
+    offset = max(min(cursor.get(retell_call_id), len(turns)) - 1, 0) if cursor and retell_call_id else 0
+    for _ in range(2):
+        tail = turns[offset:]
+        if not tail:
+            return offset
+        resp = await sb.rpc(
+            "append_call_utterances",
+            {
+                "p_call_id": our_call_id,
+                "p_retell_call_id": retell_call_id,
+                "p_offset": offset,
+                "p_turns": tail,
+                "p_final": final,
+                "p_event": event,
+            },
+        ).execute()
+        if resp.data is None:
+            raise RuntimeError("Local call not found for webhook")
+        stored = int(resp.data)
+        if stored < 0:
+            return None
+        if cursor:
+            cursor.turns_sent += len(tail)
+            cursor.turns_skipped += offset
+        if stored >= offset:
+            if cursor and retell_call_id:
+                cursor.set(retell_call_id, stored)
+            return stored
+        # Gap between the stored utterances and our offset: resend from their end
+        offset = stored
+    raise RuntimeError("Transcript append did not converge")
+
+
+def _summary_patch(call_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Build summary augmentation with relevant fields
+    extra = {
+        "agent_id": call_data.get("agent_id"),
+        "agent_version": call_data.get("agent_version"),
+        "agent_name": call_data.get("agent_name"),
+        "retell_llm_dynamic_variables": call_data.get("retell_llm_dynamic_variables"),
+        "collected_dynamic_variables": call_data.get("collected_dynamic_variables"),
+        "recording_url": call_data.get("recording_url"),
+        "public_log_url": call_data.get("public_log_url"),
+        "disconnection_reason": call_data.get("disconnection_reason"),
+        "latency": call_data.get("latency"),
+        "call_analysis": call_data.get("call_analysis"),
+        "call_cost": call_data.get("call_cost"),
+        "transcript_text": call_data.get("transcript"),
+    }
+    return {k: v for k, v in extra.items() if v is not None}
+
+
+async def apply_call_event(
+    sb: AsyncClient,
+    body: Dict[str, Any],
+    cursor: Optional[TranscriptCursor] = None,
+    dedup: Optional[WebhookDeduplicator] = None,
+) -> Optional[Dict[str, Any]]:
+    """Persist a Retell webhook payload onto our calls row.
+
+    Runs in the ingestion workers, off the webhook request path. New utterances
+    are upserted (``append_call_utterances``, idempotent); lifecycle events then
+    set status, timestamps and summary with a single ``apply_call_analyzed`` RPC
+    (see ``db/schema.sql``), which returns the columns published to live
+    subscribers (``broker.call_event``), not the whole row. With ``dedup`` the
+    same RPC records the event in ``webhook_events``, and a lifecycle event
+    already applied returns None: the append checks the ledger first, so a
+    redelivery writes nothing. ``transcript_updated`` only appends and
+    returns None.
+    """
+    event = body.get("event")
+    retell_call_id = retell_call_id_of(body)
+    call_data = body.get("call") or {}
+    # transcript_updated fires on every turn; keep it out of INFO
+    logger.log(logging.DEBUG if event == TRANSCRIPT_EVENT else logging.INFO, "retell webhook", extra={"event": event})
+    log_payload(logger, "retell webhook payload", body, event=event)
+
+    # Prefer our internal id via Retell metadata if present
+    our_call_id = (call_data.get("metadata") or {}).get("call_id")
+
+    # Lifecycle events are checked against (and recorded in) the persistent ledger
+    ledger_event = event if dedup is not None and event in LIFECYCLE_EVENTS else None
+    turns = utterances_from_retell(call_data.get("transcript_object") or [])
+    if turns:
+        final = event in ("call_ended", "call_analyzed")
+        stored = await append_transcript(sb, our_call_id, retell_call_id, turns, cursor, final=final, event=ledger_event)
+        if stored is None:
+            return _skip_duplicate(dedup, event)
+    if event == TRANSCRIPT_EVENT:
+        return None
+
+    updates: Dict[str, Any] = {"retell_call_id": retell_call_id}
+
+    # Map status
+    status = call_data.get("call_status")
+    if status:
+        updates["status"] = STATUS_MAP.get(status, status)
+    elif event == "call_started":
+        updates["status"] = "in_progress"
+
+    # Timestamps
+    start_ts = call_data.get("start_timestamp")
+    if start_ts:
+        updates["started_at"] = _iso(start_ts)
+    end_ts = call_data.get("end_timestamp")
+    if end_ts:
+        updates["completed_at"] = _iso(end_ts)
+
+    # Access token if provided (useful for web call)
+    if call_data.get("access_token"):
+        updates["retell_call_access_token"] = call_data.get("access_token")
+
+    summary_patch = _summary_patch(call_data)
+
+    # Regenerate our structured summary from the final transcript
+    if turns and event != "call_started":
+        try:
+            summary_patch["structured"] = generate_structured_summary(turns)  # type: ignore[arg-type]
+        except Exception:
+            logger.warning("structured summary failed", exc_info=True)
+
+    driver_status = (call_data.get("collected_dynamic_variables") or {}).get("driver_status")
+    emergency_type = (call_data.get("collected_dynamic_variables") or {}).get("emergency_type")
+    if driver_status:
+        updates["driver_status"] = driver_status
+    if emergency_type:
+        updates["driver_status"] = "Emergency"
+
+    # Single round trip: the existing summary is merged server-side (jsonb ||)
+    # and the event is recorded as processed in the same transaction
+    try:
+        resp = await sb.rpc(
+            "apply_call_analyzed",
+            {
+                "p_call_id": our_call_id,
+                "p_retell_call_id": retell_call_id,
+                "p_updates": updates,
+                "p_summary": summary_patch,
+                "p_event": ledger_event,
+            },
+        ).execute()
+    except APIError as e:
+        if e.code == "P0002":
+            raise RuntimeError("Local call not found for webhook")
+        raise
+    if not resp.data:
+        return _skip_duplicate(dedup, event)
+    if event == "call_analyzed" and cursor and retell_call_id:
+        # Nothing is appended after analysis
+        cursor.forget(retell_call_id)
+    return resp.data[0]
+
+
+def _skip_duplicate(dedup: Optional[WebhookDeduplicator], event: Optional[str]) -> None:
+    # Already applied by an earlier delivery (or another replica)
+    if dedup is not None:
+        dedup.skipped_persistent += 1
+    logger.debug("duplicate webhook skipped", extra={"event": event})
+    return None
+
+
+async def handle_webhook_event(
+    sb: AsyncClient,
+    dedup: WebhookDeduplicator,
+    body: Dict[str, Any],
+    broker: Optional[CallEventBroker] = None,
+    cursor: Optional[TranscriptCursor] = None,
+) -> None:
+    """Ingestion worker entry point: apply the event once, then notify live subscribers.
+
+    Lifecycle events are recorded in ``webhook_events`` by the same RPC that
+    applies them, so a crash before that commit leaves the event unrecorded
+    and a replay from the durable queue applies it.
+    """
+    retell_call_id = retell_call_id_of(body)
+    event = body.get("event")
+    our_call_id = ((body.get("call") or {}).get("metadata") or {}).get("call_id")
+    with log_context(call_id=our_call_id, retell_call_id=retell_call_id):
+        try:
+            row = await apply_call_event(sb, body, cursor, dedup)
+        except Exception:
+            logger.warning("webhook event failed", extra={"event": event}, exc_info=True)
+            # Let a redelivery or replay try again
+            if event in LIFECYCLE_EVENTS:
+                dedup.forget(retell_call_id, event)
+            raise
+    if broker is not None and row is not None:
+        broker.publish(call_event(row))
@@ -0,0 +1,252 @@
+"""Starting single outbound calls (``POST /api/calls/start``).
+
+The agent config lookup plus Retell agent check and the INSERT of the
+``calls`` row run concurrently; the Retell web call is created once both
+succeed. ``start_call`` runs the whole pipeline under one deadline. In
+background mode the route returns as soon as the row exists and
+``CallDispatcher`` creates the Retell call from a small worker pool sharing
+the process-wide Retell call limiter.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from supabase import AsyncClient
+from services.broker import CallEventBroker, call_event
+from services.logs import log_context
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+
+
+logger = logging.getLogger(__name__)
+
+CALLS_TABLE = "calls"
+
+
+class CallStartRejected(RuntimeError):
+    """The agent config or its Retell agent does not exist."""
+
+
+class DispatchFull(RuntimeError):
+    """Raised when the background dispatch queue is at capacity."""
+
+
+def new_call_row(driver_name: str, load_number: str, agent_config_id: str) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "driver_name": driver_name,
+        "load_number": load_number,
+        "agent_config_id": agent_config_id,
+        "driver_status": "Not Joined",
+        "status": "queued",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def resolve_agent(sb: AsyncClient, service: RetellService, agent_config_id: str) -> str:
+    """Retell agent id of a config, checked against Retell (cached)."""
+    cfg = await sb.table("agent_configs").select("agent_id").eq("id", agent_config_id).limit(1).execute()
+    if not cfg.data:
+        raise CallStartRejected("Agent config not found")
+    agent_id = cfg.data[0].get("agent_id")
+    try:
+        await service.get_agent(agent_id)
+    except Exception:
+        raise CallStartRejected("Agent not found")
+    logger.debug("agent resolved", extra={"agent_config_id": agent_config_id, "agent_id": agent_id})
+    return agent_id
+
+
+async def prepare_call(sb: AsyncClient, service: RetellService, row: Dict[str, Any]) -> str:
+    """Validate the agent and insert ``row`` concurrently; returns the Retell agent id.
+
+    If validation fails after the INSERT went through, the row is deleted again.
+    """
+    agent_id, inserted = await asyncio.gather(
+        resolve_agent(sb, service, row["agent_config_id"]),
+        sb.table(CALLS_TABLE).insert(row).execute(),
+        return_exceptions=True,
+    )
+    if isinstance(agent_id, BaseException):
+        if not isinstance(inserted, BaseException):
+            await sb.table(CALLS_TABLE).delete().eq("id", row["id"]).execute()
+        raise agent_id
+    if isinstance(inserted, BaseException):
+        raise inserted
+    return agent_id
+
+
+async def mark_failed(sb: AsyncClient, call_id: str) -> None:
+    try:
+        await sb.table(CALLS_TABLE).update({"status": "failed"}).eq("id", call_id).execute()
+    except Exception:
+        logger.warning("could not mark call failed", exc_info=True)
+
+
+async def dispatch_call(sb: AsyncClient, service: RetellService, row: Dict[str, Any], agent_id: str) -> Dict[str, Any]:
+    """Create the Retell web call for an inserted row and record the outcome on it."""
+    metadata = {"call_id": row["id"]}
+    if row.get("campaign_id"):
+        metadata["campaign_id"] = row["campaign_id"]
+    try:
+        try:
+            outbound_call = await service.start_outbound_call(
+                agent_id=agent_id,
+                driver_name=row["driver_name"],
+                load_number=row["load_number"],
+                metadata=metadata,
+            )
+        except Exception:
+            logger.warning("outbound call failed", exc_info=True)
+            row["status"] = "failed"
+            await mark_failed(sb, row["id"])
+            raise
+        patch = {
+            "status": "not_joined",
+            "retell_call_id": outbound_call.get("call_id"),
+            "retell_call_access_token": outbound_call.get("access_token"),
+        }
+        await sb.table(CALLS_TABLE).update(patch).eq("id", row["id"]).execute()
+    except asyncio.CancelledError:
+        # Deadline or shutdown mid-flight: the row must not stay queued. Shielded
+        # so a second cancellation cannot interrupt the update.
+        logger.warning("outbound call cancelled")
+        row["status"] = "failed"
+        await asyncio.shield(mark_failed(sb, row["id"]))
+        raise
+    row.update(patch)
+    logger.info("outbound call started", extra={"retell_call_id": row["retell_call_id"]})
+    return row
+
+
+async def start_call(sb: AsyncClient, service: RetellService, row: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+    """The whole start pipeline within ``deadline`` seconds.
+
+    Raises TimeoutError when the budget runs out; the row, if inserted, is
+    marked failed. A Retell call created after that point still reports
+    through the webhook.
+    """
+    try:
+        async with asyncio.timeout(deadline):
+            agent_id = await prepare_call(sb, service, row)
+            return await dispatch_call(sb, service, row, agent_id)
+    except TimeoutError:
+        logger.warning("call start deadline exceeded", extra={"deadline_s": deadline})
+        await mark_failed(sb, row["id"])
+        raise
+
+
+async def queue_call(
+    sb: AsyncClient,
+    service: RetellService,
+    dispatcher: "CallDispatcher",
+    row: Dict[str, Any],
+    deadline: float,
+) -> Dict[str, Any]:
+    """Background mode: validate and insert within ``deadline``, then hand the Retell step to ``dispatcher``."""
+    if dispatcher.full():
+        raise DispatchFull("Call dispatch queue is full")
+    try:
+        async with asyncio.timeout(deadline):
+            agent_id = await prepare_call(sb, service, row)
+        dispatcher.submit(row, agent_id)
+    except (TimeoutError, DispatchFull):
+        await mark_failed(sb, row["id"])
+        raise
+    return row
+
+
+class CallDispatcher:
+    """Worker pool creating Retell calls for rows inserted by background starts.
+
+    Jobs live in memory: rows still queued at shutdown are marked failed.
+    """
+
+    def __init__(
+        self,
+        sb: AsyncClient,
+        service: RetellService,
+        limiter: AsyncRateLimiter,
+        concurrency: int,
+        maxsize: int,
+        broker: Optional[CallEventBroker] = None,
+    ) -> None:
+        self.sb = sb
+        self.service = service
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.broker = broker
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], str, float]]" = asyncio.Queue(maxsize=maxsize)
+        self._tasks: List[asyncio.Task] = []
+        self.queued = 0
+        self.dispatched = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.last_wait_ms = 0.0
+
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def submit(self, row: Dict[str, Any], agent_id: str) -> None:
+        try:
+            self._queue.put_nowait((row, agent_id, time.monotonic()))
+        except asyncio.QueueFull:
+            raise DispatchFull("Call dispatch queue is full")
+        self.queued += 1
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run(), name=f"call-dispatch-{i}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        left = []
+        while not self._queue.empty():
+            left.append(self._queue.get_nowait()[0]["id"])
+        await asyncio.gather(*(mark_failed(self.sb, call_id) for call_id in left))
+
+    async def _run(self) -> None:
+        while True:
+            row, agent_id, enqueued_at = await self._queue.get()
+            self.in_flight += 1
+            self.last_wait_ms = (time.monotonic() - enqueued_at) * 1000
+            try:
+                with log_context(call_id=row["id"]):
+                    await self.limiter.acquire()
+                    await dispatch_call(self.sb, self.service, row, agent_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+            else:
+                self.dispatched += 1
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+            if self.broker is not None:
+                self.broker.publish(call_event(row))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "in_flight": self.in_flight,
+            "workers": self.concurrency,
+            "queued": self.queued,
+            "dispatched": self.dispatched,
+            "failed": self.failures,
+            "last_wait_ms": round(self.last_wait_ms, 2),
+        }
+
+
+def get_call_dispatcher(request: Request) -> CallDispatcher:
+    """FastAPI dependency returning the app's background call dispatcher."""
+    return request.app.state.call_dispatcher
@@ -0,0 +1,125 @@
+"""Outbound check-call campaigns: many (driver, load) calls for one agent.
+
+All call rows are inserted with one bulk INSERT, then Retell calls are fanned
+out under a concurrency cap and a per-second rate limit. Each call goes through
+``services.call_start.dispatch_call``; a failure is recorded against its target
+and does not stop the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from supabase import AsyncClient
+from services.call_start import dispatch_call
+from services.logs import log_context
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+
+
+logger = logging.getLogger(__name__)
+
+CALLS_TABLE = "calls"
+
+
+class Campaign:
+    def __init__(
+        self,
+        agent_config_id: str,
+        agent_id: str,
+        calls: List[Dict[str, str]],
+        concurrency: int,
+        limiter: AsyncRateLimiter,
+    ) -> None:
+        self.id = str(uuid.uuid4())
+        self.agent_config_id = agent_config_id
+        self.agent_id = agent_id
+        self.calls = calls
+        self.concurrency = concurrency
+        self.limiter = limiter
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.started = 0
+        self.failed = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> Dict[str, Any]:
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        done = self.started + self.failed
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "agent_config_id": self.agent_config_id,
+            "total": len(self.calls),
+            "started": self.started,
+            "failed": self.failed,
+            "pending": len(self.calls) - done,
+            "elapsed_s": round(elapsed, 2),
+            "calls_per_s": round(done / elapsed, 2) if elapsed else 0.0,
+            "failures": self.failures,
+        }
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc).isoformat()
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "campaign_id": self.id,
+                "driver_name": c["driver_name"],
+                "load_number": c["load_number"],
+                "agent_config_id": self.agent_config_id,
+                "driver_status": "Not Joined",
+                "status": "queued",
+                "started_at": now,
+            }
+            for c in self.calls
+        ]
+
+    async def _launch(self, sb: AsyncClient, service: RetellService, sem: asyncio.Semaphore, row: Dict[str, Any]) -> None:
+        try:
+            async with sem:
+                await self.limiter.acquire()
+                with log_context(call_id=row["id"]):
+                    await dispatch_call(sb, service, row, self.agent_id)
+        except Exception as exc:
+            # dispatch_call has already marked the row failed where it could
+            self.failed += 1
+            self.failures.append({"call_id": row["id"], "load_number": row["load_number"], "error": str(exc)})
+        else:
+            self.started += 1
+
+    async def run(self, sb: AsyncClient, service: RetellService) -> Dict[str, Any]:
+        self.status = "running"
+        self.started_at = time.monotonic()
+        try:
+            rows = self._rows()
+            await sb.table(CALLS_TABLE).insert(rows).execute()
+            sem = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(self._launch(sb, service, sem, row) for row in rows), return_exceptions=True)
+            self.status = "completed"
+        except Exception as exc:
+            self.status = "failed"
+            self.error = str(exc)
+            raise
+        finally:
+            self.finished_at = time.monotonic()
+        return self.stats()
+
+    def start(self, sb: AsyncClient, service: RetellService) -> None:
+        """Run in the background; failures are reported through ``stats()``."""
+        self._task = asyncio.create_task(self._run_quietly(sb, service))
+
+    async def _run_quietly(self, sb: AsyncClient, service: RetellService) -> None:
+        try:
+            await self.run(sb, service)
+        except Exception:
+            logger.exception("campaign failed", extra={"campaign_id": self.id})
@@ -0,0 +1,163 @@
+"""Retell custom-LLM WebSocket protocol on top of ``services.dialog``.
+
+Retell opens one WebSocket per call and sends ``interaction_type`` events
+(``call_details``, ``update_only``, ``response_required``,
+``reminder_required``, ``ping_pong``) carrying the live transcript; the server
+answers with ``response`` frames for the matching ``response_id``.
+``CustomLLMConnection`` holds one call's protocol and dialog state and maps an
+incoming event to the frames to send, so it can be driven without a socket.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from fastapi.requests import HTTPConnection
+
+from settings import settings
+from services.dialog import CLOSING_REPLY, EMERGENCY_REPLY, PROBE_MARKER, REPEAT_MARKER, DialogSession
+
+
+logger = logging.getLogger(__name__)
+
+
+RESPONSE_EVENTS = ("response_required", "reminder_required")
+SENTENCE_RE = re.compile(r"(?<=[.?!])\s+")
+MARKER_RE = re.compile("(?:" + "|".join(re.escape(m) for m in (REPEAT_MARKER, PROBE_MARKER)) + r")\s*")
+
+
+def dialog_config() -> Dict[str, Any]:
+    return {
+        "prompts": {
+            "greeting_template": settings.dialog_greeting_template,
+            "emergency_trigger_phrases": settings.dialog_emergency_triggers,
+        }
+    }
+
+
+def to_dialog_transcript(
+    transcript: List[Dict[str, Any]],
+    marked: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """Retell utterances (``{"role", "content"}``) as dialog turns.
+
+    ``marked`` maps spoken agent lines back to the dialog reply including its
+    repeat/probe marker, which is never sent to text-to-speech.
+    """
+    marked = marked or {}
+    return [
+        {"role": m.get("role"), "text": marked.get(m.get("content"), m.get("content")) if m.get("role") == "agent" else m.get("content")}
+        for m in transcript
+        if isinstance(m, dict)
+    ]
+
+
+def _obj(value: Any) -> Dict[str, Any]:
+    # Nested fields of a frame, tolerating null or wrongly typed values
+    return value if isinstance(value, dict) else {}
+
+
+class TurnLatency:
+    """Latency of answered turns over the last ``max_samples`` turns, plus connection counts."""
+
+    def __init__(self, max_samples: int) -> None:
+        self._samples: deque = deque(maxlen=max_samples)
+        self.turns = 0
+        self.emergencies = 0
+        self.connections_open = 0
+        self.connections_total = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.turns += 1
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+
+        def pct(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+
+        return {
+            "turns": self.turns,
+            "emergencies": self.emergencies,
+            "connections_open": self.connections_open,
+            "connections_total": self.connections_total,
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+            "max_ms": round(samples[-1] * 1000, 3) if samples else None,
+        }
+
+
+class CustomLLMConnection:
+    def __init__(self, call_id: str, config: Dict[str, Any], latency: TurnLatency) -> None:
+        self.call_id = call_id
+        self.config = config
+        self.latency = latency
+        self.session = DialogSession(config)
+        self._marked: Dict[str, str] = {}
+
+    def opening(self) -> List[Dict[str, Any]]:
+        # Ask Retell for call details so the greeting can use the dynamic variables
+        return [{"response_type": "config", "config": {"auto_reconnect": True, "call_details": True}}]
+
+    def handle(self, msg: Any) -> List[Dict[str, Any]]:
+        """Frames to send for one message from Retell; malformed messages are ignored."""
+        if not isinstance(msg, dict):
+            logger.warning("ignoring non-object llm frame", extra={"call_id": self.call_id, "frame_type": type(msg).__name__})
+            return []
+        kind = msg.get("interaction_type")
+        if kind == "ping_pong":
+            return [{"response_type": "ping_pong", "timestamp": msg.get("timestamp")}]
+        if kind == "call_details":
+            call = _obj(msg.get("call"))
+            variables = _obj(call.get("retell_llm_dynamic_variables"))
+            self.session = DialogSession(self.config, {
+                "driver_name": variables.get("driver_name") or "driver",
+                "load_number": variables.get("load_id") or "",
+                "gps_location": _obj(call.get("metadata")).get("gps_location"),
+            })
+            # response_id 0 is the agent's opening line
+            return [self._frame(0, self.session.greeting, True, False)]
+
+        transcript = msg.get("transcript")
+        if isinstance(transcript, list):
+            self.session.sync(to_dialog_transcript(transcript, self._marked))
+        if kind not in RESPONSE_EVENTS:
+            return []
+
+        response_id = msg.get("response_id")
+        # Emergency short-circuit: answer in one frame, skipping the rest of the dialog rules
+        if self.session.agent_turns and self.session.is_emergency():
+            self.latency.emergencies += 1
+            return [self._frame(response_id, EMERGENCY_REPLY, True, False)]
+        reply = self.session.reply()
+        return self._stream(response_id, reply, end_call=reply == CLOSING_REPLY)
+
+    def _stream(self, response_id: Any, reply: str, end_call: bool) -> List[Dict[str, Any]]:
+        spoken = MARKER_RE.sub("", reply)
+        if spoken != reply:
+            self._marked[spoken] = reply
+        # One frame per sentence so text-to-speech can start on the first
+        parts = SENTENCE_RE.split(spoken)
+        frames = [self._frame(response_id, p + " ", False, False) for p in parts[:-1]]
+        frames.append(self._frame(response_id, parts[-1], True, end_call))
+        return frames
+
+    @staticmethod
+    def _frame(response_id: Any, content: str, complete: bool, end_call: bool) -> Dict[str, Any]:
+        return {
+            "response_type": "response",
+            "response_id": response_id,
+            "content": content,
+            "content_complete": complete,
+            "end_call": end_call,
+        }
+
+
+def get_turn_latency(conn: HTTPConnection) -> TurnLatency:
+    """FastAPI dependency returning the process-wide custom-LLM turn stats (HTTP and WebSocket routes)."""
+    return conn.app.state.llm_latency
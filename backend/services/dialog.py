@@ -1,9 +1,27 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import re
 
 
+REPEAT_MARKER = "[repeat_request]"
+PROBE_MARKER = "[probe_request]"
+DRIVER_ROLES = ("driver", "user")
+
+UNCOOPERATIVE_RE = re.compile(r"(yes|no|ok|okay|fine|good|driving)\.?")
+GARBLED_CHARS_RE = re.compile(r"[^a-zA-Z0-9\s,.?!]")
+ROAD_RE = re.compile(r"I-[0-9]+|\b(hwy|highway|interstate|street|ave|road)\b", re.I)
+WORD_RE = re.compile(r"[A-Za-z]{3,}")
+ARRIVAL_RE = re.compile(r"arriv|dock|unload", re.I)
+DELAY_RE = re.compile(r"delay|late|traffic|weather|breakdown", re.I)
+
+CLOSING_REPLY = "Thanks for the update. We'll follow up later. Drive safe."
+EMERGENCY_REPLY = (
+    "Understood. Are you safe and pulled over? Are there any injuries? "
+    "Where exactly are you located? I'm connecting you to a human dispatcher now."
+)
+
+
 def is_emergency(text: str, triggers: List[str]) -> bool:
     lowered = text.lower()
     return any(t.lower() in lowered for t in triggers)
@@ -15,20 +33,20 @@ def count_prompts_in_transcript(transcript: List[Dict[str, Any]], marker: str) -
 
 def last_driver_message(transcript: List[Dict[str, Any]]) -> str:
     for msg in reversed(transcript):
-        if msg.get("role") in ("driver", "user"):
+        if msg.get("role") in DRIVER_ROLES:
             return msg.get("text", "")
     return ""
 
 
 def looks_uncooperative(text: str) -> bool:
-    return bool(re.fullmatch(r"(yes|no|ok|okay|fine|good|driving)\.?", text.strip().lower()))
+    return bool(UNCOOPERATIVE_RE.fullmatch(text.strip().lower()))
 
 
 def looks_garbled(text: str) -> bool:
     return (
         len(text.strip()) <= 2
         or "[inaudible]" in text.lower()
-        or bool(re.search(r"[^a-zA-Z0-9\s,.?!]", text))
+        or bool(GARBLED_CHARS_RE.search(text))
     )
 
 
@@ -36,83 +54,150 @@ def detect_conflict(text: str, expected_location: str | None) -> bool:
     if not expected_location:
         return False
     # naive: if driver mentions a city/highway that doesn't appear in expected
-    if re.search(r"I-[0-9]+|\b(hwy|highway|interstate|street|ave|road)\b", text, re.I):
+    if ROAD_RE.search(text):
         return expected_location.lower() not in text.lower()
     # if mentions a city/word, but not in expected
-    words = [w for w in re.findall(r"[A-Za-z]{3,}", text) if len(w) > 3]
+    words = [w for w in WORD_RE.findall(text) if len(w) > 3]
     return bool(words) and all(w.lower() not in expected_location.lower() for w in words[:2])
 
 
-def next_agent_message(
-    transcript: List[Dict[str, Any]],
-    config: Dict[str, Any],
-    context: Dict[str, Any] | None = None,
-) -> str:
-    context = context or {}
-    prompts = config.get("prompts", {})
-    voice_settings = config.get("voice_settings", {})  # reserved
-    greeting_template = prompts.get("greeting_template") or "Hi {driver_name}..."
-    emergency_triggers = prompts.get("emergency_trigger_phrases", [])
-
-    # Assemble runtime knowns
-    driver_name = context.get("driver_name", "driver")
-    load_number = context.get("load_number", "")
-    gps_location = context.get("gps_location")  # optional string like "I-10 near Indio, CA"
-
-    # If no prior agent messages, open with greeting
-    if not any(m.get("role") == "agent" for m in transcript):
-        return greeting_template.format(driver_name=driver_name, load_number=load_number)
-
-    driver_text = last_driver_message(transcript)
-
-    # Emergency pivot
-    if is_emergency(driver_text, emergency_triggers):
-        return (
-            "Understood. Are you safe and pulled over? Are there any injuries? "
-            "Where exactly are you located? I'm connecting you to a human dispatcher now."
-        )
-
-    # Handle garbled/noisy input with limited retries
-    repeat_marker = "[repeat_request]"
-    repeat_count = count_prompts_in_transcript(transcript, repeat_marker)
-    if looks_garbled(driver_text) and repeat_count < 2:
-        return (
-            f"{repeat_marker} I had trouble hearing that. Could you please repeat your status and location?"
-        )
-    if looks_garbled(driver_text) and repeat_count >= 2:
-        return (
-            "I'm still having trouble hearing you. I'll connect you to a dispatcher who can assist."
-        )
-
-    # Uncooperative short answers: probe politely then end
-    probe_marker = "[probe_request]"
-    probe_count = count_prompts_in_transcript(transcript, probe_marker)
-    if looks_uncooperative(driver_text) and probe_count < 2:
-        return (
-            f"{probe_marker} Thanks. Could you share your current location, ETA, and any delays?"
-        )
-    if looks_uncooperative(driver_text) and probe_count >= 2:
-        return "Thanks for the update. We'll follow up later. Drive safe."
+class DialogSession:
+    """Per-call dialog state, updated one turn at a time.
 
-    # Conflict handling between stated and GPS data
-    if gps_location and detect_conflict(driver_text, gps_location):
-        return (
-            f"Appreciate the update. Our GPS shows you near {gps_location}. Does that sound right?"
-        )
+    Holds what ``next_agent_message`` used to recompute from the full
+    transcript on every turn (agent-spoke flag, marker counts, last driver
+    text), so a reply costs O(1) in the transcript length. Config and context
+    are resolved once per call.
+    """
 
-    # Otherwise, continue structured information gathering
-    if re.search(r"arriv|dock|unload", driver_text, re.I):
-        return (
-            "Great. Are you in a door yet, and do you expect detention or lumper?"
+    def __init__(self, config: Dict[str, Any], context: Dict[str, Any] | None = None) -> None:
+        context = context or {}
+        prompts = config.get("prompts", {})
+        greeting_template = prompts.get("greeting_template") or "Hi {driver_name}..."
+        self.greeting = greeting_template.format(
+            driver_name=context.get("driver_name", "driver"),
+            load_number=context.get("load_number", ""),
         )
-    if re.search(r"delay|late|traffic|weather|breakdown", driver_text, re.I):
+        self.emergency_triggers = [t.lower() for t in prompts.get("emergency_trigger_phrases", [])]
+        self.gps_location: Optional[str] = context.get("gps_location")  # optional string like "I-10 near Indio, CA"
+
+        self.turns = 0
+        self.agent_turns = 0
+        self.repeat_count = 0
+        self.probe_count = 0
+        self.driver_text = ""
+        # Contribution of the latest turn, so sync() can re-apply it when Retell amends it
+        self._last: Optional[tuple] = None
+
+    def add_turn(self, role: Optional[str], text: Optional[str]) -> None:
+        text = text or ""
+        prev_driver_text = self.driver_text
+        is_agent = role == "agent"
+        repeat = probe = False
+        if is_agent:
+            self.agent_turns += 1
+            repeat = REPEAT_MARKER in text
+            probe = PROBE_MARKER in text
+            self.repeat_count += repeat
+            self.probe_count += probe
+        elif role in DRIVER_ROLES:
+            self.driver_text = text
+        self.turns += 1
+        self._last = (role, text, is_agent, repeat, probe, prev_driver_text)
+
+    def _undo_last(self) -> None:
+        if self._last is None:
+            return
+        _, _, is_agent, repeat, probe, prev_driver_text = self._last
+        self.agent_turns -= is_agent
+        self.repeat_count -= repeat
+        self.probe_count -= probe
+        self.driver_text = prev_driver_text
+        self.turns -= 1
+        self._last = None
+
+    def sync(self, transcript: List[Dict[str, Any]]) -> None:
+        """Ingest the turns of ``transcript`` not seen yet.
+
+        Live transcripts grow at the end and may rewrite the latest utterance
+        as speech recognition settles, so the last ingested turn is re-read.
+        A transcript that shrank is replayed from scratch.
+        """
+        if len(transcript) < self.turns:
+            self.reset()
+        elif self._last is not None:
+            msg = transcript[self.turns - 1]
+            if (msg.get("role"), msg.get("text") or "") != self._last[:2]:
+                self._undo_last()
+        for msg in transcript[self.turns:]:
+            self.add_turn(msg.get("role"), msg.get("text"))
+
+    def reset(self) -> None:
+        self.turns = self.agent_turns = self.repeat_count = self.probe_count = 0
+        self.driver_text = ""
+        self._last = None
+
+    def is_emergency(self, text: Optional[str] = None) -> bool:
+        lowered = (self.driver_text if text is None else text).lower()
+        return any(t in lowered for t in self.emergency_triggers)
+
+    def reply(self) -> str:
+        # If no prior agent messages, open with greeting
+        if not self.agent_turns:
+            return self.greeting
+
+        driver_text = self.driver_text
+
+        # Emergency pivot
+        if self.is_emergency(driver_text):
+            return EMERGENCY_REPLY
+
+        # Handle garbled/noisy input with limited retries
+        if looks_garbled(driver_text):
+            if self.repeat_count < 2:
+                return (
+                    f"{REPEAT_MARKER} I had trouble hearing that. Could you please repeat your status and location?"
+                )
+            return (
+                "I'm still having trouble hearing you. I'll connect you to a dispatcher who can assist."
+            )
+
+        # Uncooperative short answers: probe politely then end
+        if looks_uncooperative(driver_text):
+            if self.probe_count < 2:
+                return (
+                    f"{PROBE_MARKER} Thanks. Could you share your current location, ETA, and any delays?"
+                )
+            return CLOSING_REPLY
+
+        # Conflict handling between stated and GPS data
+        if self.gps_location and detect_conflict(driver_text, self.gps_location):
+            return (
+                f"Appreciate the update. Our GPS shows you near {self.gps_location}. Does that sound right?"
+            )
+
+        # Otherwise, continue structured information gathering
+        if ARRIVAL_RE.search(driver_text):
+            return (
+                "Great. Are you in a door yet, and do you expect detention or lumper?"
+            )
+        if DELAY_RE.search(driver_text):
+            return (
+                "Thanks for letting me know. What's your updated ETA and precise location?"
+            )
+
+        # Default follow-ups
         return (
-            "Thanks for letting me know. What's your updated ETA and precise location?"
+            "Thanks. What's your exact location and ETA to destination? Any delays to report?"
         )
 
-    # Default follow-ups
-    return (
-        "Thanks. What's your exact location and ETA to destination? Any delays to report?"
-    )
-
 
+def next_agent_message(
+    transcript: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    context: Dict[str, Any] | None = None,
+) -> str:
+    """Stateless wrapper: one pass over ``transcript``. Long-lived calls should keep a DialogSession."""
+    session = DialogSession(config, context)
+    session.sync(transcript)
+    return session.reply()
@@ -0,0 +1,148 @@
+"""Streaming export of calls as NDJSON or CSV.
+
+Rows are fetched page by page with keyset pagination and serialised as they
+arrive, so memory use is bounded by one page regardless of table size.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from supabase import AsyncClient
+from db.pagination import keyset_before, next_cursor
+from services.transcripts import load_transcripts
+
+
+CALLS_TABLE = "calls"
+
+BASE_COLUMNS = [
+    "id",
+    "driver_name",
+    "load_number",
+    "agent_config_id",
+    "status",
+    "driver_status",
+    "retell_call_id",
+    "started_at",
+    "completed_at",
+]
+# Union of the keys produced by services.postprocess.generate_structured_summary
+STRUCTURED_KEYS = [
+    "call_outcome",
+    "driver_status",
+    "current_location",
+    "eta",
+    "delay_reason",
+    "unloading_status",
+    "pod_reminder_acknowledged",
+    "emergency_type",
+    "safety_status",
+    "injury_status",
+    "emergency_location",
+    "load_secure",
+    "escalation_status",
+]
+# Variables extracted by the default conversation flow
+COLLECTED_KEYS = [
+    "driver_status",
+    "current_location",
+    "eta",
+    "delay_reason",
+    "unloading_status",
+    "emergency_type",
+    "safety_status",
+    "injury_status",
+    "emergency_location",
+    "load_secure",
+]
+
+
+def csv_columns(include_transcript: bool) -> List[str]:
+    cols = BASE_COLUMNS + [f"structured_{k}" for k in STRUCTURED_KEYS] + [f"collected_{k}" for k in COLLECTED_KEYS]
+    if include_transcript:
+        cols.append("transcript_text")
+    return cols
+
+
+def flatten_call(row: Dict[str, Any], include_transcript: bool) -> Dict[str, Any]:
+    out = {k: row.get(k) for k in BASE_COLUMNS}
+    summary = row.get("summary") or {}
+    for k, v in (summary.get("structured") or {}).items():
+        out[f"structured_{k}"] = v
+    for k, v in (summary.get("collected_dynamic_variables") or {}).items():
+        out[f"collected_{k}"] = v
+    if include_transcript:
+        out["transcript_text"] = "\n".join(
+            f"{m.get('role')}: {m.get('text') or ''}" for m in (row.get("transcript") or [])
+        )
+    return out
+
+
+async def iter_call_pages(
+    sb: AsyncClient,
+    filters: Dict[str, Any],
+    include_transcript: bool,
+    page_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    columns = ", ".join(BASE_COLUMNS + ["summary"])
+    cursor: Optional[str] = None
+    while True:
+        query = sb.table(CALLS_TABLE).select(columns)
+        for column, value in filters.items():
+            if value is not None:
+                query = query.eq(column, value)
+        query = keyset_before(query, cursor)
+        resp = await query.order("started_at", desc=True).order("id", desc=True).limit(page_size).execute()
+        rows = resp.data or []
+        if rows and include_transcript:
+            transcripts = await load_transcripts(sb, [r["id"] for r in rows])
+            for r in rows:
+                r["transcript"] = transcripts.get(r["id"], [])
+        if rows:
+            yield rows
+        cursor = next_cursor(rows, page_size)
+        if not cursor:
+            return
+
+
+def _ndjson_chunk(rows: Iterable[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(r, separators=(",", ":"), default=str) + "\n" for r in rows)
+
+
+async def stream_export(
+    sb: AsyncClient,
+    fmt: str,
+    filters: Dict[str, Any],
+    include_transcript: bool,
+    gzip: bool,
+) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 -> gzip container
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    buf = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buf, fieldnames=csv_columns(include_transcript), extrasaction="ignore")
+        writer.writeheader()
+        yield encode(buf.getvalue())
+
+    async for rows in iter_call_pages(sb, filters, include_transcript):
+        flat = (flatten_call(r, include_transcript) for r in rows)
+        if writer is not None:
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(flat)
+            chunk = encode(buf.getvalue())
+        else:
+            chunk = encode(_ndjson_chunk(flat))
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,320 @@
+"""Offline validator and simulator for Retell conversation flows.
+
+``FlowGraph`` indexes a flow payload (the ``flow`` of a template in
+``backend/flows``) once: nodes by id, outgoing edges with equation conditions
+compiled to predicates, and global nodes. ``validate`` reports structural
+problems; ``simulate`` walks the graph for a scripted call, so flow edits can
+be regression-tested without placing real calls.
+
+CLI (from ``backend/``)::
+
+    python -m services.flow_sim flows/logistics_check_in.v1.json \\
+        --scenarios flows/scenarios/logistics_check_in.v1.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+VAR_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+# Variables Retell fills before the call starts (see RetellService.start_outbound_call)
+DEFAULT_DYNAMIC_VARIABLES = {"driver_name", "load_id"}
+
+MAX_STEPS = 100
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _operand(raw: Any) -> Callable[[Dict[str, Any]], Any]:
+    text = str(raw)
+    m = VAR_RE.fullmatch(text.strip())
+    if m:
+        name = m.group(1)
+        return lambda variables: variables.get(name)
+    return lambda variables: text
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if op == "exists":
+        return left not in (None, "")
+    if op == "not_exist":
+        return left in (None, "")
+    if left is None:
+        return False
+    if op in ("==", "!="):
+        equal = str(left).lower() == str(right).lower()
+        return equal if op == "==" else not equal
+    if op == "contains":
+        return str(right).lower() in str(left).lower()
+    if op == "not_contains":
+        return str(right).lower() not in str(left).lower()
+    lf, rf = _as_float(left), _as_float(right)
+    if lf is None or rf is None:
+        return False
+    return {">": lf > rf, "<": lf < rf, ">=": lf >= rf, "<=": lf <= rf}.get(op, False)
+
+
+def compile_condition(condition: Dict[str, Any]) -> Predicate:
+    """Compile an ``equation`` transition condition into a predicate over variables."""
+    terms = []
+    for eq in condition.get("equations") or []:
+        left, right, op = _operand(eq.get("left")), _operand(eq.get("right")), eq.get("operator", "==")
+        terms.append(lambda v, left=left, right=right, op=op: _compare(op, left(v), right(v)))
+    if condition.get("operator", "&&") == "||":
+        return lambda v: any(t(v) for t in terms)
+    return lambda v: all(t(v) for t in terms)
+
+
+class Edge:
+    __slots__ = ("id", "dest", "kind", "prompt", "equations", "predicate")
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        cond = raw.get("transition_condition") or {}
+        self.id: Optional[str] = raw.get("id")
+        self.dest: Optional[str] = raw.get("destination_node_id")
+        self.kind: str = cond.get("type", "prompt")
+        self.prompt: Optional[str] = cond.get("prompt")
+        self.equations: List[Dict[str, Any]] = cond.get("equations") or []
+        self.predicate: Optional[Predicate] = compile_condition(cond) if self.kind == "equation" else None
+
+
+class Node:
+    __slots__ = ("id", "type", "name", "edges", "skip_edge", "variables", "is_global", "raw")
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self.id: str = raw.get("id")
+        self.type: str = raw.get("type", "conversation")
+        self.name: str = raw.get("name", "")
+        self.edges = [Edge(e) for e in raw.get("edges") or []]
+        self.skip_edge = Edge(raw["skip_response_edge"]) if raw.get("skip_response_edge") else None
+        self.variables = [v.get("name") for v in raw.get("variables") or [] if v.get("name")]
+        self.is_global = bool(raw.get("global_node_setting"))
+        self.raw = raw
+
+    def all_edges(self) -> List[Edge]:
+        return self.edges + ([self.skip_edge] if self.skip_edge else [])
+
+
+class SimResult:
+    __slots__ = ("path", "outcome", "variables")
+
+    def __init__(self, path: List[str], outcome: str, variables: Dict[str, Any]) -> None:
+        self.path = path
+        self.outcome = outcome
+        self.variables = variables
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "outcome": self.outcome, "variables": self.variables}
+
+
+class FlowGraph:
+    def __init__(self, flow: Dict[str, Any]) -> None:
+        self.flow = flow
+        self.start = flow.get("start_node_id")
+        self.nodes: Dict[str, Node] = {}
+        for raw in flow.get("nodes") or []:
+            node = Node(raw)
+            self.nodes[node.id] = node
+        self.global_nodes = [n.id for n in self.nodes.values() if n.is_global]
+
+    # -----------------------
+    # Validation
+    # -----------------------
+    def reachable(self) -> Set[str]:
+        seen: Set[str] = set()
+        stack = [self.start] if self.start in self.nodes else []
+        # Global nodes can be entered from any node once the call is running
+        stack += self.global_nodes
+        while stack:
+            node_id = stack.pop()
+            if node_id in seen or node_id not in self.nodes:
+                continue
+            seen.add(node_id)
+            stack.extend(e.dest for e in self.nodes[node_id].all_edges() if e.dest)
+        return seen
+
+    def validate(self, known_variables: Set[str] = DEFAULT_DYNAMIC_VARIABLES) -> List[Dict[str, str]]:
+        issues: List[Dict[str, str]] = []
+
+        def issue(severity: str, code: str, message: str) -> None:
+            issues.append({"severity": severity, "code": code, "message": message})
+
+        if self.start not in self.nodes:
+            issue("error", "missing_start", f"start_node_id {self.start!r} is not a node")
+        ids = [raw.get("id") for raw in self.flow.get("nodes") or []]
+        for dup in sorted({i for i in ids if ids.count(i) > 1}):
+            issue("error", "duplicate_node", f"node id {dup!r} is used more than once")
+
+        defined: Dict[str, Dict[str, Any]] = {}
+        for node in self.nodes.values():
+            for var in node.raw.get("variables") or []:
+                defined[var.get("name")] = var
+        available = set(defined) | set(known_variables)
+
+        for node in self.nodes.values():
+            for edge in node.all_edges():
+                if edge.dest is None:
+                    if node.type != "end":
+                        issue("warning", "edge_without_destination", f"{node.id}: edge {edge.id!r} has no destination_node_id")
+                elif edge.dest not in self.nodes:
+                    issue("error", "dangling_edge", f"{node.id}: edge {edge.id!r} points to unknown node {edge.dest!r}")
+                for term in edge.equations:
+                    for side in ("left", "right"):
+                        for name in VAR_RE.findall(str(term.get(side, ""))):
+                            if name not in available:
+                                issue("error", "undefined_variable", f"{node.id}: edge {edge.id!r} uses undefined variable {name!r}")
+                    m = VAR_RE.fullmatch(str(term.get("left", "")).strip())
+                    var = defined.get(m.group(1)) if m else None
+                    if var and var.get("type") == "enum" and term.get("operator", "==") in ("==", "!="):
+                        if str(term.get("right")) not in (var.get("choices") or []):
+                            issue("warning", "unknown_enum_value", f"{node.id}: edge {edge.id!r} compares {var['name']!r} to {term.get('right')!r}, not one of its choices")
+            text = ((node.raw.get("instruction") or {}).get("text")) or ""
+            for name in VAR_RE.findall(text):
+                if name not in available:
+                    issue("error", "undefined_variable", f"{node.id}: instruction uses undefined variable {name!r}")
+            if node.type != "end" and not any(e.dest for e in node.all_edges()):
+                issue("warning", "dead_end", f"{node.id} ({node.name}) has no outgoing edge with a destination")
+
+        for node_id in sorted(set(self.nodes) - self.reachable()):
+            issue("warning", "unreachable_node", f"{node_id} ({self.nodes[node_id].name}) is not reachable from the start node")
+        for name in VAR_RE.findall(self.flow.get("global_prompt") or ""):
+            if name not in available:
+                issue("error", "undefined_variable", f"global_prompt uses undefined variable {name!r}")
+        return issues
+
+    # -----------------------
+    # Simulation
+    # -----------------------
+    def _pick(self, node: Node, choice: Optional[str]) -> Optional[str]:
+        if choice is not None:
+            if choice in self.nodes:
+                # Either an edge destination or a jump to a global node
+                if any(e.dest == choice for e in node.all_edges()) or self.nodes[choice].is_global:
+                    return choice
+            for edge in node.all_edges():
+                if edge.id == choice:
+                    return edge.dest
+            raise ValueError(f"{node.id}: choice {choice!r} is not an edge, destination or global node")
+        if node.skip_edge is not None and node.skip_edge.dest:
+            return node.skip_edge.dest
+        for edge in node.edges:
+            if edge.kind == "prompt" and edge.dest:
+                return edge.dest
+        return None
+
+    def simulate(
+        self,
+        variables: Optional[Dict[str, Any]] = None,
+        choices: Optional[Dict[str, Any]] = None,
+        max_steps: int = MAX_STEPS,
+    ) -> SimResult:
+        """Walk the flow for one scripted call.
+
+        ``variables`` are the values extraction nodes will "hear". ``choices``
+        maps a node id to the edge id / destination / global node taken at that
+        node for prompt transitions (a list is consumed one visit at a time);
+        unscripted prompt transitions take the skip-response edge, else the
+        first prompt edge.
+        """
+        script = variables or {}
+        pending = {k: list(v) if isinstance(v, list) else v for k, v in (choices or {}).items()}
+        state: Dict[str, Any] = {}
+        path: List[str] = []
+        node_id = self.start
+        for _ in range(max_steps):
+            node = self.nodes.get(node_id)
+            if node is None:
+                return SimResult(path, f"missing_node:{node_id}", state)
+            path.append(node_id)
+            if node.type == "end":
+                return SimResult(path, "ended", state)
+            for name in node.variables:
+                if name in script:
+                    state[name] = script[name]
+            nxt = None
+            for edge in node.edges:
+                if edge.predicate is not None and edge.predicate(state):
+                    nxt = edge.dest
+                    break
+            if nxt is None:
+                choice = pending.get(node_id)
+                if isinstance(choice, list):
+                    choice = choice.pop(0) if choice else None
+                nxt = self._pick(node, choice)
+            if nxt is None:
+                return SimResult(path, "dead_end", state)
+            node_id = nxt
+        return SimResult(path, "max_steps", state)
+
+
+def run_scenarios(graph: FlowGraph, scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Simulate each scenario and compare with its ``expect_outcome`` / ``expect_path`` / ``expect_visits``."""
+    results = []
+    for sc in scenarios:
+        res = graph.simulate(sc.get("variables"), sc.get("choices"))
+        failures = []
+        if "expect_outcome" in sc and res.outcome != sc["expect_outcome"]:
+            failures.append(f"outcome {res.outcome!r} != {sc['expect_outcome']!r}")
+        if "expect_path" in sc and res.path != sc["expect_path"]:
+            failures.append(f"path {res.path} != {sc['expect_path']}")
+        for node_id in sc.get("expect_visits") or []:
+            if node_id not in res.path:
+                failures.append(f"never visited {node_id!r}")
+        results.append({"name": sc.get("name"), "ok": not failures, "failures": failures, **res.to_dict()})
+    return results
+
+
+def _load_flow(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # Accept a template file ({"flow": {...}}) or a bare flow payload
+    return data.get("flow", data)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate and simulate a conversation flow offline")
+    parser.add_argument("flow", help="template file from backend/flows or a bare flow JSON")
+    parser.add_argument("--scenarios", help="JSON list of scenarios to simulate")
+    parser.add_argument("--bench", type=int, default=0, help="time N simulations of the scenarios")
+    args = parser.parse_args(argv)
+
+    graph = FlowGraph(_load_flow(args.flow))
+    issues = graph.validate()
+    for i in issues:
+        print(f"[{i['severity']}] {i['code']}: {i['message']}")
+    failed = any(i["severity"] == "error" for i in issues)
+
+    if args.scenarios:
+        with open(args.scenarios, encoding="utf-8") as f:
+            scenarios = json.load(f)
+        for r in run_scenarios(graph, scenarios):
+            status = "ok  " if r["ok"] else "FAIL"
+            print(f"{status} {r['name']}: {r['outcome']} via {' -> '.join(r['path'])}")
+            for msg in r["failures"]:
+                print(f"     {msg}")
+            failed = failed or not r["ok"]
+        if args.bench and scenarios:
+            start = time.perf_counter()
+            for i in range(args.bench):
+                sc = scenarios[i % len(scenarios)]
+                graph.simulate(sc.get("variables"), sc.get("choices"))
+            elapsed = time.perf_counter() - start
+            print(f"{args.bench} simulations in {elapsed:.3f}s ({args.bench / elapsed:,.0f}/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
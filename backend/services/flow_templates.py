@@ -0,0 +1,150 @@
+"""Registry of conversation-flow templates loaded from ``backend/flows``.
+
+Each ``<name>.v<version>.json`` file holds ``{"name", "version", "description",
+"flow"}`` where ``flow`` is a Retell create-conversation-flow payload. Files are
+read and validated once at startup; the default rendering of each template is
+serialised to bytes up front and parameterised renderings are memoised, so
+agent creation sends cached bytes.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+
+FLOWS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flows")
+DEFAULT_TEMPLATE = "logistics_check_in"
+
+# Per-customer parameters accepted by FlowTemplate.render
+FLOW_PARAMS = {"global_prompt", "model", "node_prompts", "variable_choices"}
+
+
+class FlowTemplateError(ValueError):
+    pass
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def validate_flow(flow: Dict[str, Any]) -> None:
+    """Structural checks run once per template at load time."""
+    nodes = flow.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        raise FlowTemplateError("flow.nodes must be a non-empty list")
+    ids = [n.get("id") for n in nodes]
+    if any(not i for i in ids):
+        raise FlowTemplateError("every node needs an id")
+    if len(set(ids)) != len(ids):
+        raise FlowTemplateError("node ids must be unique")
+    known = set(ids)
+    if flow.get("start_node_id") not in known:
+        raise FlowTemplateError(f"start_node_id {flow.get('start_node_id')!r} is not a node")
+    for node in nodes:
+        edges = list(node.get("edges") or [])
+        if node.get("skip_response_edge"):
+            edges.append(node["skip_response_edge"])
+        for edge in edges:
+            dest = edge.get("destination_node_id")
+            if dest is not None and dest not in known:
+                raise FlowTemplateError(f"edge {edge.get('id')!r} points to unknown node {dest!r}")
+
+
+class FlowTemplate:
+    def __init__(self, name: str, version: int, description: str, flow: Dict[str, Any]) -> None:
+        validate_flow(flow)
+        self.name = name
+        self.version = version
+        self.description = description
+        self.flow = flow
+        self.default_bytes = _dumps(flow)
+        # Memoise renderings per canonical params string
+        self._render_cached = lru_cache(maxsize=256)(self._render_uncached)
+
+    def render(self, params: Optional[Dict[str, Any]] = None) -> bytes:
+        """Serialised payload for ``params`` (see FLOW_PARAMS); cached bytes when empty."""
+        if not params:
+            return self.default_bytes
+        unknown = set(params) - FLOW_PARAMS
+        if unknown:
+            raise FlowTemplateError(f"Unknown flow params: {', '.join(sorted(unknown))}")
+        return self._render_cached(json.dumps(params, sort_keys=True))
+
+    def _render_uncached(self, params_json: str) -> bytes:
+        params = json.loads(params_json)
+        flow = copy.deepcopy(self.flow)
+        if params.get("global_prompt") is not None:
+            flow["global_prompt"] = params["global_prompt"]
+        if params.get("model"):
+            flow["model_choice"] = {**(flow.get("model_choice") or {}), "model": params["model"]}
+        node_prompts: Dict[str, str] = params.get("node_prompts") or {}
+        variable_choices: Dict[str, List[str]] = params.get("variable_choices") or {}
+        seen_nodes = set()
+        for node in flow["nodes"]:
+            if node["id"] in node_prompts:
+                node.setdefault("instruction", {"type": "prompt"})["text"] = node_prompts[node["id"]]
+                seen_nodes.add(node["id"])
+            for var in node.get("variables") or []:
+                if var.get("name") in variable_choices:
+                    if var.get("type") != "enum":
+                        raise FlowTemplateError(f"variable {var['name']!r} is not an enum")
+                    var["choices"] = list(variable_choices[var["name"]])
+        missing = set(node_prompts) - seen_nodes
+        if missing:
+            raise FlowTemplateError(f"Unknown node ids: {', '.join(sorted(missing))}")
+        validate_flow(flow)
+        return _dumps(flow)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "description": self.description,
+            "nodes": len(self.flow["nodes"]),
+            "bytes": len(self.default_bytes),
+        }
+
+
+class FlowTemplateRegistry:
+    def __init__(self) -> None:
+        self._templates: Dict[Tuple[str, int], FlowTemplate] = {}
+        self._latest: Dict[str, int] = {}
+
+    @classmethod
+    def load_dir(cls, path: str = FLOWS_DIR) -> "FlowTemplateRegistry":
+        registry = cls()
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(path, filename), encoding="utf-8") as f:
+                data = json.load(f)
+            try:
+                registry.add(FlowTemplate(data["name"], int(data["version"]), data.get("description", ""), data["flow"]))
+            except (KeyError, FlowTemplateError) as exc:
+                raise FlowTemplateError(f"{filename}: {exc}")
+        return registry
+
+    def add(self, template: FlowTemplate) -> None:
+        self._templates[(template.name, template.version)] = template
+        self._latest[template.name] = max(template.version, self._latest.get(template.name, 0))
+
+    def get(self, name: str = DEFAULT_TEMPLATE, version: Optional[int] = None) -> FlowTemplate:
+        if version is None:
+            version = self._latest.get(name)
+        template = self._templates.get((name, version)) if version is not None else None
+        if template is None:
+            raise FlowTemplateError(f"Unknown flow template {name!r} version {version}")
+        return template
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [t.info() for _, t in sorted(self._templates.items())]
+
+
+def get_flow_templates(request: Request) -> FlowTemplateRegistry:
+    """FastAPI dependency returning the registry loaded at startup."""
+    return request.app.state.flow_templates
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+from fastapi import Request
+
+
+class RecentKeys:
+    """LRU set of keys that expire ``ttl`` seconds after being added."""
+
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        expires = self._entries.get(key)
+        if expires is None:
+            return False
+        if expires <= self._clock():
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str) -> None:
+        self._entries[key] = self._clock() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class WebhookDeduplicator:
+    """Drops redelivered Retell webhook events keyed on (retell call id, event).
+
+    A process-local ``RecentKeys`` cache catches redeliveries before they are
+    queued; the ``webhook_events`` table (unique on call_id + event) catches
+    the rest across restarts and replicas. Rows in that table are written by
+    the ``apply_call_analyzed`` RPC together with the event's effect (see
+    ``services.call_events.apply_call_event``).
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.recent = RecentKeys(max_entries, ttl)
+        self.skipped_memory = 0
+        self.skipped_persistent = 0
+
+    @staticmethod
+    def key(retell_call_id: str, event: str) -> str:
+        return f"{retell_call_id}:{event}"
+
+    def check_and_remember(self, retell_call_id: str, event: str) -> bool:
+        """Return True if the event was seen recently; otherwise remember it."""
+        key = self.key(retell_call_id, event)
+        if key in self.recent:
+            self.skipped_memory += 1
+            return True
+        self.recent.add(key)
+        return False
+
+    def forget(self, retell_call_id: str, event: str) -> None:
+        self.recent.discard(self.key(retell_call_id, event))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "duplicates_skipped": self.skipped_memory + self.skipped_persistent,
+            "duplicates_skipped_memory": self.skipped_memory,
+            "duplicates_skipped_persistent": self.skipped_persistent,
+            "recent_keys": len(self.recent),
+        }
+
+
+def get_deduplicator(request: Request) -> WebhookDeduplicator:
+    """FastAPI dependency returning the app's webhook deduplicator."""
+    return request.app.state.dedup
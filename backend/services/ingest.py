@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol
+
+from fastapi import Request
+
+from services.metrics import WEBHOOK_PROCESS_SECONDS, WEBHOOK_WAIT_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(RuntimeError):
+    """Raised when the ingestion queue is at capacity (callers should shed load)."""
+
+
+@dataclass
+class QueuedEvent:
+    id: int
+    payload: Dict[str, Any]
+    attempts: int = 0
+    error: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EventQueue(Protocol):
+    """Storage backend for pending and failed webhook events."""
+
+    async def put(self, payload: Dict[str, Any]) -> QueuedEvent: ...
+
+    async def get(self) -> QueuedEvent: ...
+
+    async def ack(self, event: QueuedEvent) -> None: ...
+
+    async def fail(self, event: QueuedEvent, error: str) -> None: ...
+
+    async def failed(self) -> List[QueuedEvent]: ...
+
+    async def replay(self, ids: Optional[List[int]] = None) -> int: ...
+
+    def qsize(self) -> int: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryEventQueue:
+    """Bounded in-process queue. Pending events are lost on restart."""
+
+    def __init__(self, maxsize: int, max_failed: int = 1000) -> None:
+        self._queue: asyncio.Queue[QueuedEvent] = asyncio.Queue(maxsize=maxsize)
+        self._failed: "OrderedDict[int, QueuedEvent]" = OrderedDict()
+        self._max_failed = max_failed
+        self._ids = itertools.count(1)
+
+    async def put(self, payload: Dict[str, Any]) -> QueuedEvent:
+        event = QueuedEvent(id=next(self._ids), payload=payload)
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            raise QueueFull("Webhook ingestion queue is full")
+        return event
+
+    async def get(self) -> QueuedEvent:
+        return await self._queue.get()
+
+    async def ack(self, event: QueuedEvent) -> None:
+        self._queue.task_done()
+
+    async def fail(self, event: QueuedEvent, error: str) -> None:
+        self._queue.task_done()
+        event.error = error
+        self._failed[event.id] = event
+        while len(self._failed) > self._max_failed:
+            self._failed.popitem(last=False)
+
+    async def failed(self) -> List[QueuedEvent]:
+        return list(self._failed.values())
+
+    async def replay(self, ids: Optional[List[int]] = None) -> int:
+        selected = list(self._failed) if ids is None else [i for i in ids if i in self._failed]
+        replayed = 0
+        for event_id in selected:
+            event = self._failed[event_id]
+            try:
+                self._queue.put_nowait(event)
+            except asyncio.QueueFull:
+                break
+            del self._failed[event_id]
+            event.enqueued_at = time.monotonic()
+            replayed += 1
+        return replayed
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteEventQueue:
+    """Durable queue in a local SQLite file; survives restarts and keeps failures for replay.
+
+    Rows move ``pending -> processing -> (deleted | failed)``. Rows left in
+    ``processing`` by a crash are returned to ``pending`` on open.
+    """
+
+    def __init__(self, path: str, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            """
+            create table if not exists webhook_queue (
+              id integer primary key autoincrement,
+              payload text not null,
+              status text not null default 'pending',
+              attempts integer not null default 0,
+              error text,
+              created_at real not null
+            )
+            """
+        )
+        self._conn.execute("create index if not exists webhook_queue_status_idx on webhook_queue(status, id)")
+        self._conn.execute("update webhook_queue set status = 'pending' where status = 'processing'")
+        self._pending = self._conn.execute(
+            "select count(*) from webhook_queue where status = 'pending'"
+        ).fetchone()[0]
+        self._lock = asyncio.Lock()
+        self._available = asyncio.Event()
+        if self._pending:
+            self._available.set()
+
+    async def put(self, payload: Dict[str, Any]) -> QueuedEvent:
+        data = json.dumps(payload, separators=(",", ":"))
+        async with self._lock:
+            if self._pending >= self._maxsize:
+                raise QueueFull("Webhook ingestion queue is full")
+            cur = await asyncio.to_thread(
+                self._conn.execute,
+                "insert into webhook_queue (payload, created_at) values (?, ?)",
+                (data, time.time()),
+            )
+            self._pending += 1
+        self._available.set()
+        return QueuedEvent(id=cur.lastrowid, payload=payload)
+
+    async def get(self) -> QueuedEvent:
+        while True:
+            await self._available.wait()
+            async with self._lock:
+                row = await asyncio.to_thread(self._claim)
+                if row is not None:
+                    self._pending -= 1
+                    return QueuedEvent(id=row[0], payload=json.loads(row[1]), attempts=row[2])
+                self._available.clear()
+
+    def _claim(self) -> Optional[tuple]:
+        row = self._conn.execute(
+            "select id, payload, attempts from webhook_queue where status = 'pending' order by id limit 1"
+        ).fetchone()
+        if row is not None:
+            self._conn.execute(
+                "update webhook_queue set status = 'processing', attempts = attempts + 1 where id = ?",
+                (row[0],),
+            )
+        return row
+
+    async def ack(self, event: QueuedEvent) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._conn.execute, "delete from webhook_queue where id = ?", (event.id,))
+
+    async def fail(self, event: QueuedEvent, error: str) -> None:
+        async with self._lock:
+            await asyncio.to_thread(
+                self._conn.execute,
+                "update webhook_queue set status = 'failed', error = ? where id = ?",
+                (error, event.id),
+            )
+
+    async def failed(self) -> List[QueuedEvent]:
+        async with self._lock:
+            rows = await asyncio.to_thread(
+                lambda: self._conn.execute(
+                    "select id, payload, attempts, error from webhook_queue where status = 'failed' order by id"
+                ).fetchall()
+            )
+        return [QueuedEvent(id=r[0], payload=json.loads(r[1]), attempts=r[2], error=r[3]) for r in rows]
+
+    async def replay(self, ids: Optional[List[int]] = None) -> int:
+        async with self._lock:
+            if ids is None:
+                cur = await asyncio.to_thread(
+                    self._conn.execute,
+                    "update webhook_queue set status = 'pending', error = null where status = 'failed'",
+                )
+            else:
+                marks = ",".join("?" for _ in ids)
+                cur = await asyncio.to_thread(
+                    self._conn.execute,
+                    f"update webhook_queue set status = 'pending', error = null where status = 'failed' and id in ({marks})",
+                    tuple(ids),
+                )
+            self._pending += cur.rowcount
+        if cur.rowcount:
+            self._available.set()
+        return cur.rowcount
+
+    def qsize(self) -> int:
+        return self._pending
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class IngestionWorkers:
+    """Fixed-size pool of asyncio tasks draining an EventQueue through ``handler``."""
+
+    def __init__(self, queue: EventQueue, handler: Handler, concurrency: int) -> None:
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self.enqueued = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_depth = 0
+        self.last_wait_ms = 0.0
+        self.last_process_ms = 0.0
+        self.restarts = 0
+        self._stopping = False
+
+    async def submit(self, payload: Dict[str, Any]) -> QueuedEvent:
+        try:
+            event = await self.queue.put(payload)
+        except QueueFull:
+            self.rejected += 1
+            raise
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return event
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            self._spawn(f"webhook-ingest-{i}")
+
+    def _spawn(self, name: str) -> None:
+        task = asyncio.create_task(self._run(), name=name)
+        task.add_done_callback(self._on_done)
+        self._tasks.append(task)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        # A worker only ends on its own if the queue itself raised; replace it
+        if self._stopping or task.cancelled():
+            return
+        self._tasks.remove(task)
+        logger.error("ingestion worker %s died, restarting", task.get_name(), exc_info=task.exception())
+        self.restarts += 1
+        self._spawn(task.get_name())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.queue.close()
+
+    async def _run(self) -> None:
+        while True:
+            event = await self.queue.get()
+            self.in_flight += 1
+            started = time.monotonic()
+            self.last_wait_ms = (started - event.enqueued_at) * 1000
+            WEBHOOK_WAIT_SECONDS.observe(started - event.enqueued_at)
+            outcome = "error"
+            try:
+                await self.handler(event.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.failures += 1
+                await self._settle(self.queue.fail(event, str(exc)), event)
+            else:
+                outcome = "ok"
+                self.processed += 1
+                await self._settle(self.queue.ack(event), event)
+            finally:
+                self.in_flight -= 1
+                elapsed = time.monotonic() - started
+                self.last_process_ms = elapsed * 1000
+                WEBHOOK_PROCESS_SECONDS.observe(elapsed, outcome)
+
+    async def _settle(self, op: Awaitable[None], event: QueuedEvent) -> None:
+        # e.g. SQLite "database is locked": the row stays in processing and is
+        # retried after a restart; the worker keeps draining
+        try:
+            await op
+        except Exception:
+            logger.exception("could not ack or fail queued event", extra={"event_id": event.id})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "in_flight": self.in_flight,
+            "workers": self.concurrency,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failures,
+            "worker_restarts": self.restarts,
+            "last_wait_ms": round(self.last_wait_ms, 2),
+            "last_process_ms": round(self.last_process_ms, 2),
+        }
+
+
+def create_event_queue(backend: str, maxsize: int, path: str) -> EventQueue:
+    if backend == "memory":
+        return MemoryEventQueue(maxsize)
+    if backend == "sqlite":
+        return SQLiteEventQueue(path, maxsize)
+    raise RuntimeError(f"Unknown webhook queue backend: {backend}")
+
+
+def get_ingestion(request: Request) -> IngestionWorkers:
+    """FastAPI dependency returning the app's webhook ingestion pool."""
+    return request.app.state.ingestion
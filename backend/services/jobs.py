@@ -0,0 +1,17 @@
+"""In-memory registries of background jobs (summary backfills, campaigns)."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def prune_finished(jobs: Dict[str, Any], keep: int) -> None:
+    """Drop the oldest finished jobs so at most ``keep`` remain for status lookups.
+
+    ``jobs`` maps id to an object with a ``status``, in insertion order;
+    pending and running jobs are never dropped.
+    """
+    finished = [job_id for job_id, job in jobs.items() if job.status not in ACTIVE_STATUSES]
+    for job_id in finished[:max(0, len(finished) - keep)]:
+        del jobs[job_id]
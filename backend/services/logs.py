@@ -0,0 +1,158 @@
+"""Structured logging that never writes from the event loop.
+
+``configure_logging`` routes the root logger through a ``QueueHandler``; a
+``QueueListener`` thread formats (JSON or text) and writes the records. Records
+are stamped on the calling side with the correlation ids held in context
+variables: ``request_id`` (set per HTTP request by ``CorrelationMiddleware``)
+and ``call_id`` / ``retell_call_id`` (bound with ``log_context``).
+
+Large payloads go through ``log_payload``: they are only logged at DEBUG, for a
+sampled fraction of events, and serialised by the listener thread.
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+call_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("call_id", default=None)
+retell_call_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("retell_call_id", default=None)
+
+_CONTEXT_VARS = {"request_id": request_id_var, "call_id": call_id_var, "retell_call_id": retell_call_id_var}
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_payload_sample_rate = 0.0
+
+
+class ContextFilter(logging.Filter):
+    """Copy correlation ids onto the record while still in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _CONTEXT_VARS.items():
+            if not hasattr(record, name):
+                setattr(record, name, var.get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, separators=(",", ":"))
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS and v is not None}
+        if extra:
+            line += " " + " ".join(f"{k}={json.dumps(v, default=str)}" for k, v in extra.items())
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Hand the record over as is: message merging, tracebacks and JSON
+        # encoding all happen on the listener thread, not the event loop.
+        return record
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", payload_sample_rate: float = 0.0) -> logging.handlers.QueueListener:
+    """Install the queue-backed root handler; returns the started listener (stop it on shutdown)."""
+    global _payload_sample_rate
+    _payload_sample_rate = payload_sample_rate
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(ContextFilter())
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    listener = logging.handlers.QueueListener(records, stream, respect_handler_level=False)
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, _QueueHandler):
+            root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    listener.start()
+    return listener
+
+
+@contextmanager
+def log_context(**ids: Optional[str]) -> Iterator[None]:
+    """Bind ``call_id`` / ``retell_call_id`` (or ``request_id``) for the enclosed block."""
+    tokens = [(_CONTEXT_VARS[k], _CONTEXT_VARS[k].set(v)) for k, v in ids.items() if v is not None]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def log_payload(logger: logging.Logger, msg: str, payload: Any, **extra: Any) -> None:
+    """DEBUG dump of a (possibly large) payload for a sampled fraction of calls.
+
+    ``payload`` must not be mutated afterwards: it is serialised later, on the
+    listener thread.
+    """
+    if _payload_sample_rate <= 0 or not logger.isEnabledFor(logging.DEBUG):
+        return
+    if _payload_sample_rate < 1 and random.random() >= _payload_sample_rate:
+        return
+    logger.debug(msg, extra={**extra, "payload": payload})
+
+
+class CorrelationMiddleware:
+    """Give every HTTP request a ``request_id`` (from ``X-Request-ID`` or new) and echo it back."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope.get("headers") or []:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode("latin-1")))
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,268 @@
+"""Process-local metrics in the Prometheus text format, served on ``GET /metrics``.
+
+Metrics are module-level objects registered in ``REGISTRY`` and updated
+in-line on hot paths (plain dict/float updates on the event loop, no locks).
+When ``settings.metrics_enabled`` is false, ``observe``/``inc`` return
+immediately, ``time()`` hands out a shared no-op context manager and the HTTP
+middleware and ``/metrics`` route are not installed.
+"""
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Seconds; covers sub-millisecond cache hits through slow Retell calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.enabled = True
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def gauge_callback(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        """Gauge read from ``fn`` at scrape time (e.g. a queue's current depth)."""
+        def collect() -> List[str]:
+            return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {_num(fn())}"]
+        self._collectors.append(collect)
+
+    def clear_callbacks(self) -> None:
+        self._collectors.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collect in self._collectors:
+            try:
+                lines.extend(collect())
+            except Exception:
+                # A broken callback must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not REGISTRY.enabled:
+            return
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class _NoopTimer:
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not REGISTRY.enabled:
+            return
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels: str):
+        """Context manager observing the elapsed wall time of its block."""
+        if not REGISTRY.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, labels)
+
+    def collect(self) -> List[str]:
+        lines = self._header()
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _num(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+# -----------------------
+# Metrics used across the app
+# -----------------------
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to response start per route", ("method", "route", "status")
+)
+RETELL_REQUEST_SECONDS = Histogram(
+    "retell_request_duration_seconds", "RetellService calls including retries", ("op", "outcome")
+)
+SUPABASE_REQUEST_SECONDS = Histogram(
+    "supabase_request_duration_seconds", "PostgREST requests by table or rpc", ("method", "target", "status")
+)
+WEBHOOK_WAIT_SECONDS = Histogram("webhook_queue_wait_seconds", "Time webhook events wait in the ingestion queue")
+WEBHOOK_PROCESS_SECONDS = Histogram(
+    "webhook_processing_duration_seconds", "Time to persist one webhook event", ("outcome",)
+)
+SUMMARY_SECONDS = Histogram(
+    "summary_extraction_duration_seconds",
+    "generate_structured_summary run time",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_SECONDS per route template.
+
+    Timing stops at ``http.response.start`` so long-lived streams (SSE,
+    exports) report time to first byte rather than stream lifetime.
+    """
+
+    def __init__(self, app: ASGIApp, skip_paths: Sequence[str] = ("/metrics",)) -> None:
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], path, str(status))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            record(500)
+            raise
+
+
+def _postgrest_target(url: httpx.URL) -> str:
+    # /rest/v1/<table> or /rest/v1/rpc/<function>
+    parts = [p for p in url.path.split("/") if p]
+    if "rpc" in parts:
+        return "rpc/" + parts[-1]
+    return parts[-1] if parts else "unknown"
+
+
+def instrument_postgrest(session: Optional[httpx.AsyncClient]) -> None:
+    """Time every PostgREST request made through ``session`` (the Supabase client's)."""
+    if session is None or not REGISTRY.enabled:
+        return
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        request = response.request
+        started = request.extensions.get("metrics_started")
+        if started is not None:
+            SUPABASE_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, request.method, _postgrest_target(request.url), str(response.status_code)
+            )
+
+    session.event_hooks["request"].append(on_request)
+    session.event_hooks["response"].append(on_response)
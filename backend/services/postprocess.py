@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Pattern, Sequence
+
+from services.metrics import SUMMARY_SECONDS
 
 
 EMERGENCY_KEYWORDS = [
@@ -15,9 +17,52 @@ EMERGENCY_KEYWORDS = [
 ]
 
 
-def _find_first(patterns: List[str], text: str) -> str | None:
+# Everything below is compiled once at import. The transcript is joined and
+# lowercased once per summary; plain keyword checks are substring tests on that
+# lowercased text (cheaper in CPython than a combined regex scan), and only
+# patterns needing word boundaries or captures go through the regex engine.
+_EMERGENCY_KEYWORDS = tuple(kw.lower() for kw in EMERGENCY_KEYWORDS)
+
+_ARRIVED_RE = re.compile(r"\barriv(?:ed|ing)\b")
+_ARRIVED_KEYWORDS = ("at receiver", "at the receiver", "at dock", "in door")
+_UNLOADING_RE = re.compile(r"\bunload(?:ing|ed)\b")
+_UNLOADING_KEYWORDS = ("lumper", "detention")
+_DELAYED_RE = re.compile(r"\bdelay(?:ed)?\b")
+_DELAYED_KEYWORDS = ("traffic", "weather", "breakdown", "accident")
+
+_ETA_PATTERNS = (
+    re.compile(r"eta (?:is|around|about)?\s*([\w: ]+(?:am|pm)?)", re.I),
+    re.compile(r"(tomorrow|today|tonight|\b[0-9]{1,2}[:.][0-9]{2}\s*(?:am|pm))", re.I),
+)
+_LOCATION_PATTERNS = (
+    re.compile(r"on (I-[0-9]+(?: [NSEW])?(?: near [\w ,.-]+)?)", re.I),
+    re.compile(r"near ([\w ,.-]+)", re.I),
+    re.compile(r"at ([\w ,.-]+)", re.I),
+    re.compile(r"by ([\w ,.-]+)", re.I),
+)
+
+_WEATHER_KEYWORDS = ("weather", "snow", "rain", "ice", "wind")
+_MECHANICAL_KEYWORDS = ("breakdown", "blowout", "mechanic", "tire")
+
+_IN_DOOR_RE = re.compile(r"in door [0-9]+", re.I)
+
+_ACK_RE = re.compile(r"(?:will do|okay|ok|got it|sure|yes)\b")
+
+_ACCIDENT_KEYWORDS = ("accident", "crash")
+_BREAKDOWN_KEYWORDS = ("blowout", "breakdown", "mechanic", "tire", "engine")
+_MEDICAL_KEYWORDS = ("medical", "hurt", "injur")
+
+_SAFE_KEYWORDS = ("safe", "ok", "okay", "fine", "no danger")
+_UNSAFE_KEYWORDS = ("not safe", "in danger", "help")
+_NO_INJURY_KEYWORDS = ("no injur", "not hurt", "fine")
+_INJURY_KEYWORDS = ("injur", "hurt", "bleed", "ambulance")
+
+_LOAD_UNSECURE_KEYWORDS = ("load shift", "load spilled", "load lost", "load damaged")
+
+
+def _find_first(patterns: Sequence[Pattern[str]], text: str) -> str | None:
     for pattern in patterns:
-        m = re.search(pattern, text, re.IGNORECASE)
+        m = pattern.search(text)
         if m:
             if m.groups():
                 return m.group(1).strip()
@@ -25,88 +70,82 @@ def _find_first(patterns: List[str], text: str) -> str | None:
     return None
 
 
-def _contains_any(keywords: List[str], text: str) -> bool:
-    return any(kw.lower() in text.lower() for kw in keywords)
+def _contains_any(keywords: Sequence[str], lowered: str) -> bool:
+    # keywords are lowercase; lowered is the already-lowercased text
+    return any(kw in lowered for kw in keywords)
 
 
-def _infer_driver_status(text: str) -> str:
-    if re.search(r"\barriv(ed|ing)\b|at (the )?receiver|at dock|in door", text, re.I):
+def _infer_driver_status(lowered: str) -> str:
+    if _ARRIVED_RE.search(lowered) or _contains_any(_ARRIVED_KEYWORDS, lowered):
         return "Arrived"
-    if re.search(r"\bunload(ing|ed)\b|lumper|detention", text, re.I):
+    if _UNLOADING_RE.search(lowered) or _contains_any(_UNLOADING_KEYWORDS, lowered):
         return "Unloading"
-    if re.search(r"\bdelay(ed)?\b|traffic|weather|breakdown|accident", text, re.I):
+    if _DELAYED_RE.search(lowered) or _contains_any(_DELAYED_KEYWORDS, lowered):
         return "Delayed"
     return "Driving"
 
 
 def _extract_eta(text: str) -> str | None:
-    return _find_first([
-        r"eta (?:is|around|about)?\s*([\w: ]+(?:am|pm)?)",
-        r"(tomorrow|today|tonight|\b[0-9]{1,2}[:.][0-9]{2}\s*(?:am|pm))",
-    ], text)
+    return _find_first(_ETA_PATTERNS, text)
 
 
 def _extract_location(text: str) -> str | None:
-    return _find_first([
-        r"on (I-[0-9]+(?: [NSEW])?(?: near [\w ,.-]+)?)",
-        r"near ([\w ,.-]+)",
-        r"at ([\w ,.-]+)",
-        r"by ([\w ,.-]+)",
-    ], text)
+    return _find_first(_LOCATION_PATTERNS, text)
 
 
-def _extract_delay_reason(text: str) -> str:
-    if re.search(r"traffic", text, re.I):
+def _extract_delay_reason(lowered: str) -> str:
+    if "traffic" in lowered:
         return "Heavy Traffic"
-    if re.search(r"weather|snow|rain|ice|wind", text, re.I):
+    if _contains_any(_WEATHER_KEYWORDS, lowered):
         return "Weather"
-    if re.search(r"breakdown|blowout|mechanic|tire", text, re.I):
+    if _contains_any(_MECHANICAL_KEYWORDS, lowered):
         return "Mechanical"
     return "None"
 
 
-def _extract_unloading_status(text: str) -> str:
-    if re.search(r"in door [0-9]+", text, re.I):
-        return _find_first([r"(in door [0-9]+)"], text) or "In Door"
-    if re.search(r"waiting for lumper", text, re.I):
+def _extract_unloading_status(text: str, lowered: str) -> str:
+    m = _IN_DOOR_RE.search(text)
+    if m:
+        return m.group(0).strip()
+    if "waiting for lumper" in lowered:
         return "Waiting for Lumper"
-    if re.search(r"detention", text, re.I):
+    if "detention" in lowered:
         return "Detention"
     return "N/A"
 
 
-def _bool_from_ack(text: str) -> bool:
-    return bool(re.search(r"(will do|okay|ok|got it|sure|yes)\b", text, re.I))
+def _bool_from_ack(lowered: str) -> bool:
+    return bool(_ACK_RE.search(lowered))
 
 
-def _extract_emergency_type(text: str) -> str:
-    if re.search(r"accident|crash", text, re.I):
+def _extract_emergency_type(lowered: str) -> str:
+    if _contains_any(_ACCIDENT_KEYWORDS, lowered):
         return "Accident"
-    if re.search(r"blowout|breakdown|mechanic|tire|engine", text, re.I):
+    if _contains_any(_BREAKDOWN_KEYWORDS, lowered):
         return "Breakdown"
-    if re.search(r"medical|hurt|injur", text, re.I):
+    if _contains_any(_MEDICAL_KEYWORDS, lowered):
         return "Medical"
     return "Other"
 
 
-def _extract_safety_status(text: str) -> str:
-    if re.search(r"safe|ok|okay|fine|no danger", text, re.I):
+def _extract_safety_status(lowered: str) -> str:
+    if _contains_any(_SAFE_KEYWORDS, lowered):
         return "Driver confirmed everyone is safe"
-    if re.search(r"not safe|in danger|help", text, re.I):
+    if _contains_any(_UNSAFE_KEYWORDS, lowered):
         return "Safety not confirmed"
     return "Unknown"
 
 
-def _extract_injury_status(text: str) -> str:
-    if re.search(r"no injur|not hurt|fine", text, re.I):
+def _extract_injury_status(lowered: str) -> str:
+    if _contains_any(_NO_INJURY_KEYWORDS, lowered):
         return "No injuries reported"
-    if re.search(r"injur|hurt|bleed|ambulance", text, re.I):
+    if _contains_any(_INJURY_KEYWORDS, lowered):
         return "Injuries reported"
     return "Unknown"
 
 
-def _extract_load_secure(text: str) -> bool:
-    return not bool(re.search(r"load (?:shift|spilled|lost|damaged)", text, re.I))
+def _extract_load_secure(lowered: str) -> bool:
+    return not _contains_any(_LOAD_UNSECURE_KEYWORDS, lowered)
 
 
 def generate_structured_summary(transcript_messages: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -114,23 +153,29 @@ def generate_structured_summary(transcript_messages: List[Dict[str, Any]]) -> Di
     transcript_messages: list of {role: "agent"|"driver", text: str, timestamp?: str}
     Returns a dict ready to store as summary.
     """
+    with SUMMARY_SECONDS.time():
+        return _structured_summary(transcript_messages)
+
+
+def _structured_summary(transcript_messages: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Flatten text for simple heuristics
     full_text = "\n".join([m.get("text", "") for m in transcript_messages])
+    lowered = full_text.lower()
 
     # Emergency detection
-    if _contains_any(EMERGENCY_KEYWORDS, full_text):
+    if _contains_any(_EMERGENCY_KEYWORDS, lowered):
         return {
             "call_outcome": "Emergency Escalation",
-            "emergency_type": _extract_emergency_type(full_text),
-            "safety_status": _extract_safety_status(full_text),
-            "injury_status": _extract_injury_status(full_text),
+            "emergency_type": _extract_emergency_type(lowered),
+            "safety_status": _extract_safety_status(lowered),
+            "injury_status": _extract_injury_status(lowered),
             "emergency_location": _extract_location(full_text) or "Unknown",
-            "load_secure": _extract_load_secure(full_text),
+            "load_secure": _extract_load_secure(lowered),
             "escalation_status": "Connected to Human Dispatcher",
         }
 
     # Dispatch check-in
-    driver_status = _infer_driver_status(full_text)
+    driver_status = _infer_driver_status(lowered)
     call_outcome = (
         "Arrival Confirmation" if driver_status in ("Arrived", "Unloading") else "In-Transit Update"
     )
@@ -139,8 +184,7 @@ def generate_structured_summary(transcript_messages: List[Dict[str, Any]]) -> Di
         "driver_status": driver_status,
         "current_location": _extract_location(full_text) or "Unknown",
         "eta": _extract_eta(full_text) or "Unknown",
-        "delay_reason": _extract_delay_reason(full_text),
-        "unloading_status": _extract_unloading_status(full_text),
-        "pod_reminder_acknowledged": _bool_from_ack(full_text),
+        "delay_reason": _extract_delay_reason(lowered),
+        "unloading_status": _extract_unloading_status(full_text, lowered),
+        "pod_reminder_acknowledged": _bool_from_ack(lowered),
     }
-
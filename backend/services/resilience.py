@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring ``Retry-After`` when given."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.retry_wait_s = 0.0
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before retry number ``attempt + 1``; None when out of retries."""
+        if attempt >= self.max_retries:
+            return None
+        hinted = parse_retry_after(retry_after)
+        if hinted is not None:
+            wait = min(hinted, self.max_delay)
+        else:
+            wait = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        self.retries += 1
+        self.retry_wait_s += wait
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {"retries": self.retries, "retry_wait_s": round(self.retry_wait_s, 3)}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and rejects calls for ``cooldown`` seconds.
+
+    After the cooldown one trial call is let through (half-open); its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.opens = 0
+        self.short_circuited = 0
+        self._open_total = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self._clock() - self._opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            self._open_total += self._clock() - self._opened_at
+        self.state = "closed"
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed (e.g. cancelled) without judging Retell.
+
+        Frees the half-open trial slot so the next call can probe again.
+        """
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+            if self.state == "half_open":
+                self._open_total += self._clock() - self._opened_at
+            self.state = "open"
+            self._opened_at = self._clock()
+            self._trial_in_flight = False
+            self.opens += 1
+
+    def stats(self) -> Dict[str, Any]:
+        open_s = self._open_total
+        if self.state != "closed":
+            open_s += self._clock() - self._opened_at
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opens": self.opens,
+            "short_circuited": self.short_circuited,
+            "open_seconds": round(open_s, 3),
+        }
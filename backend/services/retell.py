@@ -1,451 +1,232 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import httpx
+from fastapi import Request
 from typing import Any, Dict, List, Optional
+from services.cache import AsyncTTLCache
+from services.metrics import RETELL_REQUEST_SECONDS
+from services.resilience import CircuitBreaker, RetryPolicy
 from settings import settings
 
 
+# Safe to repeat after a server error or timeout
+IDEMPOTENT_METHODS = {"GET", "PATCH", "PUT", "DELETE"}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def create_retell_client() -> httpx.AsyncClient:
+    """Build the shared, pooled HTTP client used for every Retell API call.
+
+    Owned by the app lifespan (see ``main.create_app``) so connections and TLS
+    sessions to api.retellai.com are reused across requests.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.retell_max_connections,
+        max_keepalive_connections=settings.retell_max_keepalive_connections,
+        keepalive_expiry=settings.retell_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.retell_base_url,
+        headers={"Authorization": f"Bearer {settings.retell_api_key}"},
+        http2=settings.retell_http2,
+        limits=limits,
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+
+
+def create_retell_cache() -> AsyncTTLCache:
+    """Process-wide cache for agent and conversation-flow lookups."""
+    return AsyncTTLCache(
+        max_entries=settings.retell_cache_max_entries,
+        ttl=settings.retell_cache_ttl_seconds,
+        stale_ttl=settings.retell_cache_stale_seconds,
+    )
+
+
+def create_retell_retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_retries=settings.retell_max_retries,
+        base_delay=settings.retell_backoff_base_seconds,
+        max_delay=settings.retell_backoff_max_seconds,
+    )
+
+
+def create_retell_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        threshold=settings.retell_breaker_threshold,
+        cooldown=settings.retell_breaker_cooldown_seconds,
+    )
+
+
+def get_retell_service(request: Request) -> "RetellService":
+    """FastAPI dependency returning a RetellService bound to the app's shared client, cache and breaker."""
+    state = request.app.state
+    return RetellService(state.retell_client, state.retell_cache, state.retell_retry, state.retell_breaker)
+
+
 class RetellService:
-    def __init__(self) -> None:
-        self.api_key = settings.retell_api_key
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: Optional[AsyncTTLCache] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.client = client
+        self.cache = cache
+        self.retry = retry
+        self.breaker = breaker
         # NOTE: adjust base URL and payloads to match your Retell account/version
-        self.base_url = "https://api.retellai.com"
+        self.base_url = settings.retell_base_url
+
+    async def _request(
+        self,
+        op: str,
+        method: str,
+        path: str,
+        *,
+        json: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 30,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            data = await self._send(
+                op, method, path, json=json, content=content, headers=headers, params=params, timeout=timeout
+            )
+            outcome = "ok"
+            return data
+        finally:
+            RETELL_REQUEST_SECONDS.observe(time.perf_counter() - started, op, outcome)
+
+    async def _send(
+        self,
+        op: str,
+        method: str,
+        path: str,
+        *,
+        json: Optional[Dict[str, Any]],
+        content: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, Any]],
+        timeout: float,
+    ) -> Dict[str, Any]:
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                raise RuntimeError(f"Retell API error ({op}): circuit open, Retell is unavailable")
+            retry_after: Optional[str] = None
+            try:
+                resp = await self.client.request(
+                    method, path, json=json, content=content, headers=headers, params=params, timeout=timeout
+                )
+            except httpx.TransportError as exc:
+                self._record(healthy=False)
+                # A request that never connected can be retried whatever the method
+                retryable = idempotent or isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+                error = f"Retell API error ({op}): {exc}"
+            except asyncio.CancelledError:
+                # Caller gave up (deadline, client disconnect): says nothing about Retell,
+                # but a half-open trial must not stay in flight forever
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+            except BaseException:
+                self._record(healthy=False)
+                raise
+            else:
+                if resp.status_code < 400:
+                    self._record(healthy=True)
+                    return resp.json() or {}
+                # 429 is Retell throttling us, not Retell failing
+                self._record(healthy=resp.status_code < 500)
+                retryable = resp.status_code == 429 or (resp.status_code in RETRYABLE_STATUS and idempotent)
+                retry_after = resp.headers.get("Retry-After")
+                error = f"Retell API error ({op}): {resp.text}"
+            wait = self.retry.delay(attempt, retry_after) if retryable and self.retry is not None else None
+            if wait is None:
+                raise RuntimeError(error)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    def _record(self, healthy: bool) -> None:
+        if self.breaker is None:
+            return
+        if healthy:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
 
     # -----------------------
     # Agent CRUD (proxy layer)
     # -----------------------
-    def create_conversation_flow(self) -> Dict[str, Any]:
-        # Default conversation flow payload per user's provided structure
-        DEFAULT_CONVERSATION_FLOW: Dict[str, Any] = {
-            "global_prompt": (
-                "You're a agent that works for a logistc company, your are responsible to get information about the freight. You're talking direclty with the driver. \n\n"
-                "If in the middle of the call, you think that the driver is having a emergency, you need to start the emergency workflow. \n\n"
-                "Be straight forward, do not reapeat yourself. \n\n"
-            ),
-            "nodes": [
-                {
-                    "instruction": {
-                        "type": "prompt",
-                        "text": "Hi {{driver_name}}, this is Dispatch with a check call on {{load_id}}. Can you give me an update on your status?",
-                    },
-                    "name": "Initial conversation",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756493598335",
-                            "id": "edge-1",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "Driver giving updates",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756749779214",
-                            "id": "edge-2",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "User is having a emergency",
-                            },
-                        },
-                    ],
-                    "start_speaker": "agent",
-                    "id": "start-node-1756490316826",
-                    "type": "conversation",
-                    "display_position": {"x": -502.77475501179913, "y": -227.1994206418928},
-                },
-                {
-                    "variables": [
-                        {
-                            "name": "driver_status",
-                            "description": "The driver load status",
-                            "type": "enum",
-                            "choices": ["Driving", "Delayed", "Arrived", "Unloading"],
-                        }
-                    ],
-                    "name": "Extract driver status variables",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756749542963",
-                            "id": "edge-1756493773848",
-                            "transition_condition": {
-                                "type": "equation",
-                                "equations": [
-                                    {"left": "{{driver_status}}", "operator": "==", "right": "Driving"}
-                                ],
-                                "operator": "||",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756749542963",
-                            "id": "edge-1756493809766",
-                            "transition_condition": {
-                                "type": "equation",
-                                "equations": [
-                                    {"left": "{{driver_status}}", "operator": "==", "right": "Delayed"}
-                                ],
-                                "operator": "||",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756752580723",
-                            "id": "edge-1756493843463",
-                            "transition_condition": {
-                                "type": "equation",
-                                "equations": [
-                                    {"left": "{{driver_status}}", "operator": "==", "right": "Arrived"}
-                                ],
-                                "operator": "||",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756749659424",
-                            "id": "edge-1756493862121",
-                            "transition_condition": {
-                                "type": "equation",
-                                "equations": [
-                                    {"left": "{{driver_status}}", "operator": "==", "right": "Unloading"}
-                                ],
-                                "operator": "||",
-                            },
-                        },
-                    ],
-                    "global_node_setting": {"condition": "Driver giving updates about the freight"},
-                    "id": "node-1756493598335",
-                    "type": "extract_dynamic_variables",
-                    "display_position": {"x": -146.0150433193853, "y": -609.6092810266174},
-                },
-                {
-                    "name": "Extract Variables",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756752580723",
-                            "id": "edge-1756494089139",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "user prided current_location and eta",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756749609293",
-                            "id": "edge-1756752517954",
-                            "transition_condition": {
-                                "type": "equation",
-                                "equations": [
-                                    {"left": "{{driver_status}}", "operator": "==", "right": "Delayed"}
-                                ],
-                                "operator": "||",
-                            },
-                        },
-                    ],
-                    "variables": [
-                        {
-                            "name": "current_location",
-                            "description": "Driver current location\n\ne.g., I-10 near Indio, CA",
-                            "type": "string",
-                            "choices": [],
-                        },
-                        {
-                            "name": "eta",
-                            "description": "e.g. Tomorrow, 8:00 AM",
-                            "type": "string",
-                            "choices": [],
-                        },
-                    ],
-                    "id": "node-1756494089139",
-                    "type": "extract_dynamic_variables",
-                    "display_position": {"x": 893.3277290971405, "y": -1035.5988646123815},
-                },
-                {
-                    "name": "Extract Variables",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756752580723",
-                            "id": "edge-1756752270279",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "Customer provided delay reason",
-                            },
-                        }
-                    ],
-                    "variables": [
-                        {
-                            "name": "delay_reason",
-                            "description": 'e.g. "Heavy Traffic", "Weather", "None"',
-                            "type": "string",
-                            "choices": [],
-                        }
-                    ],
-                    "id": "node-1756494231971",
-                    "type": "extract_dynamic_variables",
-                    "display_position": {"x": 1692.2857864244932, "y": -1117.7001579416606},
-                },
-                {
-                    "name": "Extract Variables",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756752580723",
-                            "id": "edge-1756494294446",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "Driver provided unload_status",
-                            },
-                        }
-                    ],
-                    "variables": [
-                        {
-                            "name": "unloading_status",
-                            "description": 'e.g. "In Door 42", "Waiting for Lumper", "Detention", "N/A"',
-                            "type": "string",
-                            "choices": [],
-                        }
-                    ],
-                    "id": "node-1756494294446",
-                    "type": "extract_dynamic_variables",
-                    "display_position": {"x": 1010.2562410163664, "y": 93.1925656530067},
-                },
-                {
-                    "name": "Emergency",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756749779214",
-                            "id": "edge-1756749013281",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "some information is missing ",
-                            },
-                        },
-                        {
-                            "destination_node_id": "node-1756753055335",
-                            "id": "edge-1756753045501",
-                            "transition_condition": {
-                                "type": "prompt",
-                                "prompt": "you have all the need infomations",
-                            },
-                        },
-                    ],
-                    "variables": [
-                        {
-                            "name": "emergency_type",
-                            "description": "The type of the emergency",
-                            "type": "enum",
-                            "choices": ["Accident", "Breakdown", "Medical", "Other"],
-                        },
-                        {
-                            "name": "safety_status",
-                            "description": 'e.g. "Driver confirmed everyone is safe"',
-                            "type": "string",
-                            "choices": [],
-                        },
-                        {
-                            "name": "injury_status",
-                            "description": 'e.g. "No injuries reported"',
-                            "type": "string",
-                            "choices": [],
-                        },
-                        {
-                            "name": "emergency_location",
-                            "description": 'e.g. "I-15 North, Mile Marker 123"',
-                            "type": "string",
-                            "choices": [],
-                        },
-                        {
-                            "name": "load_secure",
-                            "description": "If the load suffered any damage",
-                            "type": "boolean",
-                            "choices": [],
-                        },
-                    ],
-                    "id": "node-1756749013281",
-                    "type": "extract_dynamic_variables",
-                    "display_position": {"x": -39.28033660955535, "y": 807.3522707881312},
-                },
-                {
-                    "name": "Conversation current location and eta",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756494089139",
-                            "id": "edge-1756749542963",
-                            "transition_condition": {"type": "prompt", "prompt": "Driver asnwered the question"},
-                        }
-                    ],
-                    "id": "node-1756749542963",
-                    "type": "conversation",
-                    "display_position": {"x": 405.98065428574614, "y": -943.9629980103422},
-                    "instruction": {"type": "prompt", "text": "Ask for driver his current location and eta"},
-                },
-                {
-                    "name": "Conversation delay reason",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756494231971",
-                            "id": "edge-1756749609293",
-                            "transition_condition": {"type": "prompt", "prompt": "Driver asnwered the question"},
-                        }
-                    ],
-                    "id": "node-1756749609293",
-                    "type": "conversation",
-                    "display_position": {"x": 1306.9586706460123, "y": -1307.6167726633148},
-                    "instruction": {"type": "prompt", "text": "Ask for the driver the delay reason"},
-                },
-                {
-                    "name": "Conversation unloading",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756494294446",
-                            "id": "edge-1756749659424",
-                            "transition_condition": {"type": "prompt", "prompt": "Driver asnwered the question"},
-                        }
-                    ],
-                    "id": "node-1756749659424",
-                    "type": "conversation",
-                    "display_position": {"x": 397.8154160735139, "y": -35.60579940636862},
-                    "instruction": {"type": "prompt", "text": "Ask for the unloading status"},
-                },
-                {
-                    "instruction": {
-                        "type": "prompt",
-                        "text": "You need to ask more information about the emergency, they are:\n\n\u25cb emergency_type: \"Accident\" OR \"Breakdown\" OR \"Medical\" OR \"Other\"\n\n\u25cb safety_status: (e.g., \"Driver confirmed everyone is safe\")\n\u25cb injury_status: (e.g., \"No injuries reported\")\n\n\u25cb emergency_location: (e.g., \"I-15 North, Mile Marker 123\")\n\n\u25cb load_secure: true OR false\n",
-                    },
-                    "name": "Emergency conversation",
-                    "edges": [
-                        {
-                            "destination_node_id": "node-1756749013281",
-                            "id": "edge-1756749779214",
-                            "transition_condition": {"type": "prompt", "prompt": "Driver asnwered the question"},
-                        }
-                    ],
-                    "global_node_setting": {"condition": "Describe the condition to jump to this node"},
-                    "id": "node-1756749779214",
-                    "type": "conversation",
-                    "display_position": {"x": -573.8284716436458, "y": 697.7689677130737},
-                },
-                {
-                    "name": "End Call",
-                    "id": "node-1756749960900",
-                    "type": "end",
-                    "display_position": {"x": 2323.8584914894664, "y": -268.16437243815346},
-                    "instruction": {"type": "prompt", "text": "Politely end the call"},
-                },
-                {
-                    "instruction": {"type": "prompt", "text": "Thanks the driver and end the call"},
-                    "name": "End call",
-                    "edges": [
-                        {
-                            "id": "edge-1756752580723",
-                            "transition_condition": {"type": "prompt", "prompt": "You've accred all the required information"},
-                        }
-                    ],
-                    "global_node_setting": {
-                        "condition": "Finished any of the worflows with the required informations. ",
-                    },
-                    "id": "node-1756752580723",
-                    "type": "conversation",
-                    "display_position": {"x": 1929.8715735174562, "y": -401.92331408843955},
-                    "skip_response_edge": {
-                        "destination_node_id": "node-1756749960900",
-                        "id": "edge-1756754045779",
-                        "transition_condition": {"type": "prompt", "prompt": "Skip response"},
-                    },
-                },
-                {
-                    "instruction": {
-                        "type": "prompt",
-                        "text": "says that the company is aware of the acedent and is taking providence ASAP.",
-                    },
-                    "name": "End emergency",
-                    "edges": [
-                        {
-                            "id": "edge-1756753123784",
-                            "transition_condition": {"type": "prompt", "prompt": "you got the needed infomation"},
-                        }
-                    ],
-                    "id": "node-1756753055335",
-                    "type": "conversation",
-                    "display_position": {"x": 439.3999111929545, "y": 891.4285714285714},
-                    "skip_response_edge": {
-                        "destination_node_id": "node-1756753103587",
-                        "id": "edge-1756753891823",
-                        "transition_condition": {"type": "prompt", "prompt": "Skip response"},
-                    },
-                },
-                {
-                    "name": "End Call",
-                    "id": "node-1756753103587",
-                    "type": "end",
-                    "display_position": {"x": 830.8947767495976, "y": 850.793920099856},
-                    "instruction": {"type": "prompt", "text": "Politely end the call"},
-                },
-            ],
-            "start_node_id": "start-node-1756490316826",
-            "start_speaker": "agent",
-            "model_choice": {"type": "cascading", "model": "gpt-4.1"},
-            "kb_config": {"top_k": 3, "filter_score": 0.6},
-            "begin_tag_display_position": {"x": -691.866559272706, "y": -190.50866183740442},
-            "is_published": False,
-        }
+    async def create_conversation_flow(self, payload: bytes) -> Dict[str, Any]:
+        """Create a flow from a pre-serialised payload (see ``services.flow_templates``)."""
+        return await self._request(
+            "create_conversation_flow",
+            "POST",
+            "/create-conversation-flow",
+            content=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=60,
+        )
 
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        endpoint = f"{self.base_url}/create-conversation-flow"
-        try:
-            resp = httpx.post(endpoint, json=DEFAULT_CONVERSATION_FLOW, headers=headers, timeout=60)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (create_conversation_flow): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (create_conversation_flow): {exc}")
-        return resp.json() or {}
+    async def _cached(self, key: tuple, loader) -> Dict[str, Any]:
+        if self.cache is None:
+            return await loader()
+        return await self.cache.get_or_load(key, loader)
 
-    def get_conversation_flow(self, conversation_flow_id: str, version: Optional[int] = None) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}"}
+    def _invalidate(self, kind: str, object_id: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(lambda k: k[0] == kind and k[1] == object_id)
+
+    async def get_conversation_flow(self, conversation_flow_id: str, version: Optional[int] = None) -> Dict[str, Any]:
         params: Dict[str, Any] = {}
         if version is not None:
             params["version"] = version
-        endpoint = f"{self.base_url}/get-conversation-flow/{conversation_flow_id}"
-        try:
-            resp = httpx.get(endpoint, headers=headers, params=params, timeout=30)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (get_conversation_flow): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (get_conversation_flow): {exc}")
-        return resp.json() or {}
+        return await self._cached(
+            ("flow", conversation_flow_id, version),
+            lambda: self._request(
+                "get_conversation_flow", "GET", f"/get-conversation-flow/{conversation_flow_id}", params=params
+            ),
+        )
 
-    def update_conversation_flow(self, conversation_flow_id: str, payload: Dict[str, Any], version: Optional[int] = None) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+    async def update_conversation_flow(self, conversation_flow_id: str, payload: Dict[str, Any], version: Optional[int] = None) -> Dict[str, Any]:
         params: Dict[str, Any] = {}
         if version is not None:
             params["version"] = version
-        endpoint = f"{self.base_url}/update-conversation-flow/{conversation_flow_id}"
         try:
-            resp = httpx.patch(endpoint, json=payload, headers=headers, params=params, timeout=60)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (update_conversation_flow): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (update_conversation_flow): {exc}")
-        return resp.json() or {}
+            return await self._request(
+                "update_conversation_flow",
+                "PATCH",
+                f"/update-conversation-flow/{conversation_flow_id}",
+                json=payload,
+                params=params,
+                timeout=60,
+            )
+        finally:
+            self._invalidate("flow", conversation_flow_id)
 
-    def create_agent(
+    async def create_agent(
         self,
         agent_name: Optional[str] = None,
         voice_id: Optional[str] = None,
         conversation_flow_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        endpoint = f"{self.base_url}/create-agent"
-
         webhook_url = f"{settings.backend_base_url}/api/webhook/retell"
 
-
         if not conversation_flow_id:
             raise RuntimeError("conversation_flow_id is required to create an agent with conversation-flow response engine")
         payload: Dict[str, Any] = {
             "response_engine": {
                 "type": "conversation-flow",
                 "conversation_flow_id": conversation_flow_id,
-                
             },
             "webhook_url": webhook_url,
         }
@@ -453,51 +234,30 @@ class RetellService:
             payload["agent_name"] = agent_name
         if voice_id:
             payload["voice_id"] = voice_id
-        try:
-            resp = httpx.post(endpoint, json=payload, headers=headers, timeout=60)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (create_agent): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (create_agent): {exc}")
-        return resp.json() or {}
+        return await self._request("create_agent", "POST", "/create-agent", json=payload, timeout=60)
 
-    def get_agent(self, agent_id: str) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        endpoint = f"{self.base_url}/get-agent/{agent_id}"
-        try:
-            resp = httpx.get(endpoint, headers=headers, timeout=30)
-            resp.raise_for_status()
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (get_agent): {exc}")
-        return resp.json() or {}
+    async def get_agent(self, agent_id: str, version: Optional[int] = None) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if version is not None:
+            params["version"] = version
+        return await self._cached(
+            ("agent", agent_id, version),
+            lambda: self._request("get_agent", "GET", f"/get-agent/{agent_id}", params=params),
+        )
 
-    def update_agent(self, agent_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        endpoint = f"{self.base_url}/update-agent/{agent_id}"
+    async def update_agent(self, agent_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            resp = httpx.patch(endpoint, json=payload, headers=headers, timeout=30)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            # Return API error details if provided
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (update_agent): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (update_agent): {exc}")
-        return resp.json() or {}
+            return await self._request("update_agent", "PATCH", f"/update-agent/{agent_id}", json=payload)
+        finally:
+            self._invalidate("agent", agent_id)
 
-    def start_outbound_call(
+    async def start_outbound_call(
         self,
         agent_id: str,
         driver_name: str,
         load_number: str,
         metadata: Dict[str, Any],
-    ) -> str:
-        # Webhook URL for Retell to send events
-   
-
-        # Retell Call (V2) create phone call requires from_number and to_number
+    ) -> Dict[str, Any]:
         payload = {
             "agent_id": agent_id,
             "metadata": metadata,
@@ -506,34 +266,13 @@ class RetellService:
                 "load_id": load_number,
             }
         }
-
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        endpoint = f"{self.base_url}/v2/create-web-call"
-        try:
-            resp = httpx.post(endpoint, json=payload, headers=headers, timeout=30)
-            resp.raise_for_status()
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error: {exc}")
-
-        data = resp.json()
+        data = await self._request("start_outbound_call", "POST", "/v2/create-web-call", json=payload)
         # Expect the response to include a call id
         return {"call_id": data.get("call_id"), "access_token": data.get("access_token")}
 
-    def get_call(self, call_id: str) -> Dict[str, Any]:
+    async def get_call(self, call_id: str) -> Dict[str, Any]:
         """Retrieve call details from Retell v2 Get Call.
 
         Docs: https://docs.retellai.com/api-references/get-call
         """
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        endpoint = f"{self.base_url}/v2/get-call/{call_id}"
-        try:
-            resp = httpx.get(endpoint, headers=headers, timeout=30)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as http_err:
-            detail = http_err.response.text if http_err.response is not None else str(http_err)
-            raise RuntimeError(f"Retell API error (get_call): {detail}")
-        except Exception as exc:
-            raise RuntimeError(f"Retell API error (get_call): {exc}")
-        return resp.json() or {}
-
-
+        return await self._request("get_call", "GET", f"/v2/get-call/{call_id}")
@@ -0,0 +1,416 @@
+"""Recurring check calls per load, owned by the backend.
+
+Schedules live in ``call_schedules``; the active ones are loaded once at
+startup into a min-heap keyed on ``next_run_at`` and a single task sleeps until
+the earliest one is due (or until a schedule is added or changed), so nothing
+polls the database. A run:
+
+1. stops the schedule if ``max_calls`` is reached or the previous call's
+   ``driver_status`` is in ``stop_on_driver_status`` (e.g. Arrived), and skips
+   the slot while the previous call is still in progress;
+2. moves ``next_run_at`` forward by whole intervals and records the attempt
+   (``last_call_id``) with one conditional UPDATE (the claim), so a crash after
+   it skips a call rather than placing it twice, and a second instance loses
+   the claim instead of dialling the driver again;
+3. inserts a ``calls`` row and creates the Retell call (``dispatch_call``),
+   under a concurrency cap and the shared Retell call rate limiter, and counts
+   it in ``calls_made`` once it was placed.
+
+A failed run is retried after ``retry_seconds`` without moving the cadence:
+slots stay anchored on the stored ``next_run_at``.
+
+Time comes from ``clock`` (epoch seconds). With a fake clock, drive the
+scheduler with ``run_due()`` instead of ``start()``; see ``bench/bench_scheduler.py``.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from supabase import AsyncClient
+from services.broker import CallEventBroker, call_event
+from services.call_start import CallStartRejected, dispatch_call, new_call_row, resolve_agent
+from services.logs import log_context
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULES_TABLE = "call_schedules"
+CALLS_TABLE = "calls"
+# Previous call still running: skip this run rather than ring the driver twice
+BUSY_STATUSES = ("in_progress",)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _ts(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+@dataclass
+class Schedule:
+    id: str
+    agent_config_id: str
+    driver_name: str
+    load_number: str
+    interval_seconds: int
+    next_run_at: float
+    # ``next_run_at`` exactly as stored; the claim UPDATE matches on it
+    stored_next_run_at: str
+    stop_on_driver_status: List[str] = field(default_factory=lambda: ["Arrived"])
+    max_calls: Optional[int] = None
+    calls_made: int = 0
+    last_call_id: Optional[str] = None
+    status: str = "active"
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Schedule":
+        return cls(
+            id=row["id"],
+            agent_config_id=row["agent_config_id"],
+            driver_name=row["driver_name"],
+            load_number=row["load_number"],
+            interval_seconds=int(row["interval_seconds"]),
+            next_run_at=_ts(row["next_run_at"]),
+            stored_next_run_at=row["next_run_at"],
+            stop_on_driver_status=list(row.get("stop_on_driver_status") or []),
+            max_calls=row.get("max_calls"),
+            calls_made=int(row.get("calls_made") or 0),
+            last_call_id=row.get("last_call_id"),
+            status=row.get("status") or "active",
+        )
+
+
+def new_schedule_row(
+    agent_config_id: str,
+    driver_name: str,
+    load_number: str,
+    interval_seconds: int,
+    first_run_at: float,
+    stop_on_driver_status: List[str],
+    max_calls: Optional[int],
+) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "agent_config_id": agent_config_id,
+        "driver_name": driver_name,
+        "load_number": load_number,
+        "interval_seconds": interval_seconds,
+        "next_run_at": _iso(first_run_at),
+        "stop_on_driver_status": stop_on_driver_status,
+        "max_calls": max_calls,
+        "calls_made": 0,
+        "status": "active",
+    }
+
+
+class CallScheduler:
+    def __init__(
+        self,
+        sb: AsyncClient,
+        service: RetellService,
+        limiter: AsyncRateLimiter,
+        concurrency: int,
+        retry_seconds: float,
+        broker: Optional[CallEventBroker] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.sb = sb
+        self.service = service
+        self.limiter = limiter
+        self.retry_seconds = retry_seconds
+        self.broker = broker
+        self.clock = clock
+        self._sem = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self._schedules: Dict[str, Schedule] = {}
+        # (due, seq, schedule id); entries whose due no longer matches are stale
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self.loaded = False
+        self.fired = 0
+        self.skipped = 0
+        self.failures = 0
+        self.lost_claims = 0
+        self.stopped = 0
+
+    # -----------------------
+    # Heap bookkeeping
+    # -----------------------
+    def _push(self, schedule: Schedule) -> None:
+        heapq.heappush(self._heap, (schedule.next_run_at, next(self._seq), schedule.id))
+
+    def track(self, schedule: Schedule) -> None:
+        """Add or replace a schedule in memory (after it was written to the table)."""
+        if schedule.status != "active":
+            self._schedules.pop(schedule.id, None)
+        else:
+            self._schedules[schedule.id] = schedule
+            self._push(schedule)
+        self._wake.set()
+
+    def _pop_due(self, now: float) -> List[Schedule]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            at, _, schedule_id = heapq.heappop(self._heap)
+            schedule = self._schedules.get(schedule_id)
+            if schedule is None or schedule.next_run_at != at:
+                continue
+            # Out of the map while running; _fire puts it back
+            del self._schedules[schedule_id]
+            due.append(schedule)
+        if len(self._heap) > 2 * len(self._schedules) + 64:
+            # Mostly stale entries (paused/edited schedules): rebuild
+            self._heap = [e for e in self._heap if (s := self._schedules.get(e[2])) is not None and s.next_run_at == e[0]]
+            heapq.heapify(self._heap)
+        return due
+
+    def next_due(self) -> Optional[float]:
+        while self._heap:
+            at, _, schedule_id = self._heap[0]
+            schedule = self._schedules.get(schedule_id)
+            if schedule is not None and schedule.next_run_at == at:
+                return at
+            heapq.heappop(self._heap)
+        return None
+
+    # -----------------------
+    # Loading and the timer loop
+    # -----------------------
+    async def load(self) -> int:
+        """Read every active schedule into the heap (paged like other bulk reads)."""
+        start, page = 0, 1000
+        while True:
+            resp = await (
+                self.sb.table(SCHEDULES_TABLE)
+                .select("*")
+                .eq("status", "active")
+                .order("next_run_at")
+                .order("id")
+                .range(start, start + page - 1)
+                .execute()
+            )
+            rows = resp.data or []
+            for row in rows:
+                self.track(Schedule.from_row(row))
+            if len(rows) < page:
+                break
+            start += page
+        self.loaded = True
+        return len(self._schedules)
+
+    async def run_due(self) -> int:
+        """Fire every schedule due at ``clock()`` and wait for them; returns how many ran."""
+        due = self._pop_due(self.clock())
+        await asyncio.gather(*(self._fire(s) for s in due))
+        return len(due)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="call-scheduler")
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+
+    async def _run(self) -> None:
+        while not self.loaded:
+            try:
+                count = await self.load()
+                logger.info("schedules loaded", extra={"schedules": count})
+            except Exception:
+                logger.warning("could not load schedules, retrying", exc_info=True)
+                await asyncio.sleep(5)
+        while True:
+            self._wake.clear()
+            due_at = self.next_due()
+            delay = None if due_at is None else due_at - self.clock()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except TimeoutError:
+                    pass
+                continue
+            for schedule in self._pop_due(self.clock()):
+                task = asyncio.create_task(self._fire(schedule))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    # -----------------------
+    # One run
+    # -----------------------
+    def _following(self, schedule: Schedule, now: float) -> float:
+        # First slot after now on the stored cadence; slots missed while down are
+        # skipped. A retry (now before the stored slot) keeps the stored slot.
+        anchor = _ts(schedule.stored_next_run_at)
+        slots = max(0, math.floor((now - anchor) / schedule.interval_seconds) + 1)
+        return anchor + slots * schedule.interval_seconds
+
+    async def _save(self, schedule: Schedule, patch: Dict[str, Any], claim: bool = False) -> Optional[Dict[str, Any]]:
+        """Update the row; returns it as stored, or None when nothing matched."""
+        query = self.sb.table(SCHEDULES_TABLE).update(patch).eq("id", schedule.id)
+        if claim:
+            # An interval changed meanwhile also loses: the next slot depends on it
+            query = (
+                query.eq("status", "active")
+                .eq("next_run_at", schedule.stored_next_run_at)
+                .eq("interval_seconds", schedule.interval_seconds)
+            )
+        resp = await query.execute()
+        return resp.data[0] if resp.data else None
+
+    async def _stop(self, schedule: Schedule, reason: str) -> None:
+        self.stopped += 1
+        schedule.status = "stopped"
+        await self._save(schedule, {"status": "stopped", "stop_reason": reason})
+        logger.info("schedule stopped", extra={"schedule_id": schedule.id, "reason": reason})
+
+    async def _previous_call(self, schedule: Schedule) -> Optional[Dict[str, Any]]:
+        if not schedule.last_call_id:
+            return None
+        resp = await (
+            self.sb.table(CALLS_TABLE).select("status, driver_status").eq("id", schedule.last_call_id).limit(1).execute()
+        )
+        return resp.data[0] if resp.data else None
+
+    async def _reload(self, schedule_id: str) -> Optional[Schedule]:
+        resp = await self.sb.table(SCHEDULES_TABLE).select("*").eq("id", schedule_id).limit(1).execute()
+        return Schedule.from_row(resp.data[0]) if resp.data else None
+
+    async def _fire(self, schedule: Schedule) -> None:
+        try:
+            await self._fire_once(schedule)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failures += 1
+            logger.warning("scheduled call failed", extra={"schedule_id": schedule.id}, exc_info=True)
+            await self._retry(schedule)
+
+    async def _retry(self, schedule: Schedule) -> None:
+        """Try again sooner than a full interval (the claim still guards against doubles).
+
+        Starts from the stored row, so an API change made while the run was in
+        flight is kept; a schedule re-timed meanwhile keeps its new time.
+        """
+        try:
+            current = await self._reload(schedule.id)
+        except Exception:
+            logger.warning("could not reload schedule", extra={"schedule_id": schedule.id}, exc_info=True)
+            current = schedule
+        if current is None:
+            return
+        if current.stored_next_run_at == schedule.stored_next_run_at:
+            current.next_run_at = self.clock() + min(self.retry_seconds, current.interval_seconds)
+        self.track(current)
+
+    async def _claim(self, schedule: Schedule, patch: Dict[str, Any]) -> Optional[Schedule]:
+        """Advance ``next_run_at`` (plus ``patch``) only if nobody changed the schedule since it was read.
+
+        Returns the schedule as stored by the claim, so changes made through the
+        API before it are not overwritten by the copy this run started from.
+        """
+        following_iso = _iso(self._following(schedule, self.clock()))
+        row = await self._save(schedule, {"next_run_at": following_iso, **patch}, claim=True)
+        if row is not None:
+            claimed = Schedule.from_row(row)
+            schedule.next_run_at, schedule.stored_next_run_at = claimed.next_run_at, claimed.stored_next_run_at
+            return claimed
+        # Paused, stopped, edited or already run elsewhere: reload its current state
+        self.lost_claims += 1
+        current = await self._reload(schedule.id)
+        if current is not None:
+            self.track(current)
+        return None
+
+    async def _fire_once(self, schedule: Schedule) -> None:
+        if schedule.max_calls is not None and schedule.calls_made >= schedule.max_calls:
+            await self._stop(schedule, "max_calls")
+            return
+        previous = await self._previous_call(schedule)
+        if previous and previous.get("driver_status") in schedule.stop_on_driver_status:
+            await self._stop(schedule, f"driver_status {previous['driver_status']}")
+            return
+        if previous and previous.get("status") in BUSY_STATUSES:
+            self.skipped += 1
+            claimed = await self._claim(schedule, {})
+            if claimed is not None:
+                self.track(claimed)
+            return
+
+        async with self._sem:
+            try:
+                agent_id = await resolve_agent(self.sb, self.service, schedule.agent_config_id)
+            except CallStartRejected as exc:
+                await self._stop(schedule, str(exc))
+                return
+            row = new_call_row(schedule.driver_name, schedule.load_number, schedule.agent_config_id)
+            row["schedule_id"] = schedule.id
+            # The row id is known up front, so the claim records the attempt too
+            claimed = await self._claim(schedule, {"last_call_id": row["id"]})
+            if claimed is None:
+                return
+            self.track(claimed)
+            with log_context(call_id=row["id"]):
+                await self.sb.table(CALLS_TABLE).insert(row).execute()
+                await self.limiter.acquire()
+                try:
+                    await dispatch_call(self.sb, self.service, row, agent_id)
+                finally:
+                    if self.broker is not None:
+                        self.broker.publish(call_event(row))
+                await self._count_call(claimed)
+        self.fired += 1
+
+    async def _count_call(self, schedule: Schedule) -> None:
+        # Only placed calls count towards max_calls; the call exists, so a failed
+        # write is logged rather than retried (that would ring the driver again)
+        calls_made = schedule.calls_made + 1
+        try:
+            await self._save(schedule, {"calls_made": calls_made})
+        except Exception:
+            logger.warning("could not record placed call", extra={"schedule_id": schedule.id}, exc_info=True)
+            return
+        current = self._schedules.get(schedule.id)
+        for s in (schedule, current):
+            if s is not None:
+                s.calls_made = max(s.calls_made, calls_made)
+
+    def stats(self) -> Dict[str, Any]:
+        due_at = self.next_due()
+        return {
+            "loaded": self.loaded,
+            "active": len(self._schedules),
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "next_due_at": _iso(due_at) if due_at is not None else None,
+            "fired": self.fired,
+            "skipped_busy": self.skipped,
+            "failed": self.failures,
+            "lost_claims": self.lost_claims,
+            "stopped": self.stopped,
+        }
+
+
+def get_scheduler(request: Request) -> CallScheduler:
+    """FastAPI dependency returning the app's call scheduler."""
+    return request.app.state.call_scheduler
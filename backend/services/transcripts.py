@@ -0,0 +1,113 @@
+"""Transcript storage in ``call_utterances`` (one row per utterance).
+
+Rows are keyed on (call_id, seq) and appended by the ``append_call_utterances``
+RPC from webhook ingestion. Readers load utterances only when they need them:
+the call detail endpoint, range queries, summary refresh, backfill and export.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from supabase import AsyncClient
+
+
+UTTERANCES_TABLE = "call_utterances"
+UTTERANCE_COLUMNS = "seq, role, text, start_ms, end_ms"
+# Stay under PostgREST's default max-rows when loading many calls at once
+PAGE_SIZE = 1000
+# Call ids per in.(...) filter; 100 uuids keep the query string under ~4 KB,
+# which gateways in front of PostgREST accept (500 ids hit 414)
+ID_CHUNK = 100
+
+
+def _ms(seconds: Any) -> Optional[int]:
+    return int(round(seconds * 1000)) if isinstance(seconds, (int, float)) else None
+
+
+def utterances_from_retell(transcript_object: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Retell ``transcript_object`` items as utterance rows; times come from the word timings."""
+    out = []
+    for t in transcript_object or []:
+        words = t.get("words") or []
+        out.append({
+            "role": t.get("role"),
+            "text": t.get("content"),
+            "start_ms": _ms(words[0].get("start")) if words else None,
+            "end_ms": _ms(words[-1].get("end")) if words else None,
+        })
+    return out
+
+
+async def load_transcript(sb: AsyncClient, call_id: str, after_seq: int = -1) -> List[Dict[str, Any]]:
+    """Utterances of one call after ``after_seq``, paged on seq so max-rows never truncates it."""
+    out: List[Dict[str, Any]] = []
+    while True:
+        resp = await (
+            sb.table(UTTERANCES_TABLE)
+            .select(UTTERANCE_COLUMNS)
+            .eq("call_id", call_id)
+            .gt("seq", after_seq)
+            .order("seq")
+            .limit(PAGE_SIZE)
+            .execute()
+        )
+        rows = resp.data or []
+        out.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            return out
+        after_seq = rows[-1]["seq"]
+
+
+async def load_transcripts(sb: AsyncClient, call_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Transcripts for many calls with as few queries as the row count allows.
+
+    Ids go out ``ID_CHUNK`` at a time, ordered by (call_id, seq). When a page
+    fills up, the call it ends in is finished with ``load_transcript`` and the
+    chunk continues after that id, so no page is read with an OFFSET.
+    """
+    out: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for i in range(0, len(call_ids), ID_CHUNK):
+        pending = sorted(set(call_ids[i:i + ID_CHUNK]))
+        while pending:
+            resp = await (
+                sb.table(UTTERANCES_TABLE)
+                .select("call_id, " + UTTERANCE_COLUMNS)
+                .in_("call_id", pending)
+                .order("call_id")
+                .order("seq")
+                .limit(PAGE_SIZE)
+                .execute()
+            )
+            rows = resp.data or []
+            last_id = rows[-1]["call_id"] if rows else None
+            for r in rows:
+                out[r.pop("call_id")].append(r)
+            if len(rows) < PAGE_SIZE:
+                break
+            out[last_id].extend(await load_transcript(sb, last_id, rows[-1]["seq"]))
+            pending = [c for c in pending if c > last_id]
+    return out
+
+
+async def query_utterances(
+    sb: AsyncClient,
+    call_id: str,
+    from_seq: Optional[int] = None,
+    to_seq: Optional[int] = None,
+    from_ms: Optional[int] = None,
+    to_ms: Optional[int] = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """Utterances of one call within a seq range and/or a time window (ms from call start)."""
+    query = sb.table(UTTERANCES_TABLE).select(UTTERANCE_COLUMNS).eq("call_id", call_id)
+    if from_seq is not None:
+        query = query.gte("seq", from_seq)
+    if to_seq is not None:
+        query = query.lt("seq", to_seq)
+    if from_ms is not None:
+        query = query.gte("end_ms", from_ms)
+    if to_ms is not None:
+        query = query.lt("start_ms", to_ms)
+    resp = await query.order("seq").limit(limit).execute()
+    return resp.data or []
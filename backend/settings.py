@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -15,5 +15,73 @@ class Settings(BaseSettings):
     # Optional integrations
     openai_api_key: Optional[str] 
 
+    # Pooled HTTP client used for Retell API calls
+    retell_base_url: str = "https://api.retellai.com"
+    retell_http2: bool = True
+    retell_max_connections: int = 100
+    retell_max_keepalive_connections: int = 20
+    retell_keepalive_expiry: float = 30.0
+
+    # Outbound call campaigns: Retell call-creation rate limit and fan-out
+    retell_calls_per_second: float = 5.0
+    retell_calls_burst: int = 5
+    campaign_concurrency: int = 10
+
+    # Single call starts: overall deadline, and workers for ?background=true starts
+    call_start_deadline_seconds: float = 15.0
+    call_dispatch_workers: int = 4
+    call_dispatch_queue_size: int = 500
+
+    # Recurring check-call schedules (/api/schedules)
+    scheduler_enabled: bool = True
+    scheduler_concurrency: int = 5
+    # Delay before retrying a scheduled call that failed (capped at its interval)
+    scheduler_retry_seconds: float = 300.0
+
+    # Retries and circuit breaker around Retell API calls
+    retell_max_retries: int = 3
+    retell_backoff_base_seconds: float = 0.25
+    retell_backoff_max_seconds: float = 8.0
+    retell_breaker_threshold: int = 5
+    retell_breaker_cooldown_seconds: float = 30.0
+
+    # Cache for Retell agent / conversation-flow lookups
+    retell_cache_ttl_seconds: float = 300.0
+    retell_cache_stale_seconds: float = 3600.0
+    retell_cache_max_entries: int = 1024
+
+    # Background ingestion of Retell webhooks ("memory" or "sqlite")
+    webhook_queue_backend: str = "memory"
+    webhook_queue_maxsize: int = 1000
+    webhook_queue_path: str = "webhook_queue.sqlite3"
+    webhook_workers: int = 4
+    webhook_dedup_max_entries: int = 10000
+    webhook_dedup_ttl_seconds: float = 86400.0
+    webhook_transcript_cursor_entries: int = 10000
+
+    # Prometheus-style metrics on GET /metrics
+    metrics_enabled: bool = True
+
+    # Structured logging (formatted and written on a background thread)
+    log_level: str = "INFO"
+    log_format: str = "json"  # or "text"
+    # Fraction of webhook/event payloads dumped at DEBUG
+    log_payload_sample_rate: float = 0.0
+
+    # Server-Sent Events stream of call updates
+    call_events_queue_size: int = 100
+    call_events_history: int = 500
+    call_events_heartbeat_seconds: float = 15.0
+
+    # Summary backfill jobs started through the API
+    backfill_checkpoint_path: str = "backfill_checkpoint.json"
+    # Finished backfill jobs and campaigns kept in memory for status lookups
+    jobs_retained: int = 50
+
+    # Retell custom-LLM WebSocket driven by services.dialog
+    dialog_greeting_template: str = "Hi {driver_name}, this is Dispatch with a check call on load {load_number}. Can you give me a quick update?"
+    dialog_emergency_triggers: List[str] = ["emergency", "accident", "crash", "blowout", "injured", "medical", "911", "fire"]
+    llm_latency_samples: int = 2048
+
 settings = Settings()
 
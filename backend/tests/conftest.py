@@ -0,0 +1,107 @@
+"""Shared fixtures: the app running against the in-memory Retell and PostgREST
+stand-ins from ``bench.fakes`` (no network, no real database).
+
+Settings are read once at import, so the fakes' ports are picked and exported
+before anything imports ``settings``.
+"""
+import os
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from bench import fakes
+from bench.load_test import KEY, _free_port
+
+RETELL_PORT, POSTGREST_PORT = _free_port(), _free_port()
+os.environ.update({
+    "SUPABASE_URL": f"http://127.0.0.1:{POSTGREST_PORT}",
+    "SUPABASE_SERVICE_ROLE_KEY": KEY,
+    "RETELL_API_KEY": "test",
+    "RETELL_BASE_URL": f"http://127.0.0.1:{RETELL_PORT}",
+    "RETELL_HTTP2": "false",
+    "OPENAI_API_KEY": "",
+    "LOG_LEVEL": "WARNING",
+    "WEBHOOK_QUEUE_BACKEND": "memory",
+    "SCHEDULER_ENABLED": "false",
+    "RETELL_CALLS_PER_SECOND": "1000000",
+})
+
+AGENT_CONFIG_ID = "00000000-0000-0000-0000-00000000a9e7"
+AGENT_ID = "agent_test"
+
+
+class FakeServers:
+    def __init__(self) -> None:
+        self.store = fakes.PostgrestStore()
+        self._servers = [
+            uvicorn.Server(uvicorn.Config(fakes.retell_app(fakes.Latency()), port=RETELL_PORT, log_level="warning")),
+            uvicorn.Server(uvicorn.Config(fakes.postgrest_app(fakes.Latency(), self.store), port=POSTGREST_PORT, log_level="warning")),
+        ]
+        self._threads = [threading.Thread(target=s.run, daemon=True) for s in self._servers]
+
+    def start(self) -> None:
+        for t in self._threads:
+            t.start()
+        deadline = time.monotonic() + 10
+        while not all(s.started for s in self._servers):
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake servers did not start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        for s in self._servers:
+            s.should_exit = True
+        for t in self._threads:
+            t.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def fake_servers():
+    servers = FakeServers()
+    servers.start()
+    yield servers
+    servers.stop()
+
+
+@pytest.fixture
+def store(fake_servers):
+    """Empty fake database holding one agent config and ten seeded calls."""
+    fake_servers.store.tables.clear()
+    fakes.seed(fake_servers.store, AGENT_CONFIG_ID, AGENT_ID, 10)
+    return fake_servers.store
+
+
+@pytest.fixture
+def agent_config_id() -> str:
+    return AGENT_CONFIG_ID
+
+
+@pytest.fixture
+def postgrest(fake_servers):
+    """Client for the fake PostgREST's ``/__stats`` and ``/__reset``."""
+    import httpx
+
+    with httpx.Client(base_url=os.environ["SUPABASE_URL"]) as client:
+        client.post("/__reset")
+        yield client
+
+
+@pytest.fixture
+async def sb(fake_servers):
+    """Async Supabase client against the fake PostgREST, as the app's services use it."""
+    from supabase import acreate_client
+
+    client = await acreate_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    yield client
+    await client.postgrest.session.aclose()
+
+
+@pytest.fixture
+def app_client(store):
+    from fastapi.testclient import TestClient
+    from main import create_app
+
+    with TestClient(create_app()) as client:
+        yield client
@@ -0,0 +1,49 @@
+"""Concurrent misses share one load that no single caller can cancel."""
+import asyncio
+
+import pytest
+
+from services.cache import AsyncTTLCache
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    cache = AsyncTTLCache(10, ttl=60)
+    release = asyncio.Event()
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return "agent_1"
+
+    leader = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "agent_1"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert loads == 1
+    # The load finished despite the cancellation, so the value is cached
+    assert await cache.get_or_load("k", loader) == "agent_1" and loads == 1
+
+
+async def test_loader_error_reaches_every_waiter():
+    cache = AsyncTTLCache(10, ttl=60)
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        raise RuntimeError("retell down")
+
+    waiters = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats()["entries"] == 0
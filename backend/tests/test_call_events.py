@@ -0,0 +1,99 @@
+"""Live call updates: Last-Event-ID resume and subscriber cleanup on disconnect."""
+import json
+
+import pytest
+
+from routers.calls import call_events
+from services.broker import CallEventBroker
+from settings import settings
+
+CALL_A = "00000000-0000-0000-0000-00000000000a"
+CALL_B = "00000000-0000-0000-0000-00000000000b"
+
+
+class StubRequest:
+    """What the SSE route reads from the request: headers and disconnect state."""
+
+    def __init__(self, last_event_id=None) -> None:
+        self.headers = {"last-event-id": str(last_event_id)} if last_event_id is not None else {}
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+@pytest.fixture(autouse=True)
+def fast_heartbeat(monkeypatch):
+    monkeypatch.setattr(settings, "call_events_heartbeat_seconds", 0.01)
+
+
+async def _connect(broker, call_id=None, last_event_id=None):
+    request = StubRequest(last_event_id)
+    response = await call_events(request, call_id, broker)
+    stream = response.body_iterator
+    assert await anext(stream) == "retry: 3000\n\n"
+    return request, stream
+
+
+async def _events(stream, n):
+    """The next ``n`` events as (id, payload), failing on a keep-alive in between."""
+    out = []
+    for _ in range(n):
+        frame = await anext(stream)
+        assert not frame.startswith(":"), "expected an event, got a keep-alive"
+        lines = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+        out.append((int(lines["id"]), json.loads(lines["data"])))
+    return out
+
+
+def _publish(broker, call_id, status):
+    return broker.publish({"id": call_id, "status": status, "type": "call_updated"})["seq"]
+
+
+async def test_reconnect_replays_only_missed_events():
+    broker = CallEventBroker(subscriber_queue_size=16, history=100)
+    _publish(broker, CALL_A, "queued")  # before the first connection: not replayed
+
+    _, stream = await _connect(broker)
+    _publish(broker, CALL_A, "not_joined")
+    _publish(broker, CALL_B, "queued")
+    seen = await _events(stream, 2)
+    assert [seq for seq, _ in seen] == [2, 3]
+    await stream.aclose()  # client went away
+    assert broker.stats()["subscribers"] == 0
+
+    missed = [_publish(broker, CALL_A, "in_progress"), _publish(broker, CALL_B, "not_joined")]
+    _, stream = await _connect(broker, last_event_id=seen[-1][0])
+    replayed = await _events(stream, 2)
+    assert [seq for seq, _ in replayed] == missed
+    assert [e["status"] for _, e in replayed] == ["in_progress", "not_joined"]
+    assert await anext(stream) == ": keep-alive\n\n"  # nothing else pending
+
+    live = _publish(broker, CALL_A, "completed")
+    assert [seq for seq, _ in await _events(stream, 1)] == [live]
+    await stream.aclose()
+    assert broker.stats()["subscribers"] == 0
+
+
+async def test_resume_for_one_call_skips_other_calls():
+    broker = CallEventBroker(subscriber_queue_size=16, history=100)
+    first = _publish(broker, CALL_A, "queued")
+    _publish(broker, CALL_B, "queued")
+    wanted = _publish(broker, CALL_A, "in_progress")
+
+    _, stream = await _connect(broker, call_id=CALL_A, last_event_id=first)
+    assert [(seq, e["id"]) for seq, e in await _events(stream, 1)] == [(wanted, CALL_A)]
+    assert await anext(stream) == ": keep-alive\n\n"
+    await stream.aclose()
+
+
+async def test_disconnect_detected_between_events_unsubscribes():
+    broker = CallEventBroker(subscriber_queue_size=16, history=100)
+    request, stream = await _connect(broker)
+    assert await anext(stream) == ": keep-alive\n\n"
+    assert broker.stats()["subscribers"] == 1
+
+    request.disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert broker.stats()["subscribers"] == 0
@@ -0,0 +1,85 @@
+"""POST /api/calls/start: deadline, background dispatch and cancellation."""
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from services import call_start
+from services.retell import RetellService
+from settings import settings
+
+
+class SlowRetell(RetellService):
+    """Fake Retell whose web-call creation never answers in time."""
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        super().__init__(client)
+        self.entered = asyncio.Event()
+
+    async def start_outbound_call(self, **kwargs):
+        self.entered.set()
+        await asyncio.sleep(30)
+
+
+def _start(app_client, agent_config_id, **params):
+    body = {"driver_name": "Ana", "load_number": "L-1", "agent_config_id": agent_config_id}
+    return app_client.post("/api/calls/start", json=body, params=params)
+
+
+def _only_new_call(store, seeded):
+    new = [r for r in store.table("calls").rows if r["id"] not in seeded]
+    assert len(new) == 1
+    return new[0]
+
+
+def test_start_deadline_returns_504_and_fails_row(app_client, store, agent_config_id, monkeypatch):
+    async def hang(self, **kwargs):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(RetellService, "start_outbound_call", hang)
+    monkeypatch.setattr(settings, "call_start_deadline_seconds", 0.2)
+    seeded = {r["id"] for r in store.table("calls").rows}
+
+    resp = _start(app_client, agent_config_id)
+
+    assert resp.status_code == 504, resp.text
+    assert resp.json()["detail"] == "Timed out starting call"
+    assert _only_new_call(store, seeded)["status"] == "failed"
+
+
+def test_background_start_returns_202_then_dispatches(app_client, store, agent_config_id):
+    resp = _start(app_client, agent_config_id, background="true")
+
+    assert resp.status_code == 202, resp.text
+    body = resp.json()
+    assert body["status"] == "queued" and "retell_call_id" not in body
+    deadline = time.monotonic() + 5
+    while (row := store.find_call(body["id"], None))["status"] == "queued":
+        assert time.monotonic() < deadline, "background dispatch never ran"
+        time.sleep(0.02)
+    assert row["status"] == "not_joined"
+    assert row["retell_call_id"].startswith("call_") and row["retell_call_access_token"]
+    assert app_client.get("/api/calls/dispatch/stats").json()["dispatched"] == 1
+
+
+@pytest.fixture
+async def retell_client(fake_servers):
+    async with httpx.AsyncClient(base_url=os.environ["RETELL_BASE_URL"]) as client:
+        yield client
+
+
+async def test_cancelled_dispatch_marks_row_failed(sb, store, retell_client, agent_config_id):
+    service = SlowRetell(retell_client)
+    row = call_start.new_call_row("Ana", "L-2", agent_config_id)
+    await sb.table(call_start.CALLS_TABLE).insert(row).execute()
+
+    task = asyncio.create_task(call_start.dispatch_call(sb, service, row, "agent_fake"))
+    await service.entered.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert row["status"] == "failed"
+    assert store.find_call(row["id"], None)["status"] == "failed"
@@ -0,0 +1,36 @@
+"""Call detail and list responses for rows whose Retell call does not exist yet."""
+CALL_ID = "00000000-0000-0000-0000-0000000000c1"
+SCHEDULE_ID = "00000000-0000-0000-0000-0000000005c1"
+
+
+def _queued_row(store, agent_config_id):
+    # As inserted by the scheduler or background dispatch, before Retell answers
+    store.table("calls").insert({
+        "id": CALL_ID,
+        "driver_name": "Ana",
+        "load_number": "L-9",
+        "agent_config_id": agent_config_id,
+        "schedule_id": SCHEDULE_ID,
+        "status": "queued",
+        "retell_call_id": None,
+        "retell_call_access_token": None,
+        "started_at": "2030-01-01T00:00:00+00:00",
+    })
+
+
+def test_queued_call_detail_and_refresh(app_client, store, agent_config_id):
+    _queued_row(store, agent_config_id)
+    resp = app_client.get(f"/api/calls/{CALL_ID}")
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["schedule_id"] == SCHEDULE_ID and body["retell_call_id"] is None
+    resp = app_client.post(f"/api/calls/{CALL_ID}/refresh")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["retell_call_access_token"] is None
+
+
+def test_list_calls_selects_schedule_id(app_client, store, agent_config_id):
+    _queued_row(store, agent_config_id)
+    resp = app_client.get("/api/calls", params={"fields": "id,schedule_id", "limit": 1})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()[0] == {"id": CALL_ID, "schedule_id": SCHEDULE_ID, "started_at": "2030-01-01T00:00:00+00:00"}
@@ -0,0 +1,69 @@
+"""Campaign fan-out: one bulk insert, capped concurrency, per-target failures."""
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from services.campaigns import Campaign
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+
+
+class FlakyRetell(RetellService):
+    """Fake Retell that rejects some loads and records peak concurrency."""
+
+    def __init__(self, client: httpx.AsyncClient, failing: set) -> None:
+        super().__init__(client)
+        self.failing = failing
+        self.in_flight = self.peak = 0
+
+    async def start_outbound_call(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if kwargs["load_number"] in self.failing:
+                raise RuntimeError(f"rejected {kwargs['load_number']}")
+            return await super().start_outbound_call(**kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+class CountingLimiter(AsyncRateLimiter):
+    acquired = 0
+
+    async def acquire(self) -> None:
+        self.acquired += 1
+        await super().acquire()
+
+
+@pytest.fixture
+async def retell_client(fake_servers):
+    async with httpx.AsyncClient(base_url=os.environ["RETELL_BASE_URL"]) as client:
+        yield client
+
+
+async def test_campaign_records_failures_per_target(sb, store, postgrest, retell_client, agent_config_id):
+    targets = [{"driver_name": f"D{i}", "load_number": f"C-{i}"} for i in range(12)]
+    failing = {"C-3", "C-7", "C-11"}
+    service = FlakyRetell(retell_client, failing)
+    limiter = CountingLimiter(1e9, 10**6)
+    campaign = Campaign(agent_config_id, "agent_fake", targets, concurrency=4, limiter=limiter)
+
+    stats = await campaign.run(sb, service)
+
+    assert stats["status"] == "completed"
+    assert (stats["total"], stats["started"], stats["failed"], stats["pending"]) == (12, 9, 3, 0)
+    assert sorted(f["load_number"] for f in stats["failures"]) == sorted(failing)
+    assert all(f["error"].startswith("rejected") for f in stats["failures"])
+    assert service.peak == 4 and limiter.acquired == 12
+
+    rows = [r for r in store.table("calls").rows if r.get("campaign_id") == campaign.id]
+    by_load = {r["load_number"]: r for r in rows}
+    assert len(rows) == 12
+    assert {load for load, r in by_load.items() if r["status"] == "failed"} == failing
+    assert {f["call_id"] for f in stats["failures"]} == {by_load[load]["id"] for load in failing}
+    assert all(r["retell_call_id"] for load, r in by_load.items() if load not in failing)
+    # One bulk INSERT for all rows
+    assert postgrest.get("/__stats").json()["by_endpoint"]["POST calls"] == 1
@@ -0,0 +1,112 @@
+"""An incrementally synced DialogSession replies like a fresh pass over the transcript."""
+import random
+import re
+
+import pytest
+
+from services.dialog import (
+    CLOSING_REPLY,
+    EMERGENCY_REPLY,
+    PROBE_MARKER,
+    REPEAT_MARKER,
+    DialogSession,
+    count_prompts_in_transcript,
+    detect_conflict,
+    is_emergency,
+    last_driver_message,
+    looks_garbled,
+    looks_uncooperative,
+    next_agent_message,
+)
+
+CONFIG = {"prompts": {"greeting_template": "Hi {driver_name}, checking on load {load_number}.",
+                      "emergency_trigger_phrases": ["accident", "blowout", "medical", "emergency"]}}
+CONTEXT = {"driver_name": "Mike", "load_number": "7781", "gps_location": "I-10 near Indio, CA"}
+DRIVER_TEXTS = [
+    "ok", "driving", "I'm on I-10 near Indio", "stuck in traffic", "arriving at the dock",
+    "[inaudible]", "uh", "near Phoenix today", "had a blowout", "#$%", None, "",
+]
+AGENT_TEXTS = [f"{REPEAT_MARKER} could you repeat?", f"{PROBE_MARKER} any delays?", "Thanks.", None]
+
+
+def _reference(transcript: list) -> str:
+    """The original full-transcript implementation, kept independent of DialogSession."""
+    transcript = [{**m, "text": m.get("text") or ""} for m in transcript]
+    if not any(m.get("role") == "agent" for m in transcript):
+        return "Hi Mike, checking on load 7781."
+    text = last_driver_message(transcript)
+    if is_emergency(text, CONFIG["prompts"]["emergency_trigger_phrases"]):
+        return EMERGENCY_REPLY
+    if looks_garbled(text):
+        if count_prompts_in_transcript(transcript, REPEAT_MARKER) < 2:
+            return f"{REPEAT_MARKER} I had trouble hearing that. Could you please repeat your status and location?"
+        return "I'm still having trouble hearing you. I'll connect you to a dispatcher who can assist."
+    if looks_uncooperative(text):
+        if count_prompts_in_transcript(transcript, PROBE_MARKER) < 2:
+            return f"{PROBE_MARKER} Thanks. Could you share your current location, ETA, and any delays?"
+        return CLOSING_REPLY
+    if detect_conflict(text, CONTEXT["gps_location"]):
+        return f"Appreciate the update. Our GPS shows you near {CONTEXT['gps_location']}. Does that sound right?"
+    if re.search(r"arriv|dock|unload", text, re.I):
+        return "Great. Are you in a door yet, and do you expect detention or lumper?"
+    if re.search(r"delay|late|traffic|weather|breakdown", text, re.I):
+        return "Thanks for letting me know. What's your updated ETA and precise location?"
+    return "Thanks. What's your exact location and ETA to destination? Any delays to report?"
+
+
+def _check(session: DialogSession, transcript: list) -> None:
+    session.sync(transcript)
+    expected = _reference(transcript)
+    assert next_agent_message([dict(m) for m in transcript], CONFIG, CONTEXT) == expected, transcript
+    assert session.reply() == expected, transcript
+
+
+def test_edited_last_turn():
+    session = DialogSession(CONFIG, CONTEXT)
+    transcript = [{"role": "agent", "text": "Hi"}, {"role": "user", "text": "I had a blow"}]
+    _check(session, transcript)
+    transcript[-1] = {"role": "user", "text": "I had a blowout"}
+    _check(session, transcript)
+    # Edited and followed by new turns in the same update
+    transcript[-1] = {"role": "user", "text": "I had a blowout, pulled over"}
+    transcript += [{"role": "agent", "text": f"{PROBE_MARKER} ok?"}, {"role": "user", "text": "ok"}]
+    _check(session, transcript)
+    # The last turn re-attributed to the agent, then rewritten to drop its marker
+    transcript[-1] = {"role": "agent", "text": f"{REPEAT_MARKER} sorry?"}
+    _check(session, transcript)
+    transcript[-1] = {"role": "agent", "text": "sorry?"}
+    _check(session, transcript)
+
+
+def test_shrinking_transcript_and_none_text():
+    session = DialogSession(CONFIG, CONTEXT)
+    transcript = [
+        {"role": "agent", "text": f"{REPEAT_MARKER} again?"},
+        {"role": "user", "text": None},
+        {"role": "agent", "text": None},
+        {"role": "user", "text": "stuck in traffic"},
+    ]
+    _check(session, transcript)
+    _check(session, transcript[:2])
+    _check(session, [])
+    _check(session, transcript)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_live_transcripts(seed):
+    rng = random.Random(seed)
+    session = DialogSession(CONFIG, CONTEXT)
+    transcript: list = []
+    for _ in range(60):
+        op = rng.random()
+        if op < 0.6 or not transcript:
+            for _ in range(rng.randint(1, 3)):
+                role = rng.choice(("agent", "user", "driver"))
+                transcript.append({"role": role, "text": rng.choice(AGENT_TEXTS if role == "agent" else DRIVER_TEXTS)})
+        elif op < 0.85:
+            # Usually the same speaker, sometimes re-attributed
+            role = transcript[-1]["role"] if rng.random() < 0.8 else rng.choice(("agent", "user"))
+            transcript[-1] = {"role": role, "text": rng.choice(AGENT_TEXTS if role == "agent" else DRIVER_TEXTS)}
+        else:
+            del transcript[rng.randint(0, len(transcript) - 1):]
+        _check(session, transcript)
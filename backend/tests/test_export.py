@@ -0,0 +1,80 @@
+"""Streaming export: CSV and NDJSON across keyset pages, plain and gzipped."""
+import csv
+import gzip
+import io
+import json
+import uuid
+
+import pytest
+
+from services.export import csv_columns
+
+# More than two pages of ``iter_call_pages`` (500 rows each)
+EXTRA_CALLS = 1040
+TIED_STARTED_AT = "2029-06-01T12:00:00+00:00"
+
+
+@pytest.fixture
+def many_calls(store, agent_config_id):
+    calls = store.table("calls")
+    for i in range(EXTRA_CALLS):
+        # Runs of equal started_at and a few undated calls straddle page boundaries
+        if i % 100 == 0:
+            started_at = None
+        elif i % 7 == 0:
+            started_at = TIED_STARTED_AT
+        else:
+            started_at = f"2029-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}+00:00"
+        calls.insert({
+            "id": str(uuid.uuid4()),
+            "driver_name": f"Export {i}",
+            "load_number": f"EX-{i}",
+            "agent_config_id": agent_config_id,
+            "status": "completed",
+            "driver_status": "Driving",
+            "started_at": started_at,
+            "summary": {"structured": {"call_outcome": "In-Transit Update"}},
+        })
+    # Newest first, undated calls first (Postgres nulls-first for desc), id breaking ties
+    rows = sorted(calls.rows, key=lambda r: (r["started_at"] is None, r["started_at"] or "", r["id"]), reverse=True)
+    return [r["id"] for r in rows]
+
+
+def _export(app_client, **params):
+    resp = app_client.get("/api/calls/export", params=params)
+    assert resp.status_code == 200, resp.text
+    return resp
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_pages_and_gzip_match(app_client, postgrest, many_calls, fmt):
+    plain = _export(app_client, format=fmt, include_transcript="false").content
+    pages = postgrest.get("/__stats").json()["by_endpoint"]["GET calls"]
+    zipped = _export(app_client, format=fmt, include_transcript="false", gzip="true")
+
+    assert pages == 3
+    assert zipped.headers["content-type"] == "application/gzip"
+    assert zipped.headers["content-disposition"] == f'attachment; filename="calls.{fmt}.gz"'
+    assert gzip.decompress(zipped.content) == plain
+
+    text = plain.decode()
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        assert reader.fieldnames == csv_columns(False)
+        rows = list(reader)
+    else:
+        rows = [json.loads(line) for line in text.splitlines()]
+    assert [r["id"] for r in rows] == many_calls
+    assert rows[-1]["structured_call_outcome"] == "In-Transit Update"
+
+
+def test_export_filters_and_transcripts(app_client, store, many_calls):
+    store.table("calls").index[(many_calls[0],)]["status"] = "failed"
+    store.table("call_utterances").insert({"call_id": many_calls[0], "seq": 0, "role": "agent", "text": "Hi"})
+
+    lines = _export(app_client, status="failed").text.splitlines()
+    rows = [json.loads(line) for line in lines]
+
+    assert many_calls[0] in {r["id"] for r in rows}
+    assert all(r["status"] == "failed" for r in rows)
+    assert next(r for r in rows if r["id"] == many_calls[0])["transcript_text"] == "agent: Hi"
@@ -0,0 +1,46 @@
+"""Flow templates stay valid and their scripted scenarios keep passing."""
+import json
+from pathlib import Path
+
+import pytest
+
+from services.flow_sim import FlowGraph, _load_flow, run_scenarios
+
+FLOWS = Path(__file__).resolve().parent.parent / "flows"
+TEMPLATES = sorted(FLOWS.glob("*.json"))
+SCENARIOS = sorted((FLOWS / "scenarios").glob("*.json"))
+
+
+def test_templates_present():
+    assert TEMPLATES and SCENARIOS
+
+
+@pytest.mark.parametrize("path", TEMPLATES, ids=lambda p: p.name)
+def test_template_validates(path):
+    errors = [i for i in FlowGraph(_load_flow(str(path))).validate() if i["severity"] == "error"]
+    assert errors == []
+
+
+@pytest.mark.parametrize("path", SCENARIOS, ids=lambda p: p.name)
+def test_scenarios_pass(path):
+    # Scenarios are named after the template they exercise
+    graph = FlowGraph(_load_flow(str(FLOWS / path.name)))
+    scenarios = json.loads(path.read_text(encoding="utf-8"))
+    failed = {r["name"]: r["failures"] for r in run_scenarios(graph, scenarios) if not r["ok"]}
+    assert scenarios and failed == {}
+
+
+def test_broken_flow_is_reported():
+    flow = {
+        "start_node_id": "start",
+        "nodes": [
+            {"id": "start", "edges": [{"id": "to-missing", "destination_node_id": "missing"}, {"id": "to-end", "destination_node_id": "end"}]},
+            {"id": "orphan", "name": "Orphan", "edges": [{"id": "orphan-end", "destination_node_id": "end"}]},
+            {"id": "end", "type": "end"},
+        ],
+    }
+    codes = {(i["code"], i["severity"]) for i in FlowGraph(flow).validate()}
+    assert ("dangling_edge", "error") in codes
+    assert ("unreachable_node", "warning") in codes
+    messages = [i["message"] for i in FlowGraph(flow).validate()]
+    assert any("'missing'" in m for m in messages) and any(m.startswith("orphan") for m in messages)
@@ -0,0 +1,21 @@
+"""App lifespan: a startup failure still tears down what was already started."""
+import pytest
+
+
+def test_failed_startup_stops_workers_and_closes_clients(monkeypatch, store):
+    import main
+    from fastapi.testclient import TestClient
+
+    def broken_scheduler(*args, **kwargs):
+        raise RuntimeError("scheduler misconfigured")
+
+    monkeypatch.setattr(main, "CallScheduler", broken_scheduler)
+    app = main.create_app()
+    with pytest.raises(RuntimeError, match="scheduler misconfigured"):
+        with TestClient(app):
+            pass
+
+    assert app.state.ingestion._tasks == [] and app.state.ingestion._stopping
+    assert app.state.call_dispatcher._tasks == []
+    assert app.state.retell_client.is_closed
+    assert app.state.supabase.postgrest.session.is_closed
@@ -0,0 +1,44 @@
+"""Retell custom-LLM WebSocket: malformed frames are skipped, the call stays up."""
+import json
+
+import pytest
+
+from services.custom_llm import CustomLLMConnection, TurnLatency, dialog_config
+
+
+@pytest.mark.parametrize(
+    "msg",
+    [
+        [],
+        "ping",
+        42,
+        None,
+        {"interaction_type": "call_details", "call": ["not", "an", "object"]},
+        {"interaction_type": "call_details", "call": {"retell_llm_dynamic_variables": "x", "metadata": 1}},
+        {"interaction_type": "response_required", "response_id": 1, "transcript": "hello"},
+        {"interaction_type": "response_required", "response_id": 1, "transcript": [1, None, {"role": "user", "content": "hi"}]},
+    ],
+)
+def test_handle_tolerates_malformed_messages(msg):
+    conn = CustomLLMConnection("call_1", dialog_config(), TurnLatency(16))
+    assert isinstance(conn.handle(msg), list)
+
+
+def test_socket_survives_non_object_frames(app_client):
+    with app_client.websocket_connect("/api/llm/ws/call_1") as ws:
+        assert ws.receive_json()["response_type"] == "config"
+        for raw in ("[]", '"ping"', "3", "not json"):
+            ws.send_text(raw)
+        ws.send_text(json.dumps({"interaction_type": "ping_pong", "timestamp": 7}))
+        assert ws.receive_json() == {"response_type": "ping_pong", "timestamp": 7}
+
+
+def test_socket_records_turn_latency(app_client):
+    with app_client.websocket_connect("/api/llm/ws/call_1") as ws:
+        ws.receive_json()
+        ws.send_text("[]")
+        ws.send_text(json.dumps({"interaction_type": "response_required", "response_id": 1, "transcript": []}))
+        assert ws.receive_json()["response_id"] == 1
+        stats = app_client.get("/api/llm/stats").json()
+        assert (stats["turns"], stats["connections_open"], stats["connections_total"]) == (1, 1, 1)
+    assert app_client.get("/api/llm/stats").json()["connections_open"] == 0
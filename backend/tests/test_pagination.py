@@ -0,0 +1,64 @@
+"""Keyset cursors: only a timestamp (or null) and a uuid ever reach the ``or=`` filter."""
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from db.pagination import encode_cursor, keyset_before, keyset_filter, next_cursor
+
+ROW_ID = "0b4f8f5e-6f53-4a56-9a43-2a3d2b0a6f11"
+
+
+class RecordingQuery:
+    def __init__(self) -> None:
+        self.filters = []
+
+    def or_(self, expr):
+        self.filters.append(expr)
+        return self
+
+
+def _raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = next_cursor([{"id": ROW_ID, "started_at": "2026-01-02T03:04:05+00:00"}], 1)
+    query = keyset_before(RecordingQuery(), cursor)
+    assert query.filters == [
+        f'started_at.lt."2026-01-02T03:04:05+00:00",and(started_at.eq."2026-01-02T03:04:05+00:00",id.lt.{ROW_ID})'
+    ]
+
+
+def test_null_started_at_continues_into_dated_rows():
+    query = keyset_before(RecordingQuery(), encode_cursor(None, ROW_ID))
+    assert query.filters == [f"and(started_at.is.null,id.lt.{ROW_ID}),started_at.not.is.null"]
+
+
+def test_ascending_filter_keeps_null_rows_last():
+    assert keyset_filter("2026-01-02T03:04:05", ROW_ID, desc=False).endswith(",started_at.is.null")
+    assert keyset_filter(None, ROW_ID, desc=False) == f"and(started_at.is.null,id.gt.{ROW_ID})"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        ["2026-01-01T00:00:00", "x),status.eq.failed"],
+        ['2026-01-01",status.neq.x,id.eq."1', ROW_ID],
+        ["None", ROW_ID],
+        [12, ROW_ID],
+        ["2026-01-01T00:00:00"],
+        {"started_at": None},
+    ],
+)
+def test_crafted_cursors_are_rejected(value):
+    with pytest.raises(HTTPException) as exc:
+        keyset_before(RecordingQuery(), _raw_cursor(value))
+    assert exc.value.status_code == 400
+
+
+def test_list_route_rejects_crafted_cursor(app_client, postgrest):
+    resp = app_client.get("/api/calls", params={"cursor": _raw_cursor(["2026-01-01", "1,id.neq.0"])})
+    assert resp.status_code == 400
+    assert postgrest.get("/__stats").json()["total"] == 0
@@ -0,0 +1,26 @@
+"""Golden tests for ``generate_structured_summary``.
+
+``fixtures/postprocess_golden.json`` holds hand-written check-call and
+emergency transcripts plus synthetic ones (``bench.bench_postprocess``
+generator), each with the summary produced by the implementation before the
+patterns were precompiled. Any change in output is a behaviour change and
+needs the fixture regenerated deliberately.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from services.postprocess import generate_structured_summary
+
+CASES = json.loads((Path(__file__).parent / "fixtures" / "postprocess_golden.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c["name"] for c in CASES])
+def test_matches_golden_output(case):
+    assert generate_structured_summary(case["transcript"]) == case["expected"]
+
+
+def test_golden_cases_cover_every_outcome():
+    outcomes = {c["expected"]["call_outcome"] for c in CASES}
+    assert outcomes == {"In-Transit Update", "Arrival Confirmation", "Emergency Escalation"}
@@ -0,0 +1,82 @@
+"""Circuit breaker around Retell calls: every way out of a trial call settles it."""
+import asyncio
+
+import httpx
+import pytest
+
+from services.resilience import CircuitBreaker
+from services.retell import RetellService
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, cooldown=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now = 31
+    return breaker
+
+
+def _service(handler, breaker: CircuitBreaker) -> RetellService:
+    client = httpx.AsyncClient(base_url="http://retell.test", transport=httpx.MockTransport(handler))
+    return RetellService(client, breaker=breaker)
+
+
+async def test_cancelled_trial_releases_half_open_slot():
+    breaker = _half_open_breaker()
+    started = asyncio.Event()
+
+    async def hang(request):
+        started.set()
+        await asyncio.sleep(3600)
+
+    service = _service(hang, breaker)
+    trial = asyncio.create_task(service.get_call("call_1"))
+    await started.wait()
+    assert breaker.state == "half_open"
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    # The next call is let through as a new trial instead of being short-circuited
+    async def ok(request):
+        return httpx.Response(200, json={"call_id": "call_1"})
+
+    service = _service(ok, breaker)
+    assert await service.get_call("call_1") == {"call_id": "call_1"}
+    assert breaker.state == "closed"
+    assert breaker.stats()["short_circuited"] == 0
+
+
+async def test_deadline_on_trial_does_not_wedge_breaker():
+    breaker = _half_open_breaker()
+
+    async def slow(request):
+        await asyncio.sleep(3600)
+
+    service = _service(slow, breaker)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await service.get_call("call_1")
+    assert breaker.allow()
+
+
+async def test_unexpected_error_in_trial_counts_as_failure():
+    breaker = _half_open_breaker()
+
+    def broken(request):
+        raise ValueError("bad response")
+
+    service = _service(broken, breaker)
+    with pytest.raises(ValueError):
+        await service.get_call("call_1")
+    assert breaker.state == "open"
+    assert not breaker.allow()
@@ -0,0 +1,58 @@
+"""A failed scheduled call is retried on the same cadence and is not counted."""
+import os
+
+import httpx
+import pytest
+
+from services import scheduler as scheduler_module
+from services.ratelimit import AsyncRateLimiter
+from services.retell import RetellService
+from services.scheduler import SCHEDULES_TABLE, CallScheduler, Schedule, new_schedule_row
+
+T0 = 1_800_000_000.0
+HOUR = 3600
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+async def service(fake_servers):
+    async with httpx.AsyncClient(base_url=os.environ["RETELL_BASE_URL"]) as client:
+        yield RetellService(client)
+
+
+async def test_failed_dispatch_keeps_cadence_and_api_changes(sb, service, store, agent_config_id, monkeypatch):
+    clock = FakeClock(T0)
+    scheduler = CallScheduler(sb, service, AsyncRateLimiter(1e9, 10**6), 4, retry_seconds=60, clock=clock)
+    row = new_schedule_row(agent_config_id, "D", "L-1", HOUR, T0, ["Arrived"], None)
+    await sb.table(SCHEDULES_TABLE).insert(row).execute()
+    scheduler.track(Schedule.from_row(row))
+
+    dispatch = scheduler_module.dispatch_call
+
+    async def failing_dispatch(*args, **kwargs):
+        # The interval is changed through the API while the call is being placed
+        resp = await sb.table(SCHEDULES_TABLE).update({"interval_seconds": 2 * HOUR}).eq("id", row["id"]).execute()
+        scheduler.track(Schedule.from_row(resp.data[0]))
+        raise RuntimeError("retell down")
+
+    monkeypatch.setattr(scheduler_module, "dispatch_call", failing_dispatch)
+    assert await scheduler.run_due() == 1
+    stored = store.table(SCHEDULES_TABLE).index[(row["id"],)]
+    assert scheduler.failures == 1 and stored["calls_made"] == 0
+    assert scheduler._schedules[row["id"]].interval_seconds == 2 * HOUR
+    assert scheduler.next_due() == T0 + 60
+
+    # The retry places the call for the same slot: the next one stays an hour after T0
+    monkeypatch.setattr(scheduler_module, "dispatch_call", dispatch)
+    clock.now = T0 + 60
+    assert await scheduler.run_due() == 1
+    assert stored["calls_made"] == 1
+    assert scheduler.next_due() == T0 + HOUR
+    assert scheduler._schedules[row["id"]].interval_seconds == 2 * HOUR
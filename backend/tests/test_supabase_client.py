@@ -0,0 +1,92 @@
+"""Round trips to PostgREST per route, counted by the stand-in server.
+
+Every route shares the one async Supabase client created in the app lifespan,
+and each operation costs a fixed, small number of requests.
+"""
+import time
+
+from bench import fakes
+
+
+def _round_trips(postgrest) -> dict:
+    return postgrest.get("/__stats").json()["by_endpoint"]
+
+
+def _wait_processed(app_client, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while app_client.get("/api/webhook/retell/stats").json()["processed"] < count:
+        assert time.monotonic() < deadline, "webhook was not processed"
+        time.sleep(0.01)
+
+
+def test_routes_share_one_client(monkeypatch, store):
+    import main
+    from fastapi.testclient import TestClient
+
+    created = []
+    real = main.create_async_supabase
+
+    async def counting():
+        created.append(await real())
+        return created[-1]
+
+    monkeypatch.setattr(main, "create_async_supabase", counting)
+    app = main.create_app()
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.get("/api/calls").status_code == 200
+            assert client.get(f"/api/calls/{fakes.seed_call_id(0)}/utterances").status_code == 200
+        assert len(created) == 1
+        assert app.state.supabase is created[0]
+
+
+def test_list_calls_is_one_round_trip(app_client, postgrest):
+    resp = app_client.get("/api/calls", params={"limit": 5, "status": "completed"})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 4
+    assert _round_trips(postgrest) == {"GET calls": 1}
+
+
+def test_start_call_round_trips(app_client, postgrest, agent_config_id):
+    resp = app_client.post(
+        "/api/calls/start",
+        json={"driver_name": "Ana", "load_number": "L-1", "agent_config_id": agent_config_id},
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["retell_call_id"].startswith("call_")
+    # Agent lookup and INSERT run concurrently, then one UPDATE with the Retell ids
+    assert _round_trips(postgrest) == {"GET agent_configs": 1, "POST calls": 1, "PATCH calls": 1}
+
+
+def test_call_analyzed_is_persisted_in_one_write(app_client, postgrest, store):
+    call_id = fakes.seed_call_id(1)
+    body = {
+        "event": "call_analyzed",
+        "call": {
+            "call_id": "seed_1",
+            "call_status": "ended",
+            "end_timestamp": 1_700_000_000_000,
+            "metadata": {"call_id": call_id},
+            "call_analysis": {"call_summary": "Driver is on schedule"},
+            "transcript_object": [
+                {"role": "agent", "content": "Hi, where are you now?"},
+                {"role": "user", "content": "On I-10 near Phoenix, should arrive at 4pm."},
+            ],
+        },
+    }
+    assert app_client.post("/api/webhook/retell", json=body).status_code == 200
+    _wait_processed(app_client, 1)
+
+    # Utterance append, then one write of status + merged summary + idempotency record
+    assert _round_trips(postgrest) == {"rpc/append_call_utterances": 1, "rpc/apply_call_analyzed": 1}
+    assert store.table("webhook_events").rows == [{"call_id": "seed_1", "event": "call_analyzed"}]
+    row = store.table("calls").index[(call_id,)]
+    assert row["status"] == "completed"
+    # Existing summary keys are kept; the new ones are merged in
+    assert row["summary"]["call_analysis"] == {"call_summary": "Driver is on schedule"}
+    assert "structured" in row["summary"] and row["summary"]["structured"] != {"call_outcome": "In-Transit Update"}
+    assert len(store.table("call_utterances").rows) == 2
+
+    # A redelivery is dropped before it reaches the database
+    assert app_client.post("/api/webhook/retell", json=body).json().get("duplicate") is True
+    assert sum(_round_trips(postgrest).values()) == 2
@@ -0,0 +1,40 @@
+"""Live transcripts rewrite the latest utterance; the stored copy must follow."""
+from services.call_events import TranscriptCursor, apply_call_event
+
+CALL_ID = "00000000-0000-0000-0000-0000000000e1"
+
+
+def _event(event: str, *lines: str) -> dict:
+    roles = ("agent", "user")
+    return {
+        "event": event,
+        "call": {
+            "call_id": "retell_e1",
+            "call_status": "ended" if event != "transcript_updated" else "ongoing",
+            "metadata": {"call_id": CALL_ID},
+            "transcript_object": [{"role": roles[i % 2], "content": text} for i, text in enumerate(lines)],
+        },
+    }
+
+
+def _texts(store) -> list:
+    rows = [r for r in store.table("call_utterances").rows if r["call_id"] == CALL_ID]
+    return [r["text"] for r in sorted(rows, key=lambda r: r["seq"])]
+
+
+async def test_latest_utterance_is_corrected(sb, store):
+    store.table("calls").insert({"id": CALL_ID, "driver_name": "D", "load_number": "L", "status": "in_progress"})
+    cursor = TranscriptCursor(10)
+
+    await apply_call_event(sb, _event("transcript_updated", "Hi", "I am near Dal"), cursor)
+    await apply_call_event(sb, _event("transcript_updated", "Hi", "I am near Dallas", "Thanks"), cursor)
+    assert _texts(store) == ["Hi", "I am near Dallas", "Thanks"]
+
+    # A stale delivery after a cursor miss does not truncate what is stored
+    await apply_call_event(sb, _event("transcript_updated", "Hi", "I am near Dal"), TranscriptCursor(10))
+    assert _texts(store) == ["Hi", "I am near Dallas", "Thanks"]
+
+    # The final transcript is authoritative for the latest utterance
+    await apply_call_event(sb, _event("call_ended", "Hi", "I am near Dallas", "Bye"), cursor)
+    assert _texts(store) == ["Hi", "I am near Dallas", "Bye"]
+    assert cursor.stats()["transcript_turns_sent"] == 2 + 2 + 1
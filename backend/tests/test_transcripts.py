@@ -0,0 +1,30 @@
+"""Transcript loads stay complete across page and id-chunk boundaries."""
+import pytest
+
+from services import transcripts
+
+
+@pytest.fixture
+def utterances(store):
+    # Calls with 0..6 utterances, so pages end mid-call and some calls have none
+    expected = {}
+    for n in range(7):
+        call_id = f"00000000-0000-0000-0000-0000000001{n:02d}"
+        expected[call_id] = [{"seq": s, "role": "agent", "text": f"{n}/{s}", "start_ms": None, "end_ms": None} for s in range(n)]
+        for row in expected[call_id]:
+            store.table("call_utterances").insert({"call_id": call_id, **row})
+    return expected
+
+
+async def test_load_transcripts_pages_and_chunks(sb, utterances, monkeypatch):
+    monkeypatch.setattr(transcripts, "PAGE_SIZE", 4)
+    monkeypatch.setattr(transcripts, "ID_CHUNK", 3)
+    call_ids = list(reversed(utterances))
+    loaded = await transcripts.load_transcripts(sb, call_ids)
+    assert {c: loaded.get(c, []) for c in call_ids} == utterances
+
+
+async def test_load_transcript_pages(sb, utterances, monkeypatch):
+    monkeypatch.setattr(transcripts, "PAGE_SIZE", 2)
+    call_id = "00000000-0000-0000-0000-000000000106"
+    assert await transcripts.load_transcript(sb, call_id) == utterances[call_id]
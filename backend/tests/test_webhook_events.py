@@ -0,0 +1,49 @@
+"""Lifecycle webhooks are recorded as processed only together with their effect."""
+import pytest
+
+from services.broker import CallEventBroker
+from services.call_events import handle_webhook_event
+from services.idempotency import WebhookDeduplicator
+
+
+def _analyzed(retell_call_id: str, call_id: str) -> dict:
+    return {
+        "event": "call_analyzed",
+        "call": {
+            "call_id": retell_call_id,
+            "call_status": "ended",
+            "metadata": {"call_id": call_id},
+            "transcript_object": [{"role": "user", "content": "Arrived at the receiver."}],
+        },
+    }
+
+
+async def test_failed_apply_is_replayed_not_skipped(sb, store, postgrest):
+    dedup = WebhookDeduplicator(100, 60)
+    broker = CallEventBroker(10, 10)
+    call_id = "00000000-0000-0000-0000-0000000000f1"
+    body = _analyzed("retell_f1", call_id)
+
+    # The call row is not there yet: the event fails and nothing is recorded
+    with pytest.raises(RuntimeError, match="Local call not found"):
+        await handle_webhook_event(sb, dedup, body, broker)
+    assert store.table("webhook_events").rows == []
+
+    # Replay from the queue once the row exists applies it
+    store.table("calls").insert({"id": call_id, "driver_name": "D", "load_number": "L", "status": "in_progress"})
+    sub = broker.subscribe(call_id)
+    await handle_webhook_event(sb, dedup, body, broker)
+    assert store.table("calls").index[(call_id,)]["status"] == "completed"
+    assert len(store.table("webhook_events").rows) == 1
+    assert broker.stats()["published"] == 1
+    event = await sub.get(timeout=1)
+    assert event["status"] == "completed" and event["structured"]["call_outcome"]
+
+    # A second delivery is recognised by the ledger before any write and not published again
+    utterances = [dict(r) for r in store.table("call_utterances").rows]
+    postgrest.post("/__reset")
+    await handle_webhook_event(sb, dedup, body, broker)
+    assert dedup.stats()["duplicates_skipped_persistent"] == 1
+    assert broker.stats()["published"] == 1
+    assert postgrest.get("/__stats").json()["by_endpoint"] == {"rpc/append_call_utterances": 1}
+    assert store.table("call_utterances").rows == utterances